@@ -1,6 +1,8 @@
 from django.shortcuts import render, get_object_or_404
 from .models import AcademicProgram, GradeLevel, Subject, AcademicCalendar
+from st_marys_school.page_cache import cache_public_page
 
+@cache_public_page(AcademicProgram, GradeLevel)
 def programs(request):
     """Display all academic programs"""
     programs = AcademicProgram.objects.all()
@@ -41,6 +41,7 @@ class NewsAnnouncementAdmin(admin.ModelAdmin):
     search_fields = ['title', 'content']
     list_editable = ['published', 'featured']
     date_hierarchy = 'created_at'
+    list_select_related = ['created_by']
     
     fieldsets = (
         ('Content', {
@@ -126,6 +127,7 @@ class SchoolEventAdmin(admin.ModelAdmin):
     search_fields = ['title', 'description', 'location']
     list_editable = ['published']
     date_hierarchy = 'start_date'
+    list_select_related = ['created_by']
     
     fieldsets = (
         ('Event Details', {
@@ -265,6 +267,7 @@ class CurriculumInfoAdmin(admin.ModelAdmin):
     list_display = ['level', 'updated_at', 'updated_by']
     list_filter = ['level']
     ordering = ['level']
+    list_select_related = ['updated_by']
     
     fieldsets = (
         ('Level Information', {
@@ -350,6 +353,7 @@ class NewsletterAdmin(admin.ModelAdmin):
     search_fields = ['subject', 'content']
     list_editable = ['is_published']
     date_hierarchy = 'created_at'
+    list_select_related = ['created_by']
     
     fieldsets = (
         ('Newsletter Content', {
@@ -394,6 +398,7 @@ class AdminActivityLogAdmin(admin.ModelAdmin):
     readonly_fields = ['user', 'action', 'content_type', 'object_id', 'object_repr', 
                        'description', 'ip_address', 'timestamp']
     ordering = ['-timestamp']
+    list_select_related = ['user']
     
     def has_add_permission(self, request):
         # Logs are auto-generated, not manually created
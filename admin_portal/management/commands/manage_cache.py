@@ -0,0 +1,88 @@
+"""
+Management command to warm, clear or inspect the site caches
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+
+class Command(BaseCommand):
+    help = 'Warm, clear or inspect the configured cache aliases'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['warm', 'clear', 'inspect'])
+        parser.add_argument(
+            '--alias', action='append', dest='aliases',
+            help='Cache alias to act on (repeatable). Defaults to every alias in CACHES.'
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or list(settings.CACHES)
+        unknown = [alias for alias in aliases if alias not in settings.CACHES]
+        if unknown:
+            raise CommandError(f"Unknown cache alias: {', '.join(unknown)}")
+
+        getattr(self, options['action'])(aliases)
+
+    def warm(self, aliases):
+        for path in getattr(settings, 'CACHE_WARMERS', []):
+            started = time.monotonic()
+            import_string(path)()
+            elapsed = (time.monotonic() - started) * 1000
+            self.stdout.write(f'Warmed {path} ({elapsed:.1f} ms)')
+        self.stdout.write(self.style.SUCCESS('Cache warm-up complete'))
+
+    def clear(self, aliases):
+        for alias in aliases:
+            cache = caches[alias]
+            if isinstance(cache, RedisCache):
+                # RedisCache.clear() flushes the whole database, taking the
+                # other aliases (sessions, buffered view counts) with it
+                deleted = self.clear_redis_prefix(cache)
+                self.stdout.write(self.style.SUCCESS(f"Cleared cache '{alias}' ({deleted} keys)"))
+            else:
+                cache.clear()
+                self.stdout.write(self.style.SUCCESS(f"Cleared cache '{alias}'"))
+
+    def clear_redis_prefix(self, cache, chunk_size=500):
+        """Delete only the keys under this alias's KEY_PREFIX"""
+        client = cache._cache.get_client(write=True)
+        deleted, keys = 0, []
+        for key in client.scan_iter(match=f'{cache.key_prefix}:*', count=chunk_size):
+            keys.append(key)
+            if len(keys) >= chunk_size:
+                deleted += client.delete(*keys)
+                keys = []
+        if keys:
+            deleted += client.delete(*keys)
+        return deleted
+
+    def inspect(self, aliases):
+        for alias in aliases:
+            config = settings.CACHES[alias]
+            cache = caches[alias]
+            self.stdout.write(self.style.MIGRATE_HEADING(alias))
+            self.stdout.write(f"  Backend:  {config['BACKEND']}")
+            self.stdout.write(f"  Location: {config.get('LOCATION', '')}")
+            self.stdout.write(f"  Timeout:  {config.get('TIMEOUT', 300)}s")
+
+            # Round-trip a probe key to check the backend is reachable
+            probe_key = 'manage_cache:probe'
+            try:
+                started = time.monotonic()
+                cache.set(probe_key, 'ok', 10)
+                healthy = cache.get(probe_key) == 'ok'
+                cache.delete(probe_key)
+                elapsed = (time.monotonic() - started) * 1000
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'  Status:   unreachable ({e})'))
+                continue
+
+            if healthy:
+                self.stdout.write(self.style.SUCCESS(f'  Status:   ok ({elapsed:.1f} ms round trip)'))
+            else:
+                self.stdout.write(self.style.WARNING('  Status:   value not returned'))
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_portal', '0002_academicdepartment_homepagebanner_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='galleryimage',
+            options={'ordering': ['-uploaded_at', '-id'], 'verbose_name': 'Gallery Item', 'verbose_name_plural': 'Gallery Items'},
+        ),
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=models.Index(fields=['-uploaded_at', '-id'], name='gallery_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=models.Index(fields=['category', '-uploaded_at', '-id'], name='gallery_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=models.Index(condition=models.Q(('featured', True)), fields=['-uploaded_at', '-id'], name='gallery_featured_idx'),
+        ),
+    ]
@@ -106,9 +106,16 @@ class GalleryImage(models.Model):
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        ordering = ['-uploaded_at']
+        ordering = ['-uploaded_at', '-id']
         verbose_name = 'Gallery Item'
         verbose_name_plural = 'Gallery Items'
+        indexes = [
+            # Keyset pagination of the public gallery (home.gallery), overall and per category
+            models.Index(fields=['-uploaded_at', '-id'], name='gallery_recent_idx'),
+            models.Index(fields=['category', '-uploaded_at', '-id'], name='gallery_category_idx'),
+            models.Index(fields=['-uploaded_at', '-id'], condition=models.Q(featured=True),
+                         name='gallery_featured_idx'),
+        ]
     
     def __str__(self):
         return self.title
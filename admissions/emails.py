@@ -0,0 +1,55 @@
+"""
+Emails sent for admission applications (queued in the outbox, see jobs.mail)
+"""
+from django.conf import settings
+
+from jobs.mail import queue_email
+
+
+def _from_email():
+    return getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@stmarysnyakhobi.ac.ke')
+
+
+def notify_admissions_office(application):
+    """Email a new application to the admissions office"""
+    message = f"""
+New admission application from St. Mary's Nyakhobi website:
+
+Student: {application.student_first_name} {application.student_last_name}
+Date of birth: {application.date_of_birth:%d %B %Y}
+Grade level: {application.grade_level}
+Previous school: {application.previous_school or 'Not provided'}
+
+Parent/Guardian: {application.parent_first_name} {application.parent_last_name}
+Email: {application.parent_email}
+Phone: {application.parent_phone}
+
+Review the application in the admin under Admissions.
+"""
+    queue_email(
+        subject=f"New Admission Application: {application.student_first_name} {application.student_last_name}",
+        message=message,
+        from_email=_from_email(),
+        recipient_list=[getattr(settings, 'ADMISSIONS_EMAIL', 'admissions@stmarysnyakhobi.ac.ke')],
+    )
+
+
+def confirm_application(application):
+    """Tell the parent/guardian their application was received"""
+    message = f"""
+Dear {application.parent_first_name} {application.parent_last_name},
+
+Thank you for applying to St. Mary's Nyakhobi Senior School. We have received the application for {application.student_first_name} {application.student_last_name} ({application.grade_level}) and the admissions office will contact you once it has been reviewed.
+
+If you need immediate assistance, please call us at 0719 831 346.
+
+Best regards,
+St. Mary's Nyakhobi Senior School
+Admissions Office
+"""
+    queue_email(
+        subject="Your application to St. Mary's Nyakhobi Senior School",
+        message=message,
+        from_email=_from_email(),
+        recipient_list=[application.parent_email],
+    )
@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from .models import AdmissionApplication, AdmissionRequirement
 from .forms import AdmissionApplicationForm
+from .emails import confirm_application, notify_admissions_office
 
 def admission_info(request):
     """General admission information"""
@@ -13,7 +14,9 @@ def apply(request):
     if request.method == 'POST':
         form = AdmissionApplicationForm(request.POST, request.FILES)
         if form.is_valid():
-            form.save()
+            application = form.save()
+            notify_admissions_office(application)
+            confirm_application(application)
             messages.success(request, 'Your application has been submitted successfully!')
             return redirect('admissions:apply')
     else:
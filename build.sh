@@ -12,5 +12,13 @@ python manage.py collectstatic --no-input
 # Run migrations
 python manage.py migrate
 
+# Create cache tables (only used when CACHE_BACKEND=database) and warm the
+# caches; warming also retires pages rendered by the previous release
+python manage.py createcachetable
+python manage.py manage_cache warm
+
+# Catch the site search index up with content changed outside the signals
+python manage.py rebuild_search_index
+
 # Create initial superuser if none exists
 python manage.py create_initial_superuser
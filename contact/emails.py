@@ -0,0 +1,62 @@
+"""
+Emails sent for contact form submissions (queued in the outbox, see jobs.mail)
+"""
+from django.conf import settings
+
+from jobs.mail import queue_email
+
+
+def _from_email():
+    return getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@stmarysnyakhobi.ac.ke')
+
+
+def notify_staff_of_inquiry(inquiry):
+    """Email a new contact form submission to the school administrators"""
+    message = f"""
+New contact form submission from St. Mary's Nyakhobi website:
+
+Name: {inquiry.name}
+Email: {inquiry.email}
+Phone: {inquiry.phone or 'Not provided'}
+Inquiry Type: {inquiry.get_inquiry_type_display()}
+Subject: {inquiry.subject}
+
+Message:
+{inquiry.message}
+
+---
+This message was sent from the St. Mary's Nyakhobi Senior School website contact form.
+"""
+    queue_email(
+        subject=f"New Contact Form Submission: {inquiry.subject}",
+        message=message,
+        from_email=_from_email(),
+        recipient_list=[
+            getattr(settings, 'CONTACT_EMAIL', 'info@stmarysnyakhobi.ac.ke'),
+            getattr(settings, 'PRINCIPAL_EMAIL', 'principal@stmarysnyakhobi.ac.ke'),
+        ],
+    )
+
+
+def confirm_inquiry(inquiry):
+    """Send the sender of a contact form submission a confirmation"""
+    message = f"""
+Dear {inquiry.name},
+
+Thank you for contacting St. Mary's Nyakhobi Senior School. We have received your inquiry regarding "{inquiry.subject}" and will respond within 24-48 hours.
+
+Your message:
+{inquiry.message}
+
+If you need immediate assistance, please call us at 0719 831 346.
+
+Best regards,
+St. Mary's Nyakhobi Senior School
+Administration Office
+"""
+    queue_email(
+        subject="Thank you for contacting St. Mary's Nyakhobi Senior School",
+        message=message,
+        from_email=_from_email(),
+        recipient_list=[inquiry.email],
+    )
@@ -1,6 +1,4 @@
 from django import forms
-from django.core.mail import send_mail, EmailMessage
-from django.conf import settings
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Submit, Row, Column
 from .models import ContactInquiry
@@ -44,69 +42,11 @@ class ContactForm(forms.ModelForm):
         self.fields['message'].widget.attrs.update({'placeholder': 'Please provide details about your inquiry...'})
     
     def send_email(self):
-        """Send email notification after form submission"""
-        try:
-            # Prepare email content
-            subject = f"New Contact Form Submission: {self.cleaned_data['subject']}"
-            
-            message = f"""
-New contact form submission from St. Mary's Nyakhobi website:
+        """Queue the staff notification and the sender's confirmation (see contact.emails)"""
+        from .emails import confirm_inquiry, notify_staff_of_inquiry
 
-Name: {self.cleaned_data['name']}
-Email: {self.cleaned_data['email']}
-Phone: {self.cleaned_data.get('phone', 'Not provided')}
-Inquiry Type: {self.cleaned_data.get('inquiry_type', 'General')}
-Subject: {self.cleaned_data['subject']}
-
-Message:
-{self.cleaned_data['message']}
-
----
-This message was sent from the St. Mary's Nyakhobi Senior School website contact form.
-"""
-            
-            # Send email to school administrators
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@stmarysnyakhobi.ac.ke'),
-                recipient_list=[
-                    getattr(settings, 'CONTACT_EMAIL', 'info@stmarysnyakhobi.ac.ke'),
-                    getattr(settings, 'PRINCIPAL_EMAIL', 'principal@stmarysnyakhobi.ac.ke'),
-                ],
-                fail_silently=False,
-            )
-            
-            # Send confirmation email to sender
-            confirmation_subject = "Thank you for contacting St. Mary's Nyakhobi Senior School"
-            confirmation_message = f"""
-Dear {self.cleaned_data['name']},
-
-Thank you for contacting St. Mary's Nyakhobi Senior School. We have received your inquiry regarding "{self.cleaned_data['subject']}" and will respond within 24-48 hours.
-
-Your message:
-{self.cleaned_data['message']}
-
-If you need immediate assistance, please call us at 0719 831 346.
-
-Best regards,
-St. Mary's Nyakhobi Senior School
-Administration Office
-"""
-            
-            send_mail(
-                subject=confirmation_subject,
-                message=confirmation_message,
-                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@stmarysnyakhobi.ac.ke'),
-                recipient_list=[self.cleaned_data['email']],
-                fail_silently=True,  # Don't fail if confirmation email fails
-            )
-            
-            return True
-            
-        except Exception as e:
-            # Log the error (in production, use proper logging)
-            print(f"Email sending failed: {str(e)}")
-            return False
+        notify_staff_of_inquiry(self.instance)
+        confirm_inquiry(self.instance)
+        return True
         self.fields['subject'].widget.attrs.update({'placeholder': 'Brief subject of your inquiry'})
         self.fields['message'].widget.attrs.update({'placeholder': 'Please describe your inquiry in detail...'})
\ No newline at end of file
@@ -11,13 +11,13 @@ def contact(request):
             # Save the form data to database
             contact_inquiry = form.save()
             
-            # Send email notifications
+            # Queue the email notifications (sent by the background worker)
             email_sent = form.send_email()
             
             if email_sent:
                 messages.success(
                     request, 
-                    'Thank you for your message! We have received your inquiry and will respond within 24-48 hours. A confirmation email has been sent to your email address.'
+                    'Thank you for your message! We have received your inquiry and will respond within 24-48 hours. A confirmation email is on its way to your email address.'
                 )
             else:
                 messages.success(
@@ -1,7 +1,9 @@
 from django.shortcuts import render, get_object_or_404
 from .models import Event, News  # OLD models (keeping for now)
 from admin_portal.models import NewsAnnouncement, SchoolEvent  # NEW admin portal models
+from st_marys_school.page_cache import cache_public_page
 
+@cache_public_page(SchoolEvent)
 def events_list(request):
     """Display all events - now using admin portal"""
     events = SchoolEvent.objects.filter(published=True).order_by('-start_date')
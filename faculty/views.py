@@ -1,6 +1,8 @@
 from django.shortcuts import render
 from .models import Faculty, Department
+from st_marys_school.page_cache import cache_public_page
 
+@cache_public_page(Faculty, Department)
 def faculty_list(request):
     """Display all faculty members"""
     departments = Department.objects.all()
@@ -0,0 +1,90 @@
+"""
+Keyset pagination for the public photo and video gallery.
+
+Pages are addressed by a cursor (the ``uploaded_at`` and ``id`` of the last
+item shown) instead of a page number, so the next page is read from the
+(category, uploaded_at, id) index with ``WHERE (uploaded_at, id) < cursor``
+and no OFFSET: page 100 costs the same as page 1, and photos uploaded while
+someone scrolls do not shift or repeat items.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+from admin_portal.models import GalleryImage
+from imaging.renditions import renditions_for_many
+
+PAGE_SIZE = 24
+MAX_PAGE_SIZE = 60
+
+# List payloads leave out descriptions and uploader details
+LIST_FIELDS = ['id', 'title', 'media_type', 'image', 'video_url', 'category', 'featured', 'uploaded_at']
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(item):
+    raw = f'{item.uploaded_at.isoformat()}|{item.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        uploaded_at, pk = raw.split('|')
+        return datetime.fromisoformat(uploaded_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(f'Invalid cursor {cursor!r}')
+
+
+def gallery_page(cursor=None, category=None, featured=False, media_type=None, page_size=PAGE_SIZE):
+    """Return (items, next_cursor); next_cursor is None on the last page"""
+    items = GalleryImage.objects.only(*LIST_FIELDS).order_by('-uploaded_at', '-id')
+    if category:
+        items = items.filter(category=category)
+    if featured:
+        items = items.filter(featured=True)
+    if media_type:
+        items = items.filter(media_type=media_type)
+    if cursor:
+        uploaded_at, pk = decode_cursor(cursor)
+        items = items.filter(Q(uploaded_at__lt=uploaded_at) | Q(uploaded_at=uploaded_at, id__lt=pk))
+
+    # One extra row tells whether there is a next page without a COUNT
+    page = list(items[:page_size + 1])
+    next_cursor = encode_cursor(page[page_size - 1]) if len(page) > page_size else None
+    return page[:page_size], next_cursor
+
+
+def gallery_categories():
+    return list(GalleryImage.objects.order_by('category').values_list('category', flat=True).distinct())
+
+
+def serialize(items):
+    """JSON-ready dicts for the infinite-scroll endpoint, with thumbnail and card URLs"""
+    renditions = renditions_for_many(item.image.name for item in items if item.image)
+    results = []
+    for item in items:
+        entry = {
+            'id': item.pk,
+            'title': item.title,
+            'category': item.category,
+            'media_type': item.media_type,
+            'featured': item.featured,
+            'uploaded_at': item.uploaded_at.isoformat(),
+            'video_url': item.video_url or None,
+            'thumbnail': None,
+            'image': None,
+        }
+        if item.image:
+            storage = item.image.storage
+            sizes = renditions.get(item.image.name) or {}
+            entry['thumbnail'] = storage.url(sizes['thumbnail']['jpeg']) if 'thumbnail' in sizes else item.image.url
+            entry['image'] = storage.url(sizes['card']['jpeg']) if 'card' in sizes else item.image.url
+            if 'thumbnail' in sizes:
+                entry['thumbnail_webp'] = storage.url(sizes['thumbnail']['webp'])
+        results.append(entry)
+    return results
@@ -0,0 +1,101 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.utils import timezone
+from django.test import TestCase
+from django.urls import reverse
+
+from admin_portal.models import GalleryImage, NewsAnnouncement
+from imaging.models import ResponsiveImage
+from st_marys_school.page_cache import new_page_generation
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        caches['pages'].clear()
+        self.news = NewsAnnouncement.objects.create(title='Sports Day Results', content='Well done')
+        self.url = reverse('home:home')
+
+    def test_anonymous_pages_are_cached(self):
+        first = self.client.get(self.url)
+        self.assertContains(first, 'Sports Day Results')
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_edits_show_on_the_next_request(self):
+        etag = self.client.get(self.url)['ETag']
+        self.news.title = 'Prize Giving Day'
+        self.news.save()
+
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Prize Giving Day')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_new_renditions_refresh_the_page(self):
+        etag = self.client.get(self.url)['ETag']
+        ResponsiveImage.objects.create(source='news/images/sports-day.jpg', width=800, height=400, renditions={})
+        self.assertNotEqual(self.client.get(self.url)['ETag'], etag)
+
+    def test_matching_etag_gets_304(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        new_page_generation()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_signed_in_users_bypass_the_cache(self):
+        self.client.get(self.url)
+        self.client.force_login(User.objects.create_user('staff'))
+        NewsAnnouncement.objects.filter(pk=self.news.pk).update(title='Prize Giving Day')
+        self.assertContains(self.client.get(self.url), 'Prize Giving Day')
+        self.assertNotIn('ETag', self.client.get(self.url))
+
+
+class GalleryTests(TestCase):
+    def setUp(self):
+        caches['pages'].clear()
+        self.items = [
+            GalleryImage.objects.create(
+                title=f'Clip {i}', media_type='video', video_url=f'https://example.com/{i}',
+                category='Sports' if i % 2 else 'Music',
+            )
+            for i in range(25)
+        ]
+        self.url = reverse('home:gallery_api')
+
+    def scroll(self, **params):
+        ids, cursor = [], None
+        while True:
+            query = dict(params, cursor=cursor) if cursor else params
+            data = self.client.get(self.url, query).json()
+            ids += [item['id'] for item in data['results']]
+            cursor = data['next']
+            if cursor is None:
+                return ids
+
+    def test_cursors_walk_every_item_once(self):
+        expected = [item.pk for item in sorted(self.items, key=lambda item: (item.uploaded_at, item.pk), reverse=True)]
+        self.assertEqual(self.scroll(page_size=10), expected)
+
+    def test_items_uploaded_together_are_ordered_by_id(self):
+        GalleryImage.objects.update(uploaded_at=timezone.now())
+        self.assertEqual(self.scroll(page_size=7), sorted((item.pk for item in self.items), reverse=True))
+
+    def test_new_uploads_do_not_shift_the_next_page(self):
+        first = self.client.get(self.url, {'page_size': 10}).json()
+        GalleryImage.objects.create(title='Late clip', media_type='video', video_url='https://example.com/late')
+        second = self.client.get(self.url, {'page_size': 10, 'cursor': first['next']}).json()
+        shown = [item['id'] for item in first['results'] + second['results']]
+        self.assertEqual(len(set(shown)), 20)
+
+    def test_filters(self):
+        ids = self.scroll(category='Music', page_size=5)
+        self.assertEqual(sorted(ids), sorted(item.pk for item in self.items if item.category == 'Music'))
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'not-a-cursor'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'page_size': 0}).status_code, 400)
+        # The HTML page starts again from the top instead of failing
+        response = self.client.get(reverse('home:gallery'), {'cursor': 'not-a-cursor'})
+        self.assertContains(response, 'Clip 24')
@@ -11,4 +11,6 @@ urlpatterns = [
     path('facilities/', views.facilities, name='facilities'),
     path('achievements/', views.achievements, name='achievements'),
     path('leadership/', views.leadership, name='leadership'),
+    path('gallery/', views.gallery, name='gallery'),
+    path('gallery/api/', views.gallery_api, name='gallery_api'),
 ]
\ No newline at end of file
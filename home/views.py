@@ -1,8 +1,13 @@
+from django.http import JsonResponse
 from django.shortcuts import render
+from .gallery import MAX_PAGE_SIZE, PAGE_SIZE, InvalidCursor, gallery_categories, gallery_page, serialize
 from .models import SchoolInfo, HomePageSlider, QuickLink
 from events.models import News  # OLD model (keeping for compatibility)
-from admin_portal.models import NewsAnnouncement  # NEW admin portal model
+from admin_portal.models import GalleryImage, NewsAnnouncement  # NEW admin portal model
+from imaging.models import ResponsiveImage
+from st_marys_school.page_cache import cache_public_page
 
+@cache_public_page(SchoolInfo, HomePageSlider, QuickLink, NewsAnnouncement, ResponsiveImage)
 def home(request):
     """Homepage view"""
     try:
@@ -27,6 +32,7 @@ def home(request):
     }
     return render(request, 'home/index.html', context)
 
+@cache_public_page(SchoolInfo)
 def about(request):
     """About page view"""
     try:
@@ -39,27 +45,79 @@ def about(request):
     }
     return render(request, 'home/about.html', context)
 
+@cache_public_page()
 def history(request):
     """School history page"""
     context = {}
     return render(request, 'home/history.html', context)
 
+@cache_public_page()
 def mission_vision(request):
     """Mission and vision page"""
     context = {}
     return render(request, 'home/mission_vision.html', context)
 
+@cache_public_page()
 def facilities(request):
     """School facilities page"""
     context = {}
     return render(request, 'home/facilities.html', context)
 
+@cache_public_page()
 def achievements(request):
     """School achievements page"""
     context = {}
     return render(request, 'home/achievements.html', context)
 
+@cache_public_page()
 def leadership(request):
     """School leadership page"""
     context = {}
-    return render(request, 'home/leadership.html', context)
\ No newline at end of file
+    return render(request, 'home/leadership.html', context)
+
+
+@cache_public_page(GalleryImage, ResponsiveImage)
+def gallery(request):
+    """Photo and video gallery; further pages are loaded by gallery_api as the visitor scrolls"""
+    category = request.GET.get('category', '')
+    featured = request.GET.get('featured') == '1'
+    try:
+        items, next_cursor = gallery_page(request.GET.get('cursor'), category=category, featured=featured)
+    except InvalidCursor:
+        items, next_cursor = gallery_page(category=category, featured=featured)
+    
+    context = {
+        'items': items,
+        'next_cursor': next_cursor,
+        'categories': gallery_categories(),
+        'selected_category': category,
+        'featured': featured,
+    }
+    return render(request, 'home/gallery.html', context)
+
+
+@cache_public_page(GalleryImage, ResponsiveImage)
+def gallery_api(request):
+    """
+    JSON page of gallery items for infinite scroll.
+    
+    Query parameters: cursor (from the previous response's "next"), category,
+    featured=1, media_type (photo/video), page_size (at most 60).
+    """
+    try:
+        page_size = min(int(request.GET.get('page_size', PAGE_SIZE)), MAX_PAGE_SIZE)
+        if page_size < 1:
+            raise ValueError
+        items, next_cursor = gallery_page(
+            request.GET.get('cursor'),
+            category=request.GET.get('category'),
+            featured=request.GET.get('featured') == '1',
+            media_type=request.GET.get('media_type'),
+            page_size=page_size,
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    except ValueError:
+        return JsonResponse({'error': 'page_size must be a positive number'}, status=400)
+    
+    return JsonResponse({'results': serialize(items), 'next': next_cursor})
@@ -0,0 +1,31 @@
+"""
+Management command to create responsive image renditions for existing uploads
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from imaging.models import ResponsiveImage
+from imaging.renditions import IMAGE_FIELDS, generate_for_field
+
+
+class Command(BaseCommand):
+    help = 'Generates the resized WebP/JPEG copies of every uploaded image that does not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate images that already have renditions')
+
+    def handle(self, *args, **options):
+        done = set() if options['force'] else set(ResponsiveImage.objects.values_list('source', flat=True))
+        generated = 0
+        for model_label, field_name in IMAGE_FIELDS:
+            model = apps.get_model(model_label)
+            sources = model._default_manager.exclude(**{field_name: ''}).exclude(
+                **{f'{field_name}__isnull': True}
+            ).values_list(field_name, flat=True).distinct()
+            for source in sources.iterator():
+                if source in done:
+                    continue
+                if generate_for_field(model_label, field_name, source):
+                    generated += 1
+                done.add(source)
+        self.stdout.write(self.style.SUCCESS(f'Generated renditions for {generated} image(s)'))
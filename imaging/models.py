@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class ResponsiveImage(models.Model):
+    """The resized copies generated for one uploaded image (see imaging.renditions)"""
+    source = models.CharField(max_length=500, unique=True, help_text='Storage name of the original upload')
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    # {"card": {"width": 640, "height": 427, "webp": "<storage name>", "jpeg": "<storage name>"}, ...}
+    renditions = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.source
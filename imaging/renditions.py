@@ -0,0 +1,169 @@
+"""
+Resized WebP and JPEG copies of uploaded images.
+
+Photos are uploaded straight from phones and cameras, often several
+megabytes each, while most visitors are parents on mobile data. When one of
+the IMAGE_FIELDS below gets a new file, a background job (imaging.tasks)
+writes a copy of it at each RENDITIONS width in WebP and JPEG next to the
+original, through the field's own storage (local disk or Cloudinary). The
+widths and storage names are recorded in a ResponsiveImage row, which the
+{% responsive_image %} tag reads (through the cache) to build ``srcset``.
+
+Until the copies exist the tag falls back to the original file, so nothing
+breaks while the job is queued. `manage.py generate_image_renditions`
+creates the copies for images uploaded before this existed.
+"""
+import hashlib
+import io
+import logging
+import posixpath
+
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import ResponsiveImage
+
+logger = logging.getLogger(__name__)
+
+# Name -> maximum width in pixels. Images are never enlarged.
+RENDITIONS = {
+    'thumbnail': 320,
+    'card': 640,
+    'hero': 1600,
+}
+
+# Name -> (PIL format, save options, MIME type); the first is preferred by browsers that support it
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}, 'image/webp'),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}, 'image/jpeg'),
+}
+
+# (model label, field name) of every upload that gets renditions
+IMAGE_FIELDS = [
+    ('news.NewsArticle', 'featured_image'),
+    ('admin_portal.NewsAnnouncement', 'image'),
+    ('admin_portal.GalleryImage', 'image'),
+    ('admin_portal.HomePageBanner', 'image'),
+    ('admin_portal.TeacherProfile', 'photo'),
+    ('home.HomePageSlider', 'image'),
+    ('events.News', 'image'),
+    ('portal.UserProfile', 'profile_picture'),
+]
+
+CACHE_TIMEOUT = 60 * 60 * 24
+# Images whose renditions are still queued are looked up again soon after
+MISSING_TIMEOUT = 60 * 5
+
+
+def _cache_key(source):
+    return 'imaging:' + hashlib.md5(source.encode()).hexdigest()
+
+
+def rendition_name(source, size, extension):
+    """news/images/sports-day.jpg -> news/images/renditions/sports-day-card.webp"""
+    directory, filename = posixpath.split(source)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'renditions', f'{stem}-{size}.{extension}')
+
+
+def _encode(image, extension):
+    pil_format, options, _mime = FORMATS[extension]
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_renditions(storage, source):
+    """Write every rendition of ``source`` to ``storage`` and record them; returns the ResponsiveImage"""
+    with storage.open(source, 'rb') as original:
+        image = Image.open(original)
+        image = ImageOps.exif_transpose(image)  # phone photos are often stored sideways
+        image = image.convert('RGB')
+    width, height = image.size
+
+    renditions = {}
+    for size, max_width in RENDITIONS.items():
+        resized = image.copy()
+        resized.thumbnail((max_width, height), Image.LANCZOS)
+        entry = {'width': resized.width, 'height': resized.height}
+        for extension in FORMATS:
+            name = rendition_name(source, size, extension)
+            if storage.exists(name):
+                storage.delete(name)
+            entry[extension] = storage.save(name, _encode(resized, extension))
+        renditions[size] = entry
+        if max_width >= width:
+            # Larger sizes would be this same full-size copy again
+            break
+
+    record, _created = ResponsiveImage.objects.update_or_create(
+        source=source, defaults={'width': width, 'height': height, 'renditions': renditions},
+    )
+    caches['default'].delete(_cache_key(source))
+    return record
+
+
+def renditions_for(source):
+    """The recorded renditions of ``source`` ({} until they have been generated), cached"""
+    cache = caches['default']
+    key = _cache_key(source)
+    renditions = cache.get(key)
+    if renditions is None:
+        renditions = ResponsiveImage.objects.filter(source=source).values_list('renditions', flat=True).first() or {}
+        cache.set(key, renditions, CACHE_TIMEOUT if renditions else MISSING_TIMEOUT)
+    return renditions
+
+
+def renditions_for_many(sources):
+    """{source: renditions} for a page of images in one cache round trip and at most one query"""
+    cache = caches['default']
+    keys = {_cache_key(source): source for source in set(sources)}
+    found = {keys[key]: renditions for key, renditions in cache.get_many(keys).items()}
+    missing = [source for source in keys.values() if source not in found]
+    if missing:
+        loaded = dict(ResponsiveImage.objects.filter(source__in=missing).values_list('source', 'renditions'))
+        pending = {source: {} for source in missing if source not in loaded}
+        cache.set_many({_cache_key(source): renditions for source, renditions in loaded.items()}, CACHE_TIMEOUT)
+        if pending:
+            cache.set_many({_cache_key(source): renditions for source, renditions in pending.items()}, MISSING_TIMEOUT)
+        found.update(loaded)
+        found.update(pending)
+    return found
+
+
+def _queue_renditions(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .tasks import generate_image_renditions
+
+    for model_label, field_name in IMAGE_FIELDS:
+        if sender._meta.label != model_label:
+            continue
+        file = getattr(instance, field_name)
+        if file and not ResponsiveImage.objects.filter(source=file.name).exists():
+            generate_image_renditions.enqueue(model_label, field_name, file.name)
+
+
+def connect_signals():
+    from django.apps import apps
+
+    for model_label in {model_label for model_label, _field in IMAGE_FIELDS}:
+        post_save.connect(_queue_renditions, sender=apps.get_model(model_label),
+                          dispatch_uid=f'imaging_renditions_{model_label}')
+
+
+def field_storage(model_label, field_name):
+    from django.apps import apps
+    return apps.get_model(model_label)._meta.get_field(field_name).storage
+
+
+def generate_for_field(model_label, field_name, source):
+    """Generate renditions for one upload; unreadable files are logged and skipped"""
+    storage = field_storage(model_label, field_name)
+    try:
+        return generate_renditions(storage, source)
+    except (UnidentifiedImageError, FileNotFoundError) as exc:
+        logger.warning('No renditions for %s: %s', source, exc)
+        return None
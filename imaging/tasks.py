@@ -0,0 +1,12 @@
+"""
+Background tasks for responsive images
+"""
+from jobs.queue import task
+
+from .renditions import generate_for_field
+
+
+@task
+def generate_image_renditions(model_label, field_name, source):
+    """Create the resized copies of a newly uploaded image"""
+    generate_for_field(model_label, field_name, source)
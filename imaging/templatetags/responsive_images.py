@@ -0,0 +1,75 @@
+"""
+Template tags for responsive images.
+
+    {% load responsive_images %}
+    {% responsive_image article.featured_image 'card' alt=article.title class='card-img-top' %}
+
+renders a <picture> offering the WebP renditions with a JPEG fallback, each
+as a ``srcset`` of every rendition up to the requested size, so phones
+download the small copy and wide screens the large one. ``sizes`` defaults
+to the requested rendition's width. Images without renditions (yet) are
+rendered as a plain <img> of the original.
+
+    <div style="background-image: url('{% rendition_url banner.image 'hero' %}')">
+
+gives the URL of a single rendition (WebP is not used there because CSS
+backgrounds have no fallback).
+"""
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from ..renditions import FORMATS, RENDITIONS, renditions_for
+
+register = template.Library()
+
+
+def _usable(renditions, size):
+    """The renditions up to and including ``size``, smallest first"""
+    if size not in RENDITIONS:
+        raise template.TemplateSyntaxError(f"Unknown rendition {size!r}; use one of {', '.join(RENDITIONS)}")
+    limit = RENDITIONS[size]
+    return [
+        renditions[name] for name, max_width in RENDITIONS.items()
+        if name in renditions and max_width <= limit
+    ]
+
+
+def _srcset(storage, entries, extension):
+    return ', '.join(f"{storage.url(entry[extension])} {entry['width']}w" for entry in entries)
+
+
+@register.simple_tag
+def responsive_image(image, size='card', alt='', sizes=None, loading='lazy', **attrs):
+    if not image:
+        return ''
+    renditions = renditions_for(image.name)
+    entries = _usable(renditions, size) if renditions else []
+    if not entries:
+        extra = format_html_join('', ' {}="{}"', attrs.items())
+        return format_html('<img src="{}" alt="{}" loading="{}"{}>', image.url, alt, loading, extra)
+
+    storage = image.storage
+    largest = entries[-1]
+    # Intrinsic dimensions let the browser reserve space before the image loads
+    attrs.setdefault('width', largest['width'])
+    attrs.setdefault('height', largest['height'])
+    extra = format_html_join('', ' {}="{}"', attrs.items())
+    sizes = sizes or f"(max-width: {largest['width']}px) 100vw, {largest['width']}px"
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((mime, _srcset(storage, entries, extension), sizes)
+         for extension, (_format, _options, mime) in FORMATS.items() if extension != 'jpeg'),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="{}"{}></picture>',
+        sources, storage.url(largest['jpeg']), _srcset(storage, entries, 'jpeg'), sizes, alt, loading, extra,
+    )
+
+
+@register.simple_tag
+def rendition_url(image, size='card'):
+    if not image:
+        return ''
+    renditions = renditions_for(image.name)
+    entries = _usable(renditions, size) if renditions else []
+    return image.storage.url(entries[-1]['jpeg']) if entries else image.url
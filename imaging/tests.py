@@ -0,0 +1,85 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from admin_portal.models import GalleryImage
+from jobs.queue import run_pending
+
+from .models import ResponsiveImage
+from .renditions import CACHE_TIMEOUT, MISSING_TIMEOUT, renditions_for, renditions_for_many
+
+
+def jpeg(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'teal').save(buffer, 'JPEG')
+    return SimpleUploadedFile('sports-day.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+class RenditionTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        caches['default'].clear()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def render(self, photo, size):
+        return Template(
+            "{% load responsive_images %}{% responsive_image photo.image size alt='Sports day' %}"
+        ).render(Context({'photo': photo, 'size': size}))
+
+    def test_upload_gets_renditions_and_srcset(self):
+        photo = GalleryImage.objects.create(title='Sports day', image=jpeg(2000, 1000))
+        # Until the job has run the original is served
+        self.assertIn(f'src="{photo.image.url}"', self.render(photo, 'card'))
+
+        run_pending()
+        record = ResponsiveImage.objects.get(source=photo.image.name)
+        self.assertEqual(
+            {size: entry['width'] for size, entry in record.renditions.items()},
+            {'thumbnail': 320, 'card': 640, 'hero': 1600},
+        )
+        with photo.image.storage.open(record.renditions['card']['webp']) as webp:
+            self.assertEqual(Image.open(webp).format, 'WEBP')
+
+        html = self.render(photo, 'card')
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('sports-day-thumbnail.webp 320w', html)
+        self.assertIn('sports-day-card.jpeg 640w', html)
+        self.assertNotIn('hero', html)
+        self.assertIn('width="640" height="320"', html)
+
+    def test_small_images_are_not_enlarged(self):
+        photo = GalleryImage.objects.create(title='Badge', image=jpeg(500, 500))
+        run_pending()
+        record = ResponsiveImage.objects.get(source=photo.image.name)
+        self.assertEqual(
+            {size: entry['width'] for size, entry in record.renditions.items()},
+            {'thumbnail': 320, 'card': 500},
+        )
+        self.assertIn('500w', self.render(photo, 'hero'))
+
+    def test_pending_renditions_are_cached_briefly(self):
+        photo = GalleryImage.objects.create(title='Sports day', image=jpeg(800, 400))
+        cache = caches['default']
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.assertEqual(renditions_for(photo.image.name), {})
+        self.assertEqual(cache_set.call_args.args[2], MISSING_TIMEOUT)
+
+        run_pending()
+        cache.clear()
+        with mock.patch.object(cache, 'set_many', wraps=cache.set_many) as set_many:
+            found = renditions_for_many([photo.image.name, 'gallery/missing.jpg'])
+        self.assertEqual(found['gallery/missing.jpg'], {})
+        self.assertIn('card', found[photo.image.name])
+        self.assertEqual(sorted(call.args[1] for call in set_many.call_args_list), [MISSING_TIMEOUT, CACHE_TIMEOUT])
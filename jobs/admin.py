@@ -0,0 +1,50 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .mail import schedule_flush
+from .models import Job, OutboundEmail
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'attempts', 'max_attempts', 'run_at', 'created_at', 'finished_at')
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'last_error')
+    date_hierarchy = 'created_at'
+    readonly_fields = ('task', 'args', 'kwargs', 'attempts', 'locked_at', 'last_error', 'created_at', 'finished_at')
+    actions = ['retry_jobs']
+
+    def has_add_permission(self, request):
+        return False
+
+    def retry_jobs(self, request, queryset):
+        retried = queryset.exclude(status='running').update(
+            status='queued', attempts=0, run_at=timezone.now(), finished_at=None, locked_at=None,
+        )
+        self.message_user(request, f'{retried} job(s) queued again.')
+    retry_jobs.short_description = "Retry selected jobs"
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'get_recipients', 'status', 'attempts', 'created_at', 'sent_at', 'send_ms')
+    list_filter = ('status',)
+    search_fields = ('subject', 'to')
+    date_hierarchy = 'created_at'
+    readonly_fields = ('subject', 'body', 'from_email', 'to', 'attempts', 'locked_at', 'last_error',
+                       'created_at', 'sent_at', 'send_ms')
+    actions = ['retry_emails']
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_recipients(self, obj):
+        return ', '.join(obj.to)
+    get_recipients.short_description = 'To'
+
+    def retry_emails(self, request, queryset):
+        retried = queryset.filter(status='failed').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+        if retried:
+            schedule_flush()
+        self.message_user(request, f'{retried} email(s) queued again.')
+    retry_emails.short_description = "Retry selected failed emails"
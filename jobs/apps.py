@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+    verbose_name = 'Background Jobs'
+
+    def ready(self):
+        # Registers the @task functions defined in each app's tasks.py, and the outbox flush
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('tasks')
+        from . import mail  # noqa: F401
@@ -0,0 +1,169 @@
+"""
+Batched outbound email.
+
+Code that sends email calls queue_email() instead of send_mail(). The message
+is stored as an OutboundEmail and a single flush job is queued; the worker
+then sends everything waiting in the outbox over one reused mail server
+connection per batch instead of one connection per message:
+
+* EMAIL_BATCH_SIZE messages are sent per connection (servers drop very long
+  sessions, so the connection is reopened between batches);
+* EMAIL_RATE_LIMIT caps throughput in messages per second (0 = no limit);
+* a message that fails is retried with the job queue's backoff up to
+  EMAIL_MAX_ATTEMPTS times and then marked failed, without holding up the
+  rest of the batch.
+
+How long each message waited and how long the server took to accept it are
+recorded on the row; delivery_stats() summarises them (`manage.py email_stats`).
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Job, OutboundEmail
+from .queue import STALE_AFTER, enqueue, retry_delay, task
+
+logger = logging.getLogger('jobs')
+
+FLUSH_MAX_ATTEMPTS = 10
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def queue_email(subject, message, from_email, recipient_list):
+    """Like send_mail(), but puts the email in the outbox for the worker; returns the OutboundEmail"""
+    email = OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or '',
+        to=list(recipient_list),
+    )
+    schedule_flush()
+    return email
+
+
+def schedule_flush(delay=None):
+    """Queue a flush job unless one is already waiting"""
+    if not Job.objects.filter(task=send_queued_email.task_name, status='queued').exists():
+        enqueue(send_queued_email.task_name, delay=delay, max_attempts=FLUSH_MAX_ATTEMPTS)
+
+
+def _claim_batch(size):
+    now = timezone.now()
+    # Messages left 'sending' by a worker that died are sent again
+    OutboundEmail.objects.filter(status='sending', locked_at__lt=now - STALE_AFTER).update(
+        status='pending', locked_at=None,
+    )
+    due = list(OutboundEmail.objects.filter(
+        status='pending', next_attempt_at__lte=now
+    ).order_by('next_attempt_at').values_list('pk', flat=True)[:size])
+    OutboundEmail.objects.filter(pk__in=due, status='pending').update(status='sending', locked_at=now)
+    # Another worker may have claimed some of them between the two queries
+    return list(OutboundEmail.objects.filter(pk__in=due, status='sending', locked_at=now).order_by('pk'))
+
+
+def _send(connection, email):
+    message = EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or None,
+        to=email.to,
+        connection=connection,
+    )
+    started = time.monotonic()
+    try:
+        message.send(fail_silently=False)
+    except Exception as exc:
+        email.attempts += 1
+        email.last_error = f'{type(exc).__name__}: {exc}'
+        email.locked_at = None
+        if email.attempts >= _setting('EMAIL_MAX_ATTEMPTS', 5):
+            email.status = 'failed'
+            logger.error('Giving up on email %s after %s attempt(s): %s', email.pk, email.attempts, exc)
+        else:
+            email.status = 'pending'
+            email.next_attempt_at = timezone.now() + timedelta(seconds=retry_delay(email.attempts))
+            logger.warning('Email %s failed (attempt %s): %s', email.pk, email.attempts, exc)
+        email.save(update_fields=['attempts', 'last_error', 'locked_at', 'status', 'next_attempt_at'])
+        return False
+
+    email.attempts += 1
+    email.status = 'sent'
+    email.sent_at = timezone.now()
+    email.send_ms = round((time.monotonic() - started) * 1000)
+    email.locked_at = None
+    email.save(update_fields=['attempts', 'status', 'sent_at', 'send_ms', 'locked_at'])
+    return True
+
+
+@task(max_attempts=FLUSH_MAX_ATTEMPTS)
+def send_queued_email():
+    """Send every due message in the outbox, batch by batch"""
+    batch_size = _setting('EMAIL_BATCH_SIZE', 50)
+    rate = _setting('EMAIL_RATE_LIMIT', 0)
+    interval = 1 / rate if rate else 0
+    sent = failed = 0
+
+    while True:
+        batch = _claim_batch(batch_size)
+        if not batch:
+            break
+        batch_started = time.monotonic()
+        # The connection is opened once and reused for the whole batch
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception:
+            # Mail server unreachable: hand the batch back and let the job queue retry later
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(status='pending', locked_at=None)
+            raise
+        try:
+            for email in batch:
+                started = time.monotonic()
+                if _send(connection, email):
+                    sent += 1
+                else:
+                    failed += 1
+                if interval:
+                    time.sleep(max(0, interval - (time.monotonic() - started)))
+        finally:
+            connection.close()
+        logger.info('Sent a batch of %s email(s) in %.3fs', len(batch), time.monotonic() - batch_started)
+
+    retry = OutboundEmail.objects.filter(status='pending').order_by('next_attempt_at').first()
+    if retry is not None:
+        schedule_flush(delay=max(retry.next_attempt_at - timezone.now(), timedelta()))
+    return sent, failed
+
+
+def delivery_stats(since=None):
+    """Counts by status plus queue and send latency (seconds / milliseconds) of messages sent since ``since``"""
+    since = since or timezone.now() - timedelta(days=1)
+    stats = {status: 0 for status, _label in OutboundEmail.STATUS_CHOICES}
+    stats.update(OutboundEmail.objects.filter(created_at__gte=since).order_by().values_list(
+        'status'
+    ).annotate(count=Count('pk')))
+
+    sent = list(OutboundEmail.objects.filter(status='sent', sent_at__gte=since).values_list(
+        'created_at', 'sent_at', 'send_ms'
+    ))
+    waits = sorted((sent_at - created_at).total_seconds() for created_at, sent_at, _ms in sent)
+    send_times = sorted(ms for _created, _sent, ms in sent if ms is not None)
+
+    def percentile(values, fraction):
+        return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+    stats.update({
+        'wait_p50': percentile(waits, 0.5),
+        'wait_p95': percentile(waits, 0.95),
+        'send_ms_p50': percentile(send_times, 0.5),
+        'send_ms_p95': percentile(send_times, 0.95),
+    })
+    return stats
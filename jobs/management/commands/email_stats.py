@@ -0,0 +1,28 @@
+"""
+Management command reporting on the email outbox
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.mail import delivery_stats
+
+
+class Command(BaseCommand):
+    help = 'Shows how many emails were sent, are waiting or failed, and how long sending took'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Report on this many past hours')
+
+    def handle(self, *args, **options):
+        stats = delivery_stats(timezone.now() - timedelta(hours=options['hours']))
+        self.stdout.write(
+            f"Last {options['hours']}h: {stats['sent']} sent, {stats['pending'] + stats['sending']} waiting, "
+            f"{stats['failed']} failed"
+        )
+        if stats['wait_p50'] is not None:
+            self.stdout.write(
+                f"Time in outbox: p50 {stats['wait_p50']:.1f}s, p95 {stats['wait_p95']:.1f}s; "
+                f"mail server: p50 {stats['send_ms_p50']}ms, p95 {stats['send_ms_p95']}ms"
+            )
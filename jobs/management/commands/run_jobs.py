@@ -0,0 +1,42 @@
+"""
+Management command running the background job worker
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import requeue_stale_jobs, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs, polling for new ones until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the jobs due now and exit')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--rate', type=float, help='Run at most this many jobs per second')
+        parser.add_argument('--purge-days', type=int, default=14,
+                            help='Delete finished jobs older than this many days on start (0 keeps them)')
+
+    def handle(self, *args, **options):
+        if options['purge_days']:
+            cutoff = timezone.now() - timedelta(days=options['purge_days'])
+            purged, _ = Job.objects.filter(status='done', finished_at__lt=cutoff).delete()
+            if purged:
+                self.stdout.write(f'Purged {purged} finished job(s)')
+
+        try:
+            while True:
+                requeue_stale_jobs()
+                ran = run_pending(rate=options['rate'])
+                if ran:
+                    self.stdout.write(f'Ran {ran} job(s)')
+                if options['once']:
+                    break
+                if not ran:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write('Worker stopped')
@@ -0,0 +1,68 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """One call of a registered task, run later by `manage.py run_jobs`"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('dead', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now, help_text='Not run before this time (retries are pushed back)')
+    locked_at = models.DateTimeField(null=True, blank=True, help_text='When a worker started the current attempt')
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers only ever look for due queued jobs and for stuck running ones
+            models.Index(fields=['run_at'], condition=models.Q(status='queued'), name='jobs_job_due_idx'),
+            models.Index(fields=['locked_at'], condition=models.Q(status='running'), name='jobs_job_running_idx'),
+        ]
+
+
+class OutboundEmail(models.Model):
+    """An email waiting in (or sent from) the outbox; see jobs.mail"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    send_ms = models.PositiveIntegerField(null=True, blank=True, help_text='Time the mail server took to accept it')
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['next_attempt_at'], condition=models.Q(status='pending'), name='jobs_email_due_idx'),
+            models.Index(fields=['sent_at'], condition=models.Q(status='sent'), name='jobs_email_sent_idx'),
+        ]
@@ -0,0 +1,161 @@
+"""
+A small database-backed job queue.
+
+Slow side effects (sending email, fanning a broadcast out) are registered as
+tasks and enqueued as Job rows instead of being run inside the request::
+
+    from jobs.queue import task
+
+    @task
+    def send_welcome_email(user_id):
+        ...
+
+    send_welcome_email.enqueue(user.pk)
+
+Arguments are stored as JSON, so pass ids rather than model instances.
+Because the Job row is written in the caller's transaction, a job is never
+run for a save that was rolled back.
+
+`manage.py run_jobs` claims due jobs one at a time with a conditional
+UPDATE (so several workers can share the queue on any database), runs
+them, and on failure re-queues them with exponential backoff until
+``max_attempts`` is reached, after which the job is left 'dead' with its
+traceback for an administrator to inspect and retry from the admin.
+
+With ``JOBS_EAGER = True`` jobs are run in-process as soon as the enqueueing
+transaction commits, for development without a worker.
+"""
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('jobs')
+
+TASKS = {}
+
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 30  # seconds; doubled after every failed attempt
+RETRY_MAX_DELAY = 60 * 60
+# A running job not finished after this long is assumed to belong to a dead worker
+STALE_AFTER = timedelta(minutes=15)
+
+
+def task(func=None, *, name=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Register ``func`` as a task and give it an ``enqueue(*args, **kwargs)`` method"""
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        TASKS[task_name] = func
+        func.task_name = task_name
+        func.enqueue = lambda *args, **kwargs: enqueue(
+            task_name, args=args, kwargs=kwargs, max_attempts=max_attempts
+        )
+        return func
+    return register(func) if func is not None else register
+
+
+def enqueue(task_name, args=(), kwargs=None, *, delay=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Queue a call of ``task_name``; returns the Job"""
+    if task_name not in TASKS:
+        raise KeyError(f'Unknown task {task_name!r}')
+    job = Job.objects.create(
+        task=task_name,
+        args=list(args),
+        kwargs=kwargs or {},
+        max_attempts=max_attempts,
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+    if getattr(settings, 'JOBS_EAGER', False):
+        transaction.on_commit(lambda: _claim(job.pk) and run_job(Job.objects.get(pk=job.pk)))
+    return job
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next try after ``attempts`` failed attempts"""
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+def _claim(pk):
+    """Atomically move a queued job to running; False if another worker got there first"""
+    return Job.objects.filter(pk=pk, status='queued').update(
+        status='running', locked_at=timezone.now(), attempts=F('attempts') + 1,
+    ) == 1
+
+
+def claim_next():
+    """Claim and return the most overdue queued job, or None when nothing is due"""
+    due = Job.objects.filter(status='queued', run_at__lte=timezone.now()).order_by('run_at')
+    for pk in due.values_list('pk', flat=True)[:10]:
+        if _claim(pk):
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome; returns True if it succeeded"""
+    func = TASKS.get(job.task)
+    started = time.monotonic()
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task {job.task!r}')
+        func(*job.args, **job.kwargs)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        job.locked_at = None
+        if func is None or job.attempts >= job.max_attempts:
+            job.status = 'dead'
+            job.finished_at = timezone.now()
+            logger.error('Job %s failed permanently after %s attempt(s)', job, job.attempts)
+        else:
+            job.status = 'queued'
+            job.run_at = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+            logger.warning('Job %s failed (attempt %s of %s), retrying at %s',
+                           job, job.attempts, job.max_attempts, job.run_at)
+        job.save(update_fields=['status', 'run_at', 'locked_at', 'last_error', 'finished_at'])
+        return False
+
+    job.status = 'done'
+    job.locked_at = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'locked_at', 'finished_at'])
+    logger.info('Job %s done in %.3fs', job, time.monotonic() - started)
+    return True
+
+
+def requeue_stale_jobs():
+    """Give jobs whose worker died mid-run another attempt (or bury them); returns how many"""
+    cutoff = timezone.now() - STALE_AFTER
+    stale = Job.objects.filter(status='running', locked_at__lt=cutoff)
+    buried = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='dead', locked_at=None, finished_at=timezone.now(), last_error='Worker stopped while running the job',
+    )
+    requeued = stale.update(status='queued', locked_at=None, run_at=timezone.now())
+    return buried + requeued
+
+
+def run_pending(limit=None, rate=None):
+    """
+    Run due jobs until none are left (or ``limit`` have run); returns how many ran.
+
+    ``rate`` caps throughput at that many jobs per second, so a burst of
+    queued email does not hit the mail server all at once.
+    """
+    count = 0
+    interval = 1 / rate if rate else 0
+    while limit is None or count < limit:
+        started = time.monotonic()
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+        if interval:
+            time.sleep(max(0, interval - (time.monotonic() - started)))
+    return count
@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from contact.forms import ContactForm
+
+from .mail import delivery_stats, queue_email
+from .models import Job, OutboundEmail
+from .queue import TASKS, claim_next, requeue_stale_jobs, run_pending, task
+
+calls = []
+
+
+class FlakyBackend(EmailBackend):
+    """In-memory backend that counts connections and rejects mail to bounce@example.com"""
+    opened = 0
+
+    def open(self):
+        FlakyBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        if any('bounce@example.com' in message.to for message in messages):
+            raise ConnectionError('mailbox unavailable')
+        return super().send_messages(messages)
+
+
+@task(name='jobs.tests.flaky', max_attempts=3)
+def flaky(fail_times):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise RuntimeError('boom')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_failed_jobs_back_off_then_die(self):
+        job = flaky.enqueue(5)
+        self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=20))
+
+        # Not due yet, so nothing runs
+        self.assertEqual(run_pending(), 0)
+        for _ in range(2):
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('dead', 3))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_retry_succeeds_and_claims_are_exclusive(self):
+        job = flaky.enqueue(1)
+        claimed = claim_next()
+        self.assertEqual(claimed, job)
+        self.assertIsNone(claim_next())
+
+        # A worker died holding the job: it is handed back out, and the lost run counts as an attempt
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        run_pending()
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('done', 3))
+        self.assertEqual(calls, [1, 1])
+
+    def test_contact_form_queues_email_instead_of_sending(self):
+        form = ContactForm(data={
+            'name': 'Amina', 'email': 'amina@example.com', 'inquiry_type': 'general',
+            'subject': 'Fees', 'message': 'When are fees due?',
+        })
+        self.assertTrue(form.is_valid())
+        form.save()
+        form.send_email()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.filter(status='pending').count(), 2)
+        # Both messages are sent by one flush job
+        self.assertEqual(Job.objects.filter(status='queued').count(), 1)
+
+        run_pending()
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox)[0], 'amina@example.com')
+        self.assertEqual(len(mail.outbox), 2)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode_runs_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = flaky.enqueue(0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertIn('jobs.tests.flaky', TASKS)
+
+
+@override_settings(EMAIL_BACKEND='jobs.tests.FlakyBackend', EMAIL_BATCH_SIZE=10, EMAIL_MAX_ATTEMPTS=2)
+class OutboxTests(TestCase):
+    def test_batches_share_a_connection_and_failures_are_retried(self):
+        FlakyBackend.opened = 0
+        for number in range(25):
+            queue_email(f'Notice {number}', 'Body', None, [f'parent{number}@example.com'])
+        bounce = queue_email('Notice', 'Body', None, ['bounce@example.com'])
+
+        run_pending()
+        self.assertEqual(len(mail.outbox), 25)
+        self.assertEqual(FlakyBackend.opened, 3)
+        bounce.refresh_from_db()
+        self.assertEqual((bounce.status, bounce.attempts), ('pending', 1))
+        self.assertIn('mailbox unavailable', bounce.last_error)
+        # A follow-up flush is scheduled for the retry
+        self.assertTrue(Job.objects.filter(status='queued', run_at__gt=timezone.now()).exists())
+
+        OutboundEmail.objects.filter(pk=bounce.pk).update(next_attempt_at=timezone.now())
+        Job.objects.filter(status='queued').update(run_at=timezone.now())
+        run_pending()
+        bounce.refresh_from_db()
+        self.assertEqual(bounce.status, 'failed')
+
+        stats = delivery_stats()
+        self.assertEqual((stats['sent'], stats['failed']), (25, 1))
+        self.assertIsNotNone(stats['send_ms_p95'])
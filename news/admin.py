@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.db import models
+from django.db.models import Count, Q
 from django.forms import Textarea
 from .models import NewsCategory, NewsArticle, Newsletter, ArticleLike, Comment, NewsSettings
 
@@ -13,13 +14,19 @@ class NewsCategoryAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     list_editable = ('order', 'is_active')
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            published_count=Count('articles', filter=Q(articles__is_published=True)),
+        )
+    
     def article_count(self, obj):
-        count = obj.articles.filter(is_published=True).count()
+        count = obj.published_count
         if count > 0:
             url = reverse('admin:news_newsarticle_changelist') + f'?category__id__exact={obj.id}'
             return format_html('<a href="{}">{} articles</a>', url, count)
         return '0 articles'
     article_count.short_description = 'Published Articles'
+    article_count.admin_order_field = 'published_count'
     
     def color_preview(self, obj):
         return format_html(
@@ -36,6 +43,7 @@ class NewsArticleAdmin(admin.ModelAdmin):
     search_fields = ('title', 'content', 'excerpt', 'tags')
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'published_date'
+    list_select_related = ('category', 'author')
     
     fieldsets = (
         ('Article Content', {
@@ -163,6 +171,7 @@ class CommentAdmin(admin.ModelAdmin):
     list_filter = ('is_approved', 'is_spam', 'created_at', 'article__category')
     search_fields = ('name', 'email', 'content', 'article__title')
     date_hierarchy = 'created_at'
+    list_select_related = ('article',)
     
     fieldsets = (
         ('Comment Information', {
@@ -201,6 +210,7 @@ class ArticleLikeAdmin(admin.ModelAdmin):
     list_filter = ('created_at', 'article__category')
     search_fields = ('article__title', 'ip_address')
     date_hierarchy = 'created_at'
+    list_select_related = ('article',)
     
     def has_add_permission(self, request):
         return False  # Likes are created automatically
@@ -0,0 +1,123 @@
+"""
+Management command comparing full-text search with the old icontains scan
+
+Seeds synthetic articles inside a transaction that is rolled back at the
+end, so it is safe to run against a development database:
+
+    python manage.py benchmark_news_search --sizes 10000 100000
+"""
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from news.models import NewsArticle, NewsCategory
+from news.search import rebuild_search_index, search_articles, search_backend
+
+WORDS = (
+    'school students teachers parents exam results term sports football athletics '
+    'drama music science laboratory library history geography mathematics chemistry '
+    'biology physics kenya bungoma nyakhobi prize day visit trip community chapel '
+    'board meeting uniform fees holiday opening closing assembly principal award'
+).split()
+
+QUERIES = ['football', 'science laboratory', 'prize day award', 'nyakhobi chapel', 'zebra']
+
+
+def filler_vocabulary(rng, size=5000):
+    """Made-up words so the topic words above are not in every article"""
+    letters = 'abcdefghijklmnoprstuvwy'
+    return [''.join(rng.choices(letters, k=rng.randint(4, 10))) for _ in range(size)]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks news full-text search against icontains at several table sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10_000, 100_000])
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Search backend: {search_backend() or "none (icontains only)"}')
+        try:
+            with transaction.atomic():
+                self.run(sorted(options['sizes']), options['repeat'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write('Synthetic articles rolled back')
+
+    def run(self, sizes, repeat):
+        rng = random.Random(42)
+        self.filler = filler_vocabulary(rng)
+        author = User.objects.create(username='benchmark-search-author')
+        category = NewsCategory.objects.create(name='Benchmark Search', slug='benchmark-search')
+        created = NewsArticle.objects.count()
+
+        for size in sizes:
+            self.seed(rng, author, category, size - created)
+            created = max(created, size)
+            rebuild_search_index()
+
+            self.stdout.write(f'\n{created} articles')
+            self.stdout.write(f'{"query":<22}{"fts ms":>10}{"icontains ms":>15}{"hits":>8}')
+            for query in QUERIES:
+                fts = self.time(lambda: self.first_page(search_articles(query)), repeat)
+                scan = self.time(lambda: self.first_page(self.icontains(query)), repeat)
+                hits = search_articles(query).count()
+                self.stdout.write(f'{query:<22}{fts:>10.1f}{scan:>15.1f}{hits:>8}')
+
+    def text(self, rng, words, topics):
+        chosen = rng.choices(self.filler, k=words - topics) + rng.choices(WORDS, k=topics)
+        rng.shuffle(chosen)
+        return ' '.join(chosen)
+
+    def seed(self, rng, author, category, count, batch_size=2000):
+        now = timezone.now()
+        for start in range(0, max(count, 0), batch_size):
+            NewsArticle.objects.bulk_create([
+                NewsArticle(
+                    title=self.text(rng, 8, 2).title(),
+                    slug=f'benchmark-search-{start + i}-{rng.random():.12f}',
+                    content='<p>' + self.text(rng, 300, 4) + '</p>',
+                    excerpt=self.text(rng, 30, 1),
+                    tags=', '.join(rng.choices(WORDS, k=2)),
+                    category=category,
+                    author=author,
+                    is_published=True,
+                    published_date=now,
+                )
+                for i in range(min(batch_size, count - start))
+            ])
+
+    def icontains(self, query):
+        """The query search_news ran before the full-text index existed"""
+        return NewsArticle.objects.filter(
+            Q(title__icontains=query) |
+            Q(content__icontains=query) |
+            Q(excerpt__icontains=query) |
+            Q(tags__icontains=query),
+            is_published=True
+        )
+
+    def first_page(self, queryset):
+        """What the search page loads: ten results plus the total count"""
+        list(queryset[:10])
+        return queryset.count()
+
+    def time(self, func, repeat):
+        """Median wall time in milliseconds for one page of results plus the total count"""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,14 @@
+"""
+Management command to write pending article views to NewsArticle.views_count
+"""
+from django.core.management.base import BaseCommand
+
+from news.view_counter import flush_view_counts
+
+
+class Command(BaseCommand):
+    help = 'Writes pending article views to NewsArticle.views_count'
+
+    def handle(self, *args, **options):
+        flushed = flush_view_counts()
+        self.stdout.write(self.style.SUCCESS(f'Flushed {flushed} pending article views'))
@@ -0,0 +1,20 @@
+"""
+Management command to rebuild the news full-text search index
+"""
+from django.core.management.base import BaseCommand
+
+from news.search import rebuild_search_index, search_backend
+
+
+class Command(BaseCommand):
+    help = 'Re-indexes every news article for full-text search'
+
+    def handle(self, *args, **options):
+        backend = search_backend()
+        if backend is None:
+            self.stdout.write(self.style.WARNING(
+                'This database has no full-text search support; search falls back to icontains'
+            ))
+            return
+        count = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} articles ({backend})'))
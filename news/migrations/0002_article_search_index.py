@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:17
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+FTS_TABLE = 'news_newsarticle_fts'
+
+
+def create_search_index(apps, schema_editor):
+    """GIN index on PostgreSQL, FTS5 shadow table on SQLite; both back-filled from existing rows"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX news_article_search_gin ON news_newsarticle USING gin (search_vector)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+            "title, summary, body, tokenize = 'porter unicode61')"
+        )
+    else:
+        return
+
+    # Indexed the same way as NewsArticle.save() does, with the HTML tags
+    # stripped from the content. Only the indexed columns are read, so
+    # fields added to the model later do not break this step.
+    from news.search import rebuild_search_index
+    rebuild_search_index()
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS news_article_search_gin')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsarticle',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_article_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingArticleView',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='news.newsarticle')),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_pending_article_view'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsArticleSearchEntry',
+            fields=[
+                ('article', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='news.newsarticle')),
+                ('document', models.TextField(db_column='news_newsarticle_fts')),
+            ],
+            options={
+                'db_table': 'news_newsarticle_fts',
+                'managed': False,
+            },
+        ),
+    ]
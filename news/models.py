@@ -1,10 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.text import slugify
-from PIL import Image
-import os
 
 class NewsCategory(models.Model):
     """Categories for organizing news articles"""
@@ -82,6 +81,9 @@ class NewsArticle(models.Model):
     views_count = models.PositiveIntegerField(default=0)
     likes_count = models.PositiveIntegerField(default=0)
     
+    # Full-text search (PostgreSQL only, maintained by news.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     def __str__(self):
         return self.title
     
@@ -106,13 +108,21 @@ class NewsArticle(models.Model):
             self.published_date = timezone.now()
         
         super().save(*args, **kwargs)
+        
+        # Keep the full-text index current
+        from .search import INDEXED_FIELDS, update_search_index
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or INDEXED_FIELDS.intersection(update_fields):
+            update_search_index(self)
     
     def get_absolute_url(self):
         return reverse('news:article_detail', kwargs={'slug': self.slug})
     
     def increment_views(self):
+        """Count a view; buffered by news.view_counter and written to views_count in bulk"""
+        from .view_counter import record_view
+        record_view(self.pk)
         self.views_count += 1
-        self.save(update_fields=['views_count'])
     
     def get_tags_list(self):
         return [tag.strip() for tag in self.tags.split(',') if tag.strip()]
@@ -125,6 +135,24 @@ class NewsArticle(models.Model):
             models.Index(fields=['category', '-published_date']),
         ]
 
+class NewsArticleSearchEntry(models.Model):
+    """A row of the SQLite full-text index news_newsarticle_fts (see news.search); created by migration 0002"""
+    article = models.OneToOneField(NewsArticle, on_delete=models.DO_NOTHING, primary_key=True,
+                                   db_column='rowid', related_name='search_entry')
+    # FTS5's hidden column named after the table: the left side of MATCH and the argument of bm25()
+    document = models.TextField(db_column='news_newsarticle_fts')
+    
+    class Meta:
+        managed = False
+        db_table = 'news_newsarticle_fts'
+
+class PendingArticleView(models.Model):
+    """One article view not yet added to NewsArticle.views_count (see news.view_counter)"""
+    article = models.ForeignKey(NewsArticle, on_delete=models.CASCADE, related_name='+')
+    
+    def __str__(self):
+        return f"View of article #{self.article_id}"
+
 class Newsletter(models.Model):
     """School newsletters"""
     title = models.CharField(max_length=200)
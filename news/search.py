@@ -0,0 +1,153 @@
+"""
+Full-text search for news articles
+
+PostgreSQL: each article keeps a weighted tsvector in
+NewsArticle.search_vector (GIN indexed, see migration 0002) which is
+matched with websearch-style queries and ordered by ts_rank.
+
+SQLite (development): articles are mirrored into the FTS5 table
+news_newsarticle_fts, keyed by article id, and ordered by bm25().
+
+Other databases fall back to the old icontains scan. The index is updated
+from NewsArticle.save() and on delete; `python manage.py
+rebuild_news_search_index` rebuilds it from scratch (e.g. after bulk
+imports, which skip save()).
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Func, Lookup, Q, Value
+from django.utils.html import strip_tags
+
+from .models import NewsArticle, NewsArticleSearchEntry
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'news_newsarticle_fts'
+
+# Saving any of these re-indexes the article
+INDEXED_FIELDS = {'title', 'subtitle', 'tags', 'excerpt', 'content'}
+
+
+class Match(Lookup):
+    """``document__match=query``: an FTS5 MATCH against the whole SQLite index"""
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class BM25(Func):
+    """FTS5's bm25() relevance of the current match, given one weight per indexed column"""
+    function = 'bm25'
+    output_field = FloatField()
+
+
+NewsArticleSearchEntry._meta.get_field('document').register_lookup(Match)
+
+
+def search_backend():
+    if connection.vendor in ('postgresql', 'sqlite'):
+        return connection.vendor
+    return None
+
+
+def search_document(article):
+    """Text to index for an article, grouped by ranking weight (A highest)"""
+    return {
+        'A': article.title,
+        'B': ' '.join([article.subtitle, article.tags, article.excerpt]),
+        'C': strip_tags(article.content),
+    }
+
+
+def _postgres_vector(article):
+    from django.contrib.postgres.search import SearchVector
+
+    vector = None
+    for weight, text in search_document(article).items():
+        part = SearchVector(Value(text), weight=weight, config=SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def update_search_index(article):
+    """Index (or re-index) a saved article"""
+    backend = search_backend()
+    if backend == 'postgresql':
+        NewsArticle.objects.filter(pk=article.pk).update(search_vector=_postgres_vector(article))
+    elif backend == 'sqlite':
+        document = search_document(article)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [article.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, summary, body) VALUES (%s, %s, %s, %s)',
+                [article.pk, document['A'], document['B'], document['C']]
+            )
+
+
+def remove_from_search_index(article_id):
+    if search_backend() == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [article_id])
+
+
+def rebuild_search_index(batch_size=500):
+    """Re-index every article; returns the number indexed"""
+    if search_backend() == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    count = 0
+    articles = NewsArticle.objects.only('pk', *INDEXED_FIELDS).order_by('pk').iterator(chunk_size=batch_size)
+    for article in articles:
+        update_search_index(article)
+        count += 1
+    return count
+
+
+def _fts5_query(query):
+    """Turn user input into a safe FTS5 expression: every word must match (prefix match on the last)"""
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_articles(query, queryset=None):
+    """
+    Published articles matching ``query``, best match first.
+
+    Each result carries a ``rank`` annotation (higher is better).
+    """
+    if queryset is None:
+        queryset = NewsArticle.objects.filter(is_published=True)
+    backend = search_backend()
+
+    if backend == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank('search_vector', search_query)
+        ).order_by('-rank', '-published_date')
+
+    if backend == 'sqlite':
+        match = _fts5_query(query)
+        if match is None:
+            return queryset.none()
+        # Joined rather than filtered with a subquery so bm25() is computed
+        # once per match; it is lower-is-better, hence negated to match ts_rank
+        return queryset.filter(search_entry__document__match=match).annotate(
+            rank=-BM25('search_entry__document', 10.0, 4.0, 1.0)
+        ).order_by('-rank', '-published_date')
+
+    return queryset.filter(
+        Q(title__icontains=query) |
+        Q(content__icontains=query) |
+        Q(excerpt__icontains=query) |
+        Q(tags__icontains=query)
+    ).annotate(rank=Value(1.0, output_field=FloatField()))
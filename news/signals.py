@@ -0,0 +1,14 @@
+"""
+Signal handlers keeping the news search index in step with the database.
+"""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import NewsArticle
+from .search import remove_from_search_index
+
+
+@receiver(post_delete, sender=NewsArticle)
+def remove_deleted_article(sender, instance, **kwargs):
+    """Covers queryset and cascade deletes, which never call NewsArticle.delete()"""
+    remove_from_search_index(instance.pk)
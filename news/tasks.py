@@ -0,0 +1,19 @@
+"""
+Background tasks for the news app
+"""
+from jobs.models import Job
+from jobs.queue import task
+
+from .view_counter import flush_view_counts
+
+
+@task
+def flush_article_views():
+    """Add the pending article views to NewsArticle.views_count"""
+    flush_view_counts()
+
+
+def queue_view_flush():
+    """Queue a view flush unless one is already waiting"""
+    if not Job.objects.filter(task=flush_article_views.task_name, status='queued').exists():
+        flush_article_views.enqueue()
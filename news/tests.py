@@ -1,3 +1,218 @@
-from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import QuerySet
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from jobs.models import Job
+from jobs.queue import run_pending
+
+from . import view_counter
+from .models import NewsArticle, NewsCategory, PendingArticleView
+from .search import search_articles, search_backend
+from .tasks import flush_article_views
+from .view_counter import flush_view_counts, pending_views, record_view
+
+
+class NewsTestMixin:
+    def setUp(self):
+        self.author = User.objects.create_user('editor', password='x')
+        self.category = NewsCategory.objects.create(name='Sports')
+
+    def create_article(self, title='Sports Day Results', **kwargs):
+        defaults = {
+            'content': '<p>Our athletes did well.</p>',
+            'category': self.category,
+            'author': self.author,
+            'is_published': True,
+        }
+        defaults.update(kwargs)
+        return NewsArticle.objects.create(title=title, **defaults)
+
+
+class ViewCounterTests(NewsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # Hold off flush jobs so only the test decides when to write
+        patcher = mock.patch.object(view_counter, '_next_flush', float('inf'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_views_are_buffered_until_flushed(self):
+        article = self.create_article()
+
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(5):
+                record_view(article.pk)
+        # Views only ever append rows; the article row is not written
+        self.assertTrue(all(query['sql'].startswith('INSERT INTO "news_pendingarticleview"') for query in queries))
+
+        article.refresh_from_db()
+        self.assertEqual(article.views_count, 0)
+        self.assertEqual(pending_views(article.pk), 5)
+
+        self.assertEqual(flush_view_counts(), 5)
+        article.refresh_from_db()
+        self.assertEqual(article.views_count, 5)
+        self.assertEqual(pending_views(article.pk), 0)
+        self.assertEqual(flush_view_counts(), 0)
+
+    def test_articles_with_the_same_count_share_an_update(self):
+        articles = [self.create_article(f'Article {i}') for i in range(30)]
+        for article, views in zip(articles, [2, 2, 3]):
+            for _ in range(views):
+                record_view(article.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(flush_view_counts(), 7)
+        updates = [query for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual([NewsArticle.objects.get(pk=a.pk).views_count for a in articles[:4]], [2, 2, 3, 0])
+
+    def test_views_recorded_during_a_flush_stay_pending(self):
+        article = self.create_article()
+        for _ in range(3):
+            record_view(article.pk)
+
+        pending_counts = view_counter._pending_counts
+
+        def count_then_view(views):
+            counts = pending_counts(views)
+            record_view(article.pk)
+            return counts
+
+        with mock.patch.object(view_counter, '_pending_counts', count_then_view):
+            self.assertEqual(flush_view_counts(), 3)
+        self.assertEqual(pending_views(article.pk), 1)
+        self.assertEqual(flush_view_counts(), 1)
+        article.refresh_from_db()
+        self.assertEqual(article.views_count, 4)
+
+    def test_concurrent_flushes_write_views_once(self):
+        article = self.create_article()
+        for _ in range(10):
+            record_view(article.pk)
+
+        pending_counts = view_counter._pending_counts
+
+        def count_then_lose_race(views):
+            counts = pending_counts(views)
+            # Another flush deletes (claims) the same views first
+            PendingArticleView.objects.all().delete()
+            return counts
+
+        with mock.patch.object(view_counter, '_pending_counts', count_then_lose_race):
+            self.assertEqual(flush_view_counts(), 0)
+
+        article.refresh_from_db()
+        self.assertEqual(article.views_count, 0)
+
+    def test_failed_flush_keeps_views_pending(self):
+        article = self.create_article()
+        record_view(article.pk)
+        record_view(article.pk)
+
+        with mock.patch.object(QuerySet, 'update', side_effect=DatabaseError('disk full')):
+            with self.assertRaises(DatabaseError):
+                flush_view_counts()
+        self.assertEqual(pending_views(article.pk), 2)
+        self.assertEqual(flush_view_counts(), 2)
+
+    def test_views_queue_one_flush_job(self):
+        article = self.create_article()
+        view_counter._next_flush = 0.0
+        for _ in range(3):
+            record_view(article.pk)
+        view_counter._next_flush = 0.0  # another web process
+        record_view(article.pk)
+
+        self.assertEqual(Job.objects.filter(task=flush_article_views.task_name).count(), 1)
+        run_pending()
+        article.refresh_from_db()
+        self.assertEqual(article.views_count, 4)
+
+
+class ConcurrentViewTests(NewsTestMixin, TransactionTestCase):
+    @mock.patch.object(view_counter, '_next_flush', float('inf'))
+    def test_concurrent_views_are_not_lost(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('the in-memory SQLite test database is locked against concurrent writers')
+        articles = [self.create_article(f'Article {i}') for i in range(3)]
+        threads_per_article, views_per_thread = 4, 25
+
+        def view(article_id):
+            try:
+                for _ in range(views_per_thread):
+                    record_view(article_id)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=view, args=(article.pk,))
+            for article in articles for _ in range(threads_per_article)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        flush_view_counts()
+        for article in articles:
+            article.refresh_from_db()
+            self.assertEqual(article.views_count, threads_per_article * views_per_thread)
+
+
+class SearchTests(NewsTestMixin, TestCase):
+    def test_results_are_ranked_by_field_weight(self):
+        in_content = self.create_article('Weekly Roundup', content='<p>The football team trained.</p>')
+        in_title = self.create_article('Football Finals')
+        self.create_article('Drama Festival')
+
+        results = list(search_articles('football'))
+        self.assertEqual(results, [in_title, in_content])
+        self.assertGreater(results[0].rank, results[1].rank)
+
+    def test_index_follows_edits_and_deletes(self):
+        article = self.create_article('Drama Festival')
+        self.assertFalse(search_articles('football').exists())
+
+        article.title = 'Football Finals'
+        article.save()
+        self.assertEqual(list(search_articles('football')), [article])
+
+        article.delete()
+        self.assertFalse(search_articles('football').exists())
+
+    def test_unpublished_articles_and_punctuation(self):
+        self.create_article('Football Finals', is_published=False)
+        self.assertFalse(search_articles('football').exists())
+        self.assertFalse(search_articles('"*( OR').exists())
+
+
+
+class SearchIndexMigrationTests(TransactionTestCase):
+    def migrate(self, *targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(list(targets) or executor.loader.graph.leaf_nodes())
+        return executor.loader.project_state(list(targets)).apps if targets else None
+
+    def test_backfill_indexes_text_without_html(self):
+        if search_backend() != 'sqlite':
+            self.skipTest('checks the SQLite FTS5 index')
+        old_apps = self.migrate(('news', '0001_initial'))
+        self.addCleanup(self.migrate)
+        author = old_apps.get_model('auth', 'User').objects.create(username='editor')
+        category = old_apps.get_model('news', 'NewsCategory').objects.create(name='Sports', slug='sports')
+        article = old_apps.get_model('news', 'NewsArticle').objects.create(
+            title='Finals', slug='finals', author=author, category=category,
+            content='<p class="lead">The <strong>football</strong> team won.</p>',
+        )
+
+        self.migrate(('news', '0002_article_search_index'))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT body FROM news_newsarticle_fts WHERE rowid = %s', [article.pk])
+            self.assertEqual(cursor.fetchone(), ('The football team won.',))
@@ -0,0 +1,83 @@
+"""
+Write-behind view counting for news articles
+
+A page view appends a PendingArticleView row instead of updating the
+NewsArticle row, so popular articles are never locked by their readers.
+The pending views are added to NewsArticle.views_count in bulk F() updates:
+
+    - by the jobs worker, which each web process asks for at most once every
+      NEWS_VIEW_FLUSH_INTERVAL seconds while articles are being read,
+    - whenever `python manage.py flush_view_counts` runs (cron, deploys).
+
+The buffer is an ordinary table, so it works with every cache backend and
+survives restarts, and a flush only reads the views recorded since the last
+one, however many articles there are.
+"""
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import NewsArticle, PendingArticleView
+
+# time.monotonic() before which this process does not ask for another flush
+_next_flush = 0.0
+
+
+def _flush_interval():
+    return getattr(settings, 'NEWS_VIEW_FLUSH_INTERVAL', 60)
+
+
+def record_view(article_id):
+    """Count one view of an article"""
+    global _next_flush
+    PendingArticleView.objects.create(article_id=article_id)
+
+    now = time.monotonic()
+    if now >= _next_flush:
+        _next_flush = now + _flush_interval()
+        from .tasks import queue_view_flush
+        queue_view_flush()
+
+
+def pending_views(article_id):
+    """Views recorded for an article but not yet written to NewsArticle.views_count"""
+    return PendingArticleView.objects.filter(article_id=article_id).count()
+
+
+def _pending_counts(views):
+    """{article id: number of views} in ``views``"""
+    return dict(views.order_by().values('article').annotate(total=Count('pk')).values_list('article', 'total'))
+
+
+def flush_view_counts():
+    """
+    Move pending views into NewsArticle.views_count.
+
+    The views are deleted and written in one transaction, so a failed flush
+    leaves them pending, and views recorded while it runs wait for the next.
+    If a concurrent flush deleted some of the same rows first, this one
+    rolls back rather than count them twice. Articles with the same number
+    of pending views share one UPDATE. Returns the number of views written.
+    """
+    with transaction.atomic():
+        last = PendingArticleView.objects.order_by('-pk').values_list('pk', flat=True).first()
+        if last is None:
+            return 0
+        views = PendingArticleView.objects.filter(pk__lte=last)
+        counts = _pending_counts(views)
+        total = sum(counts.values())
+
+        deleted, _ = views.delete()
+        if deleted != total:
+            transaction.set_rollback(True)
+            return 0
+
+        by_delta = defaultdict(list)
+        for article_id, count in counts.items():
+            by_delta[count].append(article_id)
+        for delta, ids in by_delta.items():
+            NewsArticle.objects.filter(pk__in=ids).update(views_count=F('views_count') + delta)
+    return total
@@ -1,8 +1,9 @@
 from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator
-from django.db.models import Q
 from django.http import JsonResponse
 from .models import NewsArticle, NewsCategory, Newsletter
+from .search import search_articles
+from st_marys_school.pagination import EstimatedCountPaginator
 
 def news_home(request):
     """Main news page"""
@@ -58,7 +59,7 @@ def category_articles(request, slug):
         category=category, is_published=True
     ).select_related('author')
     
-    paginator = Paginator(articles_list, 10)
+    paginator = EstimatedCountPaginator(articles_list, 10)
     page = paginator.get_page(request.GET.get('page'))
     
     context = {
@@ -101,14 +102,8 @@ def search_news(request):
             'page_title': 'Search News'
         })
     
-    # Search articles
-    articles = NewsArticle.objects.filter(
-        Q(title__icontains=query) | 
-        Q(content__icontains=query) | 
-        Q(excerpt__icontains=query) |
-        Q(tags__icontains=query),
-        is_published=True
-    ).select_related('category', 'author')
+    # Ranked full-text search, best match first
+    articles = search_articles(query).select_related('category', 'author')
     
     paginator = Paginator(articles, 10)
     page = paginator.get_page(request.GET.get('page'))
@@ -116,7 +111,7 @@ def search_news(request):
     context = {
         'query': query,
         'articles': page,
-        'total_results': articles.count(),
+        'total_results': paginator.count,
         'page_title': f'Search results for "{query}"'
     }
     return render(request, 'news/search_results.html', context)
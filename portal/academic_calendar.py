@@ -0,0 +1,64 @@
+"""
+Cached lookup of the current Term and AcademicYear.
+
+Both are read on nearly every portal page but change a few times a year, so
+they are kept in the 'querysets' cache and memoized on the request. The cache is
+cleared from portal.signals whenever a Term or AcademicYear is saved or
+deleted.
+"""
+from django.core.cache import caches
+
+from .models import AcademicYear, Term
+
+CURRENT_TERM_CACHE_KEY = 'portal:current_term'
+CURRENT_YEAR_CACHE_KEY = 'portal:current_academic_year'
+CALENDAR_CACHE_TIMEOUT = 60 * 60 * 6  # 6 hours
+
+# Distinguishes a cache miss from a cached "no current term" (None)
+_MISSING = object()
+
+
+def _cached_lookup(request, cache_key, loader):
+    memo = getattr(request, '_academic_calendar', None) if request is not None else None
+    if memo is not None and cache_key in memo:
+        return memo[cache_key]
+
+    cache = caches['querysets']
+    value = cache.get(cache_key, _MISSING)
+    if value is _MISSING:
+        value = loader()
+        cache.set(cache_key, value, CALENDAR_CACHE_TIMEOUT)
+
+    if request is not None:
+        if memo is None:
+            memo = request._academic_calendar = {}
+        memo[cache_key] = value
+    return value
+
+
+def get_current_term(request=None):
+    """Return the current Term (or None), cached per request and across requests"""
+    return _cached_lookup(
+        request, CURRENT_TERM_CACHE_KEY,
+        lambda: Term.objects.filter(is_current=True).select_related('academic_year').first()
+    )
+
+
+def get_current_academic_year(request=None):
+    """Return the current AcademicYear (or None), cached per request and across requests"""
+    return _cached_lookup(
+        request, CURRENT_YEAR_CACHE_KEY,
+        lambda: AcademicYear.objects.filter(is_current=True).first()
+    )
+
+
+def invalidate_academic_calendar():
+    """Drop the cached current term/year so the next lookup hits the database"""
+    caches['querysets'].delete_many([CURRENT_TERM_CACHE_KEY, CURRENT_YEAR_CACHE_KEY])
+
+
+def warm_academic_calendar():
+    """Reload the current term/year into the cache (used by `manage_cache warm`)"""
+    invalidate_academic_calendar()
+    get_current_term()
+    get_current_academic_year()
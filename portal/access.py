@@ -0,0 +1,86 @@
+"""
+Which students' records a portal user may see.
+
+* a student sees their own records;
+* a parent sees their children (Parent.children);
+* a teacher sees the students of the classes they are class teacher of.
+
+accessible_student_ids() resolves the whole set with one indexed query and
+keeps it in the 'default' cache and on the request's user object. Every
+later check in the request is a set lookup, and so is every later request
+until the set changes. portal.signals drops a user's cached set when one of
+its inputs changes: Parent.children, Class.class_teacher or a student's
+class. Bulk queryset.update() calls bypass the signals; their changes show
+up when the cached set expires after ACCESS_CACHE_TIMEOUT.
+"""
+from django.core.cache import caches
+from django.db.models import Q
+
+from .models import Class, Parent, Student, Teacher
+
+ACCESS_CACHE_KEY = 'portal:student-access:{user_id}'
+ACCESS_CACHE_TIMEOUT = 60 * 60
+
+
+def _cache_key(user_id):
+    return ACCESS_CACHE_KEY.format(user_id=user_id)
+
+
+def _students_filter(user):
+    """Q selecting the students ``user`` may see, or None for users who see none"""
+    profile = getattr(user, 'userprofile', None)
+    if profile is None:
+        return None
+    if profile.user_type == 'student':
+        return Q(profile=profile)
+    if profile.user_type == 'parent':
+        return Q(parents__profile=profile)
+    if profile.user_type == 'teacher':
+        return Q(current_class__class_teacher__profile=profile)
+    return None
+
+
+def accessible_student_ids(user):
+    """Frozenset of the ids of the students ``user`` may see"""
+    if not user.is_authenticated:
+        return frozenset()
+    ids = getattr(user, '_accessible_student_ids', None)
+    if ids is not None:
+        return ids
+
+    cache = caches['default']
+    ids = cache.get(_cache_key(user.pk))
+    if ids is None:
+        students = _students_filter(user)
+        ids = frozenset(
+            Student.objects.filter(students).values_list('pk', flat=True).distinct()
+        ) if students is not None else frozenset()
+        cache.set(_cache_key(user.pk), ids, ACCESS_CACHE_TIMEOUT)
+    user._accessible_student_ids = ids
+    return ids
+
+
+def can_view_student(user, student_id):
+    return int(student_id) in accessible_student_ids(user)
+
+
+def invalidate_student_access(user_ids):
+    """Drop the cached student set of each user in ``user_ids``"""
+    keys = [_cache_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    if keys:
+        caches['default'].delete_many(keys)
+
+
+def invalidate_parent_access(parent_ids):
+    invalidate_student_access(Parent.objects.filter(pk__in=parent_ids).values_list('profile__user_id', flat=True))
+
+
+def invalidate_teacher_access(teacher_ids):
+    invalidate_student_access(Teacher.objects.filter(pk__in=teacher_ids).values_list('profile__user_id', flat=True))
+
+
+def invalidate_class_access(class_ids):
+    """The class teachers of ``class_ids`` gained or lost a student"""
+    invalidate_teacher_access(Class.objects.filter(
+        pk__in=class_ids, class_teacher__isnull=False,
+    ).values_list('class_teacher_id', flat=True))
@@ -1,14 +1,24 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
 from django.utils.html import format_html
 from django.urls import reverse
-from django.db.models import Count, Avg
+from django.db.models import Count, Avg, Q
 from .models import (
     AcademicYear, Class, Subject, ClassSubject, UserProfile, Teacher, Student,
     Parent, Term, Assignment, AssignmentSubmission, Grade, Attendance,
-    ProgressReport, Communication, PortalSettings
+    ProgressReport, StudentTermSummary, Communication, MessageDelivery, PortalSettings
 )
+from .broadcasts import fan_out
+from .exports import EXPORTS, stream_csv
+from .reports import generate_progress_reports
+from st_marys_school.pagination import EstimatedCountPaginator
+
+def export_as_csv(modeladmin, request, queryset):
+    """Admin action: stream the selected rows as a CSV download"""
+    export = next(export for export in EXPORTS.values() if export.model is queryset.model)
+    return stream_csv(export, queryset)
+export_as_csv.short_description = "Export selected to CSV"
 
 # Unregister the default User admin
 admin.site.unregister(User)
@@ -24,6 +34,7 @@ class UserAdmin(BaseUserAdmin):
     inlines = (UserProfileInline,)
     list_display = ('username', 'email', 'first_name', 'last_name', 'get_user_type', 'is_staff', 'date_joined')
     list_filter = BaseUserAdmin.list_filter + ('userprofile__user_type',)
+    list_select_related = ('userprofile',)
     
     def get_user_type(self, obj):
         try:
@@ -40,9 +51,13 @@ class AcademicYearAdmin(admin.ModelAdmin):
     search_fields = ('name',)
     date_hierarchy = 'start_date'
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(classes_count=Count('class'))
+    
     def get_classes_count(self, obj):
-        return obj.class_set.count()
+        return obj.classes_count
     get_classes_count.short_description = 'Classes'
+    get_classes_count.admin_order_field = 'classes_count'
 
 @admin.register(Class)
 class ClassAdmin(admin.ModelAdmin):
@@ -51,13 +66,18 @@ class ClassAdmin(admin.ModelAdmin):
     search_fields = ('name', 'display_name', 'class_teacher__profile__user__first_name', 
                     'class_teacher__profile__user__last_name')
     ordering = ('academic_year', 'level')
+    list_select_related = ('academic_year', 'class_teacher__profile__user')
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(enrolled=Count('students'))
     
     def get_student_count(self, obj):
-        count = obj.student_count
+        count = obj.enrolled
         if count > obj.capacity:
             return format_html('<span style="color: red;">{}/{}</span>', count, obj.capacity)
         return f"{count}/{obj.capacity}"
     get_student_count.short_description = 'Enrollment'
+    get_student_count.admin_order_field = 'enrolled'
 
 @admin.register(Subject)
 class SubjectAdmin(admin.ModelAdmin):
@@ -66,9 +86,13 @@ class SubjectAdmin(admin.ModelAdmin):
     search_fields = ('name', 'code')
     filter_horizontal = ('classes',)
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(classes_count=Count('classes'))
+    
     def get_classes_count(self, obj):
-        return obj.classes.count()
+        return obj.classes_count
     get_classes_count.short_description = 'Classes'
+    get_classes_count.admin_order_field = 'classes_count'
 
 @admin.register(ClassSubject)
 class ClassSubjectAdmin(admin.ModelAdmin):
@@ -76,6 +100,7 @@ class ClassSubjectAdmin(admin.ModelAdmin):
     list_filter = ('class_obj__academic_year', 'subject__is_core')
     search_fields = ('class_obj__name', 'subject__name', 'teacher__profile__user__first_name')
     raw_id_fields = ('teacher',)
+    list_select_related = ('class_obj__academic_year', 'subject', 'teacher__profile__user')
 
 @admin.register(Teacher)
 class TeacherAdmin(admin.ModelAdmin):
@@ -85,18 +110,28 @@ class TeacherAdmin(admin.ModelAdmin):
     search_fields = ('profile__user__first_name', 'profile__user__last_name', 'employee_id')
     filter_horizontal = ('subjects',)
     date_hierarchy = 'hire_date'
+    list_select_related = ('profile__user',)
+    
+    def get_queryset(self, request):
+        # distinct: the two joins would otherwise multiply each other's rows
+        return super().get_queryset(request).annotate(
+            subjects_count=Count('subjects', distinct=True),
+            classes_count=Count('class', distinct=True),
+        )
     
     def get_full_name(self, obj):
         return obj.full_name
     get_full_name.short_description = 'Full Name'
     
     def get_subjects_count(self, obj):
-        return obj.subjects.count()
+        return obj.subjects_count
     get_subjects_count.short_description = 'Subjects'
+    get_subjects_count.admin_order_field = 'subjects_count'
     
     def get_classes_count(self, obj):
-        return obj.class_set.count()
+        return obj.classes_count
     get_classes_count.short_description = 'Classes'
+    get_classes_count.admin_order_field = 'classes_count'
 
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
@@ -106,6 +141,8 @@ class StudentAdmin(admin.ModelAdmin):
     search_fields = ('profile__user__first_name', 'profile__user__last_name', 'admission_number')
     date_hierarchy = 'admission_date'
     raw_id_fields = ('parent_guardian',)
+    list_select_related = ('profile__user', 'current_class__academic_year', 'parent_guardian__profile__user')
+    actions = [export_as_csv]
     
     fieldsets = (
         ('Basic Information', {
@@ -140,14 +177,19 @@ class ParentAdmin(admin.ModelAdmin):
     list_filter = ('relationship', 'is_primary_contact')
     search_fields = ('profile__user__first_name', 'profile__user__last_name', 'occupation')
     filter_horizontal = ('children',)
+    list_select_related = ('profile__user',)
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(children_count=Count('children'))
     
     def get_full_name(self, obj):
         return obj.full_name
     get_full_name.short_description = 'Full Name'
     
     def get_children_count(self, obj):
-        return obj.children.count()
+        return obj.children_count
     get_children_count.short_description = 'Children'
+    get_children_count.admin_order_field = 'children_count'
 
 @admin.register(Term)
 class TermAdmin(admin.ModelAdmin):
@@ -155,6 +197,19 @@ class TermAdmin(admin.ModelAdmin):
     list_filter = ('academic_year', 'term_number', 'is_current')
     date_hierarchy = 'start_date'
     ordering = ('-academic_year', 'term_number')
+    list_select_related = ('academic_year',)
+    
+    actions = ['generate_reports']
+    
+    def generate_reports(self, request, queryset):
+        for term in queryset.select_related('academic_year'):
+            created, updated, skipped = generate_progress_reports(term)
+            self.message_user(request, f'{term}: {created} progress reports created, {updated} updated.')
+            if skipped:
+                names = ', '.join(class_obj.display_name for class_obj in skipped)
+                self.message_user(request, f'{term}: skipped classes without a class teacher: {names}.',
+                                  level=messages.WARNING)
+    generate_reports.short_description = "Generate progress reports"
 
 @admin.register(Assignment)
 class AssignmentAdmin(admin.ModelAdmin):
@@ -164,6 +219,7 @@ class AssignmentAdmin(admin.ModelAdmin):
     search_fields = ('title', 'description', 'teacher__profile__user__first_name')
     date_hierarchy = 'due_date'
     raw_id_fields = ('teacher',)
+    list_select_related = ('subject', 'class_obj__academic_year', 'teacher__profile__user')
     
     fieldsets = (
         ('Basic Information', {
@@ -177,14 +233,16 @@ class AssignmentAdmin(admin.ModelAdmin):
         })
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(submissions_count=Count('submissions'))
+    
     def get_submission_count(self, obj):
-        return obj.submission_count
+        return obj.submissions_count
     get_submission_count.short_description = 'Submissions'
+    get_submission_count.admin_order_field = 'submissions_count'
     
     def is_overdue(self, obj):
-        if obj.is_overdue:
-            return format_html('<span style="color: red;">Yes</span>')
-        return 'No'
+        return obj.is_overdue
     is_overdue.short_description = 'Overdue'
     is_overdue.boolean = True
 
@@ -196,6 +254,8 @@ class AssignmentSubmissionAdmin(admin.ModelAdmin):
     search_fields = ('student__profile__user__first_name', 'student__profile__user__last_name',
                     'assignment__title')
     date_hierarchy = 'submitted_at'
+    list_select_related = ('student__profile__user', 'assignment__class_obj', 'assignment__subject')
+    actions = [export_as_csv]
     
     fieldsets = (
         ('Submission Information', {
@@ -217,11 +277,11 @@ class AssignmentSubmissionAdmin(admin.ModelAdmin):
         score = obj.percentage_score
         if score is not None:
             if score >= 70:
-                return format_html('<span style="color: green;">{:.1f}%</span>', score)
+                return format_html('<span style="color: green;">{}%</span>', f'{score:.1f}')
             elif score >= 50:
-                return format_html('<span style="color: orange;">{:.1f}%</span>', score)
+                return format_html('<span style="color: orange;">{}%</span>', f'{score:.1f}')
             else:
-                return format_html('<span style="color: red;">{:.1f}%</span>', score)
+                return format_html('<span style="color: red;">{}%</span>', f'{score:.1f}')
         return 'Not Graded'
     get_percentage_score.short_description = 'Score %'
 
@@ -233,6 +293,11 @@ class GradeAdmin(admin.ModelAdmin):
     search_fields = ('student__profile__user__first_name', 'student__profile__user__last_name',
                     'title')
     date_hierarchy = 'date_recorded'
+    list_select_related = ('student__profile__user', 'subject', 'term__academic_year')
+    # Grades and attendance grow every term: estimate the totals instead of counting them
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = [export_as_csv]
     
     def get_percentage_score(self, obj):
         score = obj.percentage_score
@@ -244,7 +309,7 @@ class GradeAdmin(admin.ModelAdmin):
             color = 'orange'
         else:
             color = 'red'
-        return format_html('<span style="color: {};">{:.1f}%</span>', color, score)
+        return format_html('<span style="color: {};">{}%</span>', color, f'{score:.1f}')
     get_percentage_score.short_description = 'Score %'
     
     def get_letter_grade(self, obj):
@@ -260,10 +325,27 @@ class AttendanceAdmin(admin.ModelAdmin):
     list_filter = ('status', 'date', 'student__current_class')
     search_fields = ('student__profile__user__first_name', 'student__profile__user__last_name')
     date_hierarchy = 'date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = [export_as_csv]
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('student__profile__user', 'marked_by__profile__user')
 
+@admin.register(StudentTermSummary)
+class StudentTermSummaryAdmin(admin.ModelAdmin):
+    list_display = ('student', 'term', 'subject', 'average', 'grade_count', 'total_weight', 'updated_at')
+    list_filter = ('term', 'subject')
+    search_fields = ('student__profile__user__first_name', 'student__profile__user__last_name',
+                    'student__admission_number')
+    list_select_related = ('student__profile__user', 'term__academic_year', 'subject')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
 @admin.register(ProgressReport)
 class ProgressReportAdmin(admin.ModelAdmin):
     list_display = ('student', 'term', 'overall_average', 'class_position', 'total_students',
@@ -271,6 +353,7 @@ class ProgressReportAdmin(admin.ModelAdmin):
     list_filter = ('term', 'conduct_grade', 'effort_grade')
     search_fields = ('student__profile__user__first_name', 'student__profile__user__last_name')
     date_hierarchy = 'generated_at'
+    list_select_related = ('student__profile__user', 'term__academic_year')
     
     fieldsets = (
         ('Basic Information', {
@@ -290,41 +373,73 @@ class ProgressReportAdmin(admin.ModelAdmin):
         })
     )
 
+@admin.register(MessageDelivery)
+class MessageDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('message', 'user', 'delivered_at', 'read_at')
+    list_filter = (('read_at', admin.EmptyFieldListFilter), 'delivered_at')
+    search_fields = ('user__username', 'user__first_name', 'user__last_name')
+    list_select_related = ('message', 'user')
+    raw_id_fields = ('message', 'user')
+    readonly_fields = ('delivered_at',)
+    # A school-wide broadcast alone adds a row per user
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
 @admin.register(Communication)
 class CommunicationAdmin(admin.ModelAdmin):
     list_display = ('subject', 'sender', 'message_type', 'priority', 'get_recipients_count',
                    'get_unread_count', 'is_broadcast', 'created_at')
     list_filter = ('message_type', 'priority', 'is_broadcast', 'created_at')
     search_fields = ('subject', 'message', 'sender__first_name', 'sender__last_name')
-    filter_horizontal = ('recipients', 'read_by')
+    list_select_related = ('sender',)
     date_hierarchy = 'created_at'
+    readonly_fields = ('fanned_out_at', 'get_deliveries')
+    actions = ['deliver_broadcasts']
     
     fieldsets = (
         ('Message Details', {
             'fields': ('sender', 'message_type', 'priority', 'subject', 'message')
         }),
         ('Recipients', {
-            'fields': ('recipients', 'is_broadcast')
+            'fields': ('is_broadcast', 'audience', 'audience_class', 'fanned_out_at', 'get_deliveries')
         }),
         ('Attachments', {
             'fields': ('attachment',)
         }),
-        ('Read Status', {
-            'fields': ('read_by',),
-            'classes': ('collapse',)
-        })
     )
     
+    def get_queryset(self, request):
+        # Both counts come from the delivery table in the changelist query itself
+        return super().get_queryset(request).annotate(
+            recipients_count=Count('deliveries'),
+            unread=Count('deliveries', filter=Q(deliveries__read_at__isnull=True)),
+        )
+    
     def get_recipients_count(self, obj):
-        return obj.recipients.count()
+        return obj.recipients_count
     get_recipients_count.short_description = 'Recipients'
+    get_recipients_count.admin_order_field = 'recipients_count'
     
     def get_unread_count(self, obj):
-        unread = obj.unread_count
+        unread = obj.unread
         if unread > 0:
             return format_html('<span style="color: red;">{}</span>', unread)
         return unread
     get_unread_count.short_description = 'Unread'
+    get_unread_count.admin_order_field = 'unread'
+    
+    def get_deliveries(self, obj):
+        # Broadcasts have a delivery per user, far too many to list on this page
+        if obj.pk is None:
+            return '-'
+        url = reverse('admin:portal_messagedelivery_changelist') + f'?message__id__exact={obj.pk}'
+        return format_html('<a href="{}">{} recipient(s), {} unread</a>', url, obj.recipients_count, obj.unread)
+    get_deliveries.short_description = 'Deliveries'
+    
+    def deliver_broadcasts(self, request, queryset):
+        delivered = sum(fan_out(message) for message in queryset.filter(is_broadcast=True, fanned_out_at__isnull=True))
+        self.message_user(request, f'Broadcasts delivered to {delivered} user(s).', messages.SUCCESS)
+    deliver_broadcasts.short_description = "Deliver selected broadcasts now"
 
 @admin.register(PortalSettings)
 class PortalSettingsAdmin(admin.ModelAdmin):
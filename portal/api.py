@@ -0,0 +1,215 @@
+"""
+Read-only JSON API for grades, attendance, assignments and messages.
+
+Built for the portal front end and a mobile app polling over slow
+connections, so each response is kept small and cheap:
+
+* keyset pagination: ``?cursor=`` is the opaque ``next`` value of the
+  previous page, and each page is read from an index range instead of
+  with OFFSET and COUNT;
+* sparse fieldsets: ``?fields=id,title,marks`` returns only those keys;
+* conditional GET: every response carries an ETag of its body, and a
+  repeated request with If-None-Match gets an empty 304;
+* the views gzip their responses.
+
+Responses look like ``{"results": [...], "next": "<cursor or null>"}``.
+"""
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .inbox import inbox
+from .models import Assignment, AssignmentSubmission, Attendance, Grade
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class ApiError(ValueError):
+    pass
+
+
+class Resource:
+    def __init__(self, name, order_field, parse, select_related, fields):
+        self.name = name
+        self.order_field = order_field  # newest first; ties broken by id
+        self.parse = parse  # turns the cursor's isoformat value back into a date/datetime
+        self.select_related = select_related
+        self.fields = fields
+
+    def select_fields(self, requested):
+        """The field names to return for ``?fields=`` (all when empty)"""
+        if not requested:
+            return list(self.fields)
+        names = [name.strip() for name in requested.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ApiError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(self.fields)}")
+        return names
+
+    def page(self, queryset, cursor=None, limit=PAGE_SIZE, fields=None):
+        """Return {'results': [...], 'next': cursor} for the page after ``cursor``"""
+        names = self.select_fields(fields)
+        queryset = queryset.select_related(*self.select_related).order_by(f'-{self.order_field}', '-pk')
+        if cursor:
+            value, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{f'{self.order_field}__lt': value}) | Q(**{self.order_field: value, 'pk__lt': pk})
+            )
+
+        # One extra row tells whether there is a next page without a COUNT
+        rows = list(queryset[:limit + 1])
+        next_cursor = self.encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return {
+            'results': [{name: self.fields[name](obj) for name in names} for obj in rows[:limit]],
+            'next': next_cursor,
+        }
+
+    def encode_cursor(self, obj):
+        raw = json.dumps([getattr(obj, self.order_field).isoformat(), obj.pk])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            value, pk = json.loads(raw)
+            return self.parse(value), int(pk)
+        except (ValueError, TypeError):
+            raise ApiError('Invalid cursor.')
+
+
+def _name(user):
+    return user.get_full_name() or user.get_username() if user else ''
+
+
+def _teacher(teacher):
+    return _name(teacher.profile.user) if teacher else ''
+
+
+RESOURCES = {
+    'grades': Resource('grades', 'date_recorded', date.fromisoformat, ['subject', 'term', 'teacher__profile__user'], {
+        'id': lambda grade: grade.pk,
+        'subject': lambda grade: grade.subject.name,
+        'subject_code': lambda grade: grade.subject.code,
+        'term': lambda grade: grade.term.name,
+        'term_id': lambda grade: grade.term_id,
+        'type': lambda grade: grade.grade_type,
+        'title': lambda grade: grade.title,
+        'marks': lambda grade: grade.marks_obtained,
+        'max_marks': lambda grade: grade.max_marks,
+        'percentage': lambda grade: grade.percentage_score,
+        'grade': lambda grade: grade.letter_grade,
+        'weight': lambda grade: grade.weight,
+        'teacher': lambda grade: _teacher(grade.teacher),
+        'date_recorded': lambda grade: grade.date_recorded,
+        'comments': lambda grade: grade.comments,
+    }),
+    'attendance': Resource('attendance', 'date', date.fromisoformat, [], {
+        'id': lambda record: record.pk,
+        'date': lambda record: record.date,
+        'status': lambda record: record.status,
+        'time_in': lambda record: record.time_in,
+        'time_out': lambda record: record.time_out,
+        'notes': lambda record: record.notes,
+    }),
+    'assignments': Resource('assignments', 'due_date', datetime.fromisoformat, ['subject', 'teacher__profile__user'], {
+        'id': lambda assignment: assignment.pk,
+        'title': lambda assignment: assignment.title,
+        'subject': lambda assignment: assignment.subject.name,
+        'type': lambda assignment: assignment.assignment_type,
+        'teacher': lambda assignment: _teacher(assignment.teacher),
+        'due_date': lambda assignment: assignment.due_date,
+        'max_marks': lambda assignment: assignment.max_marks,
+        'is_overdue': lambda assignment: assignment.is_overdue,
+        'submission_status': lambda assignment: assignment.submission_status,
+        'description': lambda assignment: assignment.description,
+    }),
+    'messages': Resource('messages', 'delivered_at', datetime.fromisoformat, [], {
+        'id': lambda message: message.pk,
+        'subject': lambda message: message.subject,
+        'sender': lambda message: _name(message.sender),
+        'type': lambda message: message.message_type,
+        'priority': lambda message: message.priority,
+        'delivered_at': lambda message: message.delivered_at,
+        'read_at': lambda message: message.read_at,
+        'message': lambda message: message.message,
+    }),
+}
+
+STUDENT_RESOURCES = ('grades', 'attendance', 'assignments')
+
+
+def student_queryset(kind, student, params):
+    """
+    The rows of ``kind`` that belong to ``student``, narrowed by ``?term=``
+    (grades), ``?status=``, ``?start_date=`` and ``?end_date=`` (attendance).
+    """
+    if kind == 'grades':
+        queryset = Grade.objects.filter(student=student)
+        if params.get('term'):
+            queryset = queryset.filter(term_id=_int(params['term'], 'term'))
+        return queryset
+    if kind == 'attendance':
+        queryset = Attendance.objects.filter(student=student)
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        if params.get('start_date'):
+            queryset = queryset.filter(date__gte=_date(params['start_date'], 'start_date'))
+        if params.get('end_date'):
+            queryset = queryset.filter(date__lte=_date(params['end_date'], 'end_date'))
+        return queryset
+    # Only the submission's status is needed, so a subquery instead of with_submission_status's prefetch
+    status = AssignmentSubmission.objects.filter(assignment=OuterRef('pk'), student=student).values('status')[:1]
+    return Assignment.objects.filter(class_obj_id=student.current_class_id, status='published').annotate(
+        submission_status=Coalesce(Subquery(status), Value('not_submitted')),
+    )
+
+
+def messages_queryset(user, params):
+    queryset = inbox(user)
+    if params.get('unread'):
+        queryset = queryset.filter(read_at__isnull=True)
+    return queryset
+
+
+def _int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ApiError(f'{name} must be a whole number.')
+
+
+def _date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ApiError(f'{name} must be in YYYY-MM-DD format.')
+
+
+def page_params(params):
+    """(cursor, limit, fields) from the query string"""
+    limit = _int(params.get('limit', PAGE_SIZE), 'limit')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ApiError(f'limit must be between 1 and {MAX_PAGE_SIZE}.')
+    return params.get('cursor'), limit, params.get('fields')
+
+
+def conditional_json(request, data):
+    """JSON response with an ETag of its body; 304 when the client already has it"""
+    body = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+    etag = quote_etag(hashlib.md5(body.encode()).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    # Per-user data: browsers may keep it but must revalidate every time
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,82 @@
+"""
+Bulk attendance capture.
+
+A teacher submits the whole class roster for a day at once. Every row is
+validated against the class roster first; if all rows are valid they are
+written with a single INSERT ... ON CONFLICT (student, date) DO UPDATE, so
+re-submitting a corrected roll call updates the day's records in place.
+"""
+from django.db import transaction
+
+from .forms import AttendanceRowForm
+from .models import Attendance
+
+# Columns overwritten when a student's record for the day already exists
+UPSERT_FIELDS = ['status', 'time_in', 'time_out', 'notes', 'marked_by']
+
+
+def mark_class_attendance(class_obj, date, rows, marked_by=None):
+    """
+    Validate and save one day's attendance for ``class_obj``.
+
+    ``rows`` is a list of dicts with ``student`` (id), ``status`` and
+    optionally ``time_in``, ``time_out`` and ``notes``. Returns
+    (saved, results): ``results`` has one entry per row, in order, with the
+    student id, ``result`` ('created' or 'updated'; 'invalid' or 'valid'
+    when the submission is rejected) and any ``errors``. Nothing is written
+    unless every row is valid.
+    """
+    roster = set(class_obj.students.filter(is_active=True).values_list('pk', flat=True))
+    already_marked = set(Attendance.objects.filter(
+        student_id__in=roster, date=date
+    ).values_list('student_id', flat=True))
+
+    results, records, seen = [], [], set()
+    for row in rows:
+        form = AttendanceRowForm(row if isinstance(row, dict) else {})
+        if form.is_valid():
+            student_id = form.cleaned_data['student']
+            if student_id not in roster:
+                form.add_error('student', f'Student {student_id} is not in {class_obj.display_name}.')
+            elif student_id in seen:
+                form.add_error('student', f'Student {student_id} appears more than once.')
+            seen.add(student_id)
+
+        if not form.is_valid():
+            results.append({
+                'student': row.get('student') if isinstance(row, dict) else None,
+                'result': 'invalid',
+                'errors': {field: list(errors) for field, errors in form.errors.items()},
+            })
+            continue
+
+        data = form.cleaned_data
+        records.append(Attendance(
+            student_id=data['student'],
+            date=date,
+            status=data['status'],
+            time_in=data['time_in'],
+            time_out=data['time_out'],
+            notes=data['notes'],
+            marked_by=marked_by,
+        ))
+        results.append({
+            'student': data['student'],
+            'result': 'updated' if data['student'] in already_marked else 'created',
+        })
+
+    if len(records) != len(results):
+        # Nothing is saved, so valid rows were neither created nor updated
+        for result in results:
+            if result['result'] != 'invalid':
+                result['result'] = 'valid'
+        return False, results
+
+    with transaction.atomic():
+        Attendance.objects.bulk_create(
+            records,
+            update_conflicts=True,
+            unique_fields=['student', 'date'],
+            update_fields=UPSERT_FIELDS,
+        )
+    return True, results
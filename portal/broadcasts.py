@@ -0,0 +1,101 @@
+"""
+Broadcast delivery.
+
+A broadcast is a Communication with ``is_broadcast`` set and an audience
+(everyone, all parents, the students of a class, ...) instead of a
+recipient list. Sending one writes only the message itself; its
+MessageDelivery rows are created afterwards, in two ways:
+
+* fan_out() walks the audience in user id order and bulk-inserts one batch
+  of deliveries at a time, recording its progress on the message so an
+  interrupted run resumes where it stopped. Saving a broadcast queues it as
+  a background job once the transaction commits, one job however often it
+  is edited before the job runs (portal.tasks); `manage.py
+  deliver_broadcasts` runs it for every broadcast still pending.
+* deliver_pending_broadcasts() gives a single user their copies of pending
+  broadcasts the moment they look at their inbox, so nobody waits for the
+  fan-out to reach them.
+
+Either path may deliver a message first; the unique (message, user)
+constraint makes the other a no-op. Every new broadcast bumps a version
+number in the cache which portal.inbox mixes into its cached unread counts,
+so those are recomputed without dropping one key per user.
+"""
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Communication, MessageDelivery, Parent, Student
+
+BROADCAST_VERSION_KEY = 'portal:broadcast_version'
+
+
+def bump_broadcast_version():
+    cache = caches['default']
+    cache.add(BROADCAST_VERSION_KEY, 0, None)
+    try:
+        cache.incr(BROADCAST_VERSION_KEY)
+    except ValueError:
+        # Evicted between add() and incr(); any new value invalidates the counts
+        cache.set(BROADCAST_VERSION_KEY, 1, None)
+
+
+def audience_users(message):
+    """Active users in ``message``'s audience (an empty queryset if it has none)"""
+    users = User.objects.filter(is_active=True)
+    audience = message.audience
+    if audience == 'everyone':
+        return users
+    if audience in ('students', 'parents', 'teachers'):
+        return users.filter(userprofile__user_type=audience[:-1])
+    if audience in Communication.CLASS_AUDIENCES and message.audience_class_id:
+        students = Student.objects.filter(current_class=message.audience_class_id, is_active=True)
+        if audience == 'class_students':
+            return users.filter(pk__in=students.values('profile__user'))
+        # Parents are linked through Parent.children and Student.parent_guardian
+        parents = Parent.objects.filter(Q(children__in=students) | Q(student__in=students))
+        return users.filter(pk__in=parents.values('profile__user'))
+    return users.none()
+
+
+def pending_broadcasts():
+    return Communication.objects.filter(is_broadcast=True, fanned_out_at__isnull=True)
+
+
+def fan_out(message, batch_size=1000, max_batches=None):
+    """
+    Deliver ``message`` to its audience, ``batch_size`` users per INSERT.
+
+    Stops after ``max_batches`` batches when given (call again to continue).
+    Returns the number of users handled by this call.
+    """
+    audience = audience_users(message).order_by('pk').values_list('pk', flat=True)
+    handled = batches = 0
+    while max_batches is None or batches < max_batches:
+        user_ids = list(audience.filter(pk__gt=message.fanout_cursor)[:batch_size])
+        if not user_ids:
+            message.fanned_out_at = timezone.now()
+            Communication.objects.filter(pk=message.pk).update(fanned_out_at=message.fanned_out_at)
+            break
+        MessageDelivery.objects.bulk_create(
+            [MessageDelivery(message=message, user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+        message.fanout_cursor = user_ids[-1]
+        Communication.objects.filter(pk=message.pk).update(fanout_cursor=message.fanout_cursor)
+        handled += len(user_ids)
+        batches += 1
+    return handled
+
+
+def deliver_pending_broadcasts(user):
+    """Create ``user``'s deliveries of broadcasts the fan-out has not reached yet; returns how many"""
+    missing = []
+    for message in pending_broadcasts().filter(fanout_cursor__lt=user.pk).exclude(
+        deliveries__user=user
+    ).only('pk', 'audience', 'audience_class_id'):
+        if audience_users(message).filter(pk=user.pk).exists():
+            missing.append(MessageDelivery(message=message, user=user))
+    MessageDelivery.objects.bulk_create(missing, ignore_conflicts=True)
+    return len(missing)
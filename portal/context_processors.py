@@ -0,0 +1,19 @@
+from django.utils.functional import SimpleLazyObject
+
+from .academic_calendar import get_current_academic_year, get_current_term
+from .inbox import unread_count
+
+
+def academic_calendar(request):
+    """Expose the current term/year to templates, loaded only if a template uses them"""
+    return {
+        'current_term': SimpleLazyObject(lambda: get_current_term(request)),
+        'current_academic_year': SimpleLazyObject(lambda: get_current_academic_year(request)),
+    }
+
+
+def inbox(request):
+    """Expose the user's unread message count (cached, see portal.inbox) for the navbar badge"""
+    if not request.user.is_authenticated:
+        return {}
+    return {'unread_messages': SimpleLazyObject(lambda: unread_count(request.user))}
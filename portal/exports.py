@@ -0,0 +1,157 @@
+"""
+Streaming CSV exports of portal data.
+
+Rows are read with ``iterator(chunk_size=...)`` and written to the response
+one at a time through StreamingHttpResponse, so memory use stays flat no
+matter how many rows are exported. Each export declares the relations it
+reads so they are fetched with select_related in the same query instead
+of once per row.
+
+Files start with a UTF-8 byte order mark so Excel opens them with the right
+encoding, and text cells that a spreadsheet would read as a formula are
+prefixed with an apostrophe.
+"""
+import csv
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import AssignmentSubmission, Attendance, Grade, Student
+
+CHUNK_SIZE = 2000
+
+# Spreadsheets treat text starting with these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """File-like object whose write() returns the value, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+class Export:
+    def __init__(self, name, model, class_field, select_related, columns):
+        self.name = name
+        self.model = model
+        self.class_field = class_field  # lookup used to filter the export by class
+        self.select_related = select_related
+        self.columns = columns
+
+    def rows(self, queryset):
+        yield [header for header, _value in self.columns]
+        for obj in queryset.select_related(*self.select_related).iterator(chunk_size=CHUNK_SIZE):
+            yield [_safe_cell(value(obj)) for _header, value in self.columns]
+
+
+def _safe_cell(value):
+    """Quote text a spreadsheet would run as a formula (names, comments and titles are user input)"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def _name(user):
+    return user.get_full_name() if user else ''
+
+
+def _teacher(teacher):
+    return _name(teacher.profile.user) if teacher else ''
+
+
+def _datetime(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M') if value else ''
+
+
+EXPORTS = {
+    'grades': Export(
+        'grades', Grade, 'student__current_class',
+        ['student__profile__user', 'student__current_class', 'subject', 'term__academic_year',
+         'teacher__profile__user'],
+        [
+            ('Admission number', lambda grade: grade.student.admission_number),
+            ('Student', lambda grade: _name(grade.student.profile.user)),
+            ('Class', lambda grade: grade.student.current_class.display_name if grade.student.current_class else ''),
+            ('Subject code', lambda grade: grade.subject.code),
+            ('Subject', lambda grade: grade.subject.name),
+            ('Term', lambda grade: str(grade.term)),
+            ('Type', lambda grade: grade.get_grade_type_display()),
+            ('Title', lambda grade: grade.title),
+            ('Marks', lambda grade: grade.marks_obtained),
+            ('Max marks', lambda grade: grade.max_marks),
+            ('Percentage', lambda grade: grade.percentage_score),
+            ('Grade', lambda grade: grade.letter_grade),
+            ('Weight', lambda grade: grade.weight),
+            ('Teacher', lambda grade: _teacher(grade.teacher)),
+            ('Date recorded', lambda grade: grade.date_recorded),
+            ('Comments', lambda grade: grade.comments),
+        ],
+    ),
+    'attendance': Export(
+        'attendance', Attendance, 'student__current_class',
+        ['student__profile__user', 'student__current_class', 'marked_by__profile__user'],
+        [
+            ('Date', lambda record: record.date),
+            ('Admission number', lambda record: record.student.admission_number),
+            ('Student', lambda record: _name(record.student.profile.user)),
+            ('Class', lambda record: record.student.current_class.display_name if record.student.current_class else ''),
+            ('Status', lambda record: record.get_status_display()),
+            ('Time in', lambda record: record.time_in or ''),
+            ('Time out', lambda record: record.time_out or ''),
+            ('Marked by', lambda record: _teacher(record.marked_by)),
+            ('Notes', lambda record: record.notes),
+        ],
+    ),
+    'students': Export(
+        'students', Student, 'current_class',
+        ['profile__user', 'current_class', 'parent_guardian__profile__user'],
+        [
+            ('Admission number', lambda student: student.admission_number),
+            ('First name', lambda student: student.profile.user.first_name),
+            ('Last name', lambda student: student.profile.user.last_name),
+            ('Class', lambda student: student.current_class.display_name if student.current_class else ''),
+            ('Gender', lambda student: student.get_gender_display()),
+            ('Date of birth', lambda student: student.profile.date_of_birth or ''),
+            ('Admission date', lambda student: student.admission_date),
+            ('Email', lambda student: student.profile.user.email),
+            ('Phone', lambda student: student.profile.phone),
+            ('Parent/guardian', lambda student: student.parent_guardian.full_name if student.parent_guardian else ''),
+            ('Parent phone', lambda student: student.parent_guardian.profile.phone if student.parent_guardian else ''),
+            ('Active', lambda student: 'Yes' if student.is_active else 'No'),
+        ],
+    ),
+    'submissions': Export(
+        'submissions', AssignmentSubmission, 'assignment__class_obj',
+        ['assignment__subject', 'assignment__class_obj', 'student__profile__user'],
+        [
+            ('Assignment', lambda submission: submission.assignment.title),
+            ('Subject', lambda submission: submission.assignment.subject.name),
+            ('Class', lambda submission: submission.assignment.class_obj.display_name),
+            ('Due date', lambda submission: _datetime(submission.assignment.due_date)),
+            ('Admission number', lambda submission: submission.student.admission_number),
+            ('Student', lambda submission: _name(submission.student.profile.user)),
+            ('Status', lambda submission: submission.get_status_display()),
+            ('Submitted at', lambda submission: _datetime(submission.submitted_at)),
+            ('Late', lambda submission: 'Yes' if submission.is_late else 'No'),
+            ('Marks', lambda submission: submission.marks_obtained if submission.marks_obtained is not None else ''),
+            ('Max marks', lambda submission: submission.assignment.max_marks),
+            ('Feedback', lambda submission: submission.teacher_feedback),
+        ],
+    ),
+}
+
+
+def stream_csv(export, queryset, filename=None):
+    """Return a StreamingHttpResponse writing ``queryset`` as CSV, row by row"""
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield '\ufeff'
+        for row in export.rows(queryset):
+            yield writer.writerow(row)
+
+    filename = filename or f'{export.name}-{timezone.localdate():%Y%m%d}.csv'
+    response = StreamingHttpResponse(lines(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -183,6 +183,59 @@ class GradeForm(forms.ModelForm):
                 is_active=True
             )
 
+class GradeImportForm(forms.Form):
+    """Upload a class mark sheet (CSV or XLSX) for one assessment"""
+    sheet = forms.FileField(
+        help_text='Columns: admission_number, marks and optionally comments',
+        widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'})
+    )
+    class_obj = forms.ModelChoiceField(
+        queryset=Class.objects.all(),
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Class'
+    )
+    subject = forms.ModelChoiceField(
+        queryset=Subject.objects.all(),
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    term = forms.ModelChoiceField(
+        queryset=Term.objects.all(),
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    grade_type = forms.ChoiceField(
+        choices=Grade.GRADE_TYPES,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    title = forms.CharField(
+        max_length=200,
+        widget=forms.TextInput(attrs={'class': 'form-control'})
+    )
+    max_marks = forms.DecimalField(
+        max_digits=5, decimal_places=2, min_value=1, initial=100,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'})
+    )
+    weight = forms.DecimalField(
+        max_digits=3, decimal_places=2, min_value=0, initial=1,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'})
+    )
+    
+    def __init__(self, *args, **kwargs):
+        teacher = kwargs.pop('teacher', None)
+        super().__init__(*args, **kwargs)
+        
+        if teacher:
+            self.fields['subject'].queryset = teacher.subjects.all()
+            self.fields['class_obj'].queryset = Class.objects.filter(
+                models.Q(class_teacher=teacher) |
+                models.Q(class_subjects__teacher=teacher)
+            ).distinct()
+    
+    def clean_sheet(self):
+        sheet = self.cleaned_data['sheet']
+        if not sheet.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Upload a .csv or .xlsx file.')
+        return sheet
+
 class AttendanceForm(forms.ModelForm):
     """Form for marking attendance"""
     class Meta:
@@ -218,6 +271,22 @@ class BulkAttendanceForm(forms.Form):
                 models.Q(class_subjects__teacher=teacher)
             ).distinct()
 
+class AttendanceRowForm(forms.Form):
+    """One student's entry in a bulk attendance submission"""
+    student = forms.IntegerField()
+    status = forms.ChoiceField(choices=Attendance.STATUS_CHOICES)
+    time_in = forms.TimeField(required=False)
+    time_out = forms.TimeField(required=False)
+    notes = forms.CharField(required=False)
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        time_in = cleaned_data.get('time_in')
+        time_out = cleaned_data.get('time_out')
+        if time_in and time_out and time_out < time_in:
+            raise forms.ValidationError('Time out cannot be before time in.')
+        return cleaned_data
+
 class MessageForm(forms.ModelForm):
     """Form for composing messages"""
     recipients = forms.ModelMultipleChoiceField(
@@ -0,0 +1,196 @@
+"""
+Import a class mark sheet (CSV or XLSX) as Grade rows.
+
+The sheet is read one row at a time, never loaded whole, and every row is
+checked against lookups fetched once up front: the class roster keyed by
+admission number and the grades already recorded for this assessment. Valid
+rows are written in batches, with bulk_create for new grades and bulk_update
+for students who already have one, so re-uploading a corrected sheet fixes
+the marks in place. Invalid rows are collected with their row number and
+reason and do not stop the import.
+
+Reading .xlsx files needs openpyxl.
+"""
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .models import Grade
+from .summaries import refresh_term_summaries
+
+# Header spellings accepted for each column
+COLUMN_ALIASES = {
+    'admission_number': {'admission_number', 'admission_no', 'adm_no', 'adm', 'admission'},
+    'marks': {'marks', 'marks_obtained', 'mark', 'score'},
+    'comments': {'comments', 'comment', 'remarks'},
+}
+REQUIRED_COLUMNS = ['admission_number', 'marks']
+
+# Columns overwritten when a student already has a grade for the assessment
+UPDATE_FIELDS = ['teacher', 'grade_type', 'marks_obtained', 'max_marks', 'weight', 'comments']
+
+
+class SheetError(Exception):
+    """The sheet as a whole cannot be read (bad format, missing columns)"""
+
+
+def _normalise_header(header):
+    columns = []
+    for cell in header:
+        name = str(cell or '').strip().lower().replace(' ', '_').replace('.', '')
+        columns.append(next(
+            (column for column, aliases in COLUMN_ALIASES.items() if name in aliases), None
+        ))
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise SheetError(f"Missing column(s): {', '.join(missing)}")
+    return columns
+
+
+def _csv_rows(file):
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.reader(text)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise SheetError(f'Could not read CSV: {exc}')
+    finally:
+        text.detach()
+
+
+def _xlsx_rows(file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise SheetError('Reading .xlsx files needs openpyxl; upload a CSV instead')
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception as exc:
+        raise SheetError(f'Could not read XLSX: {exc}')
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_sheet(file, filename=None):
+    """Yield (row_number, {column: value}) for each non-blank data row"""
+    filename = (filename or getattr(file, 'name', '')).lower()
+    rows = _xlsx_rows(file) if filename.endswith('.xlsx') else _csv_rows(file)
+
+    columns = None
+    for row_number, row in enumerate(rows, start=1):
+        if columns is None:
+            columns = _normalise_header(row)
+            continue
+        values = {
+            column: value for column, value in zip(columns, row)
+            if column and value not in (None, '')
+        }
+        if values:
+            yield row_number, values
+    if columns is None:
+        raise SheetError('The sheet is empty')
+
+
+def _cell_text(value):
+    """Spreadsheets hand back numeric admission numbers as floats (1234.0)"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value if value is not None else '').strip()
+
+
+def _parse_marks(value, max_marks):
+    try:
+        marks = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"Marks '{value}' is not a number")
+    if not marks.is_finite() or marks < 0:
+        raise ValueError(f"Marks '{value}' is not a valid mark")
+    if marks > max_marks:
+        raise ValueError(f'Marks {marks} exceed the maximum of {max_marks}')
+    return marks.quantize(Decimal('0.01'))
+
+
+def import_grades(rows, *, class_obj, subject, term, teacher, grade_type, title,
+                  max_marks=Decimal('100'), weight=Decimal('1.0'), batch_size=500):
+    """
+    Record one Grade per valid row of ``rows`` (as yielded by read_sheet).
+
+    A student who already has a grade with this subject, term and title has
+    it updated rather than being graded twice. Returns {'created': count,
+    'updated': count, 'errors': [{'row', 'admission_number', 'error'}, ...]}.
+    """
+    roster = {
+        admission_number.strip().upper(): student_id
+        for student_id, admission_number in class_obj.students.filter(
+            is_active=True
+        ).values_list('pk', 'admission_number')
+    }
+    graded = dict(Grade.objects.filter(
+        student_id__in=roster.values(), subject=subject, term=term, title=title
+    ).values_list('student_id', 'pk'))
+
+    created, updated, errors, new, changed, seen = 0, 0, [], [], [], set()
+
+    def flush():
+        nonlocal created, updated, new, changed
+        if new:
+            Grade.objects.bulk_create(new)
+            created += len(new)
+        if changed:
+            Grade.objects.bulk_update(changed, UPDATE_FIELDS)
+            updated += len(changed)
+        new, changed = [], []
+
+    def error(row_number, admission_number, message):
+        errors.append({'row': row_number, 'admission_number': admission_number, 'error': message})
+
+    with transaction.atomic():
+        for row_number, values in rows:
+            admission_number = _cell_text(values.get('admission_number'))
+            student_id = roster.get(admission_number.upper())
+            if not admission_number:
+                error(row_number, '', 'Missing admission number')
+                continue
+            if student_id is None:
+                error(row_number, admission_number, f'No active student in {class_obj.display_name}')
+                continue
+            if student_id in seen:
+                error(row_number, admission_number, 'Appears more than once in the sheet')
+                continue
+            if 'marks' not in values:
+                error(row_number, admission_number, 'Missing marks')
+                continue
+            try:
+                marks = _parse_marks(values['marks'], max_marks)
+            except ValueError as exc:
+                error(row_number, admission_number, str(exc))
+                continue
+            # Only accepted rows count, so a corrected row can follow a rejected one
+            seen.add(student_id)
+
+            grade = Grade(
+                pk=graded.get(student_id),
+                student_id=student_id,
+                subject=subject,
+                term=term,
+                teacher=teacher,
+                grade_type=grade_type,
+                title=title,
+                marks_obtained=marks,
+                max_marks=max_marks,
+                weight=weight,
+                comments=_cell_text(values.get('comments')),
+            )
+            (changed if grade.pk else new).append(grade)
+            if len(new) + len(changed) >= batch_size:
+                flush()
+        flush()
+
+        # bulk_create/bulk_update skip the Grade signals that keep summaries current
+        if created or updated:
+            refresh_term_summaries(term.pk, seen)
+
+    return {'created': created, 'updated': updated, 'errors': errors}
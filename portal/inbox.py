@@ -0,0 +1,85 @@
+"""
+Message delivery and read state.
+
+Every recipient of a Communication has a MessageDelivery row recording when
+the message reached them and when (if ever) they read it. Inbox listings and
+unread counts are single indexed queries against that table, and each user's
+unread count is also kept in the 'default' cache so the badge shown on every
+portal page usually costs no query at all.
+
+The cached count is dropped whenever a delivery for the user is created,
+read or deleted: the helpers here do it for their bulk writes, and
+portal.signals does it for everything else (admin edits, recipients.add()).
+Broadcasts are delivered lazily (see portal.broadcasts), so a cached count
+is also discarded once a broadcast newer than it has been sent.
+"""
+from django.core.cache import caches
+from django.db.models import F, FilteredRelation, Q
+from django.utils import timezone
+
+from .broadcasts import BROADCAST_VERSION_KEY, deliver_pending_broadcasts
+from .models import Communication, MessageDelivery
+
+UNREAD_CACHE_KEY = 'portal:unread:{user_id}'
+UNREAD_CACHE_TIMEOUT = 60 * 60
+
+
+def _cache_key(user_id):
+    return UNREAD_CACHE_KEY.format(user_id=user_id)
+
+
+def invalidate_unread_counts(user_ids):
+    """Drop the cached unread count of each user in ``user_ids``"""
+    keys = [_cache_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        caches['default'].delete_many(keys)
+
+
+def unread_count(user):
+    """Number of messages delivered to ``user`` and not yet read"""
+    cache = caches['default']
+    key = _cache_key(user.pk)
+    cached = cache.get_many([key, BROADCAST_VERSION_KEY])
+    version = cached.get(BROADCAST_VERSION_KEY, 0)
+    if key in cached and cached[key][0] == version:
+        return cached[key][1]
+
+    # A new broadcast has been sent since the count was cached
+    deliver_pending_broadcasts(user)
+    count = MessageDelivery.objects.filter(user=user, read_at__isnull=True).count()
+    cache.set(key, (version, count), UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def deliver(message, users, batch_size=1000):
+    """Deliver ``message`` to ``users`` (users or ids); users who already have it are skipped"""
+    user_ids = {getattr(user, 'pk', user) for user in users}
+    MessageDelivery.objects.bulk_create(
+        [MessageDelivery(message=message, user_id=user_id) for user_id in user_ids],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    invalidate_unread_counts(user_ids)
+    return len(user_ids)
+
+
+def mark_read(user, message_ids=None):
+    """Mark ``user``'s copies of ``message_ids`` (every message when None) read; returns how many changed"""
+    deliveries = MessageDelivery.objects.filter(user=user, read_at__isnull=True)
+    if message_ids is not None:
+        deliveries = deliveries.filter(message_id__in=message_ids)
+    updated = deliveries.update(read_at=timezone.now())
+    if updated:
+        invalidate_unread_counts([user.pk])
+    return updated
+
+
+def inbox(user):
+    """``user``'s messages, newest delivery first, each annotated with ``read_at``"""
+    deliver_pending_broadcasts(user)
+    return Communication.objects.annotate(
+        delivery=FilteredRelation('deliveries', condition=Q(deliveries__user=user)),
+    ).filter(delivery__isnull=False).annotate(
+        read_at=F('delivery__read_at'),
+        delivered_at=F('delivery__delivered_at'),
+    ).select_related('sender').order_by('-delivered_at')
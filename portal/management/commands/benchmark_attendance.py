@@ -0,0 +1,120 @@
+"""
+Management command timing a full-school morning roll call
+
+Seeds synthetic classes and students inside a transaction that is rolled
+back at the end, then marks every class for one day twice: once saving each
+Attendance row individually (what the admin does today) and once through
+the bulk capture used by the attendance API. Run against a development
+database:
+
+    python manage.py benchmark_attendance --classes 12 --students 100
+"""
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from portal.attendance import mark_class_attendance
+from portal.models import AcademicYear, Attendance, Class, Student, UserProfile
+
+STATUSES = ['present'] * 17 + ['absent', 'late', 'excused']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks per-row attendance saves against bulk roll-call capture'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--classes', type=int, default=12)
+        parser.add_argument('--students', type=int, default=100, help='Students per class')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['classes'], options['students'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write('Synthetic classes and students rolled back')
+
+    def run(self, class_count, students_per_class):
+        rng = random.Random(7)
+        classes = self.seed(class_count, students_per_class)
+        total = class_count * students_per_class
+        self.stdout.write(f'Roll call for {class_count} classes, {total} students')
+
+        day = timezone.now().date()
+        rosters = {
+            class_obj: list(class_obj.students.values_list('pk', flat=True))
+            for class_obj in classes
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for roster in rosters.values():
+                for student_id in roster:
+                    Attendance.objects.update_or_create(
+                        student_id=student_id, date=day, defaults={'status': rng.choice(STATUSES)}
+                    )
+            per_row = time.perf_counter() - started
+        self.report('per-row update_or_create', per_row, len(queries), total)
+
+        # A second day so both runs insert rather than update
+        day = day - timezone.timedelta(days=1)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for class_obj, roster in rosters.items():
+                rows = [{'student': student_id, 'status': rng.choice(STATUSES)} for student_id in roster]
+                saved, _results = mark_class_attendance(class_obj, day, rows)
+                assert saved
+            bulk = time.perf_counter() - started
+        self.report('bulk capture (insert)', bulk, len(queries), total)
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for class_obj, roster in rosters.items():
+                rows = [{'student': student_id, 'status': rng.choice(STATUSES)} for student_id in roster]
+                mark_class_attendance(class_obj, day, rows)
+            resubmit = time.perf_counter() - started
+        self.report('bulk capture (resubmit)', resubmit, len(queries), total)
+
+    def report(self, label, seconds, queries, rows):
+        self.stdout.write(
+            f'{label:<28}{seconds * 1000:>10.0f} ms{queries:>8} queries'
+            f'{rows / seconds:>10.0f} rows/s'
+        )
+
+    def seed(self, class_count, students_per_class):
+        today = timezone.now().date()
+        year = AcademicYear.objects.create(
+            name=f'Benchmark {time.time()}', start_date=today, end_date=today
+        )
+        # Class names are unique, so only levels without a class yet can be used
+        taken = set(Class.objects.values_list('name', flat=True))
+        levels = [name for name, _label in Class.CLASS_LEVELS if name not in taken]
+        if class_count > len(levels):
+            raise CommandError(f'Only {len(levels)} class levels are free; use --classes {len(levels)} or fewer')
+        classes = Class.objects.bulk_create([
+            Class(name=levels[i], display_name=f'Benchmark {i}', level=i, academic_year=year)
+            for i in range(class_count)
+        ])
+
+        total = class_count * students_per_class
+        users = User.objects.bulk_create([User(username=f'benchmark-roll-{i}') for i in range(total)])
+        profiles = UserProfile.objects.bulk_create([
+            UserProfile(user=user, user_type='student') for user in users
+        ])
+        Student.objects.bulk_create([
+            Student(
+                profile=profile, admission_number=f'BENCH{i}', gender='F', admission_date=today,
+                current_class=classes[i // students_per_class],
+            )
+            for i, profile in enumerate(profiles)
+        ])
+        return classes
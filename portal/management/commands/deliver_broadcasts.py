@@ -0,0 +1,19 @@
+"""
+Management command to fan pending broadcasts out to their audiences
+"""
+from django.core.management.base import BaseCommand
+
+from portal.broadcasts import fan_out, pending_broadcasts
+
+
+class Command(BaseCommand):
+    help = 'Creates the inbox deliveries of every broadcast not yet delivered to its whole audience'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Deliveries inserted per query')
+
+    def handle(self, *args, **options):
+        for message in pending_broadcasts().order_by('created_at'):
+            delivered = fan_out(message, batch_size=options['batch_size'])
+            self.stdout.write(f'{message.subject}: delivered to {delivered} user(s)')
+        self.stdout.write(self.style.SUCCESS('All broadcasts delivered'))
@@ -0,0 +1,39 @@
+"""
+Management command to generate term progress reports in bulk
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from portal.academic_calendar import get_current_term
+from portal.models import Class, Term
+from portal.reports import generate_progress_reports
+
+
+class Command(BaseCommand):
+    help = 'Computes weighted averages and class positions and writes every progress report for a term'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', type=int, help='Term id (defaults to the current term)')
+        parser.add_argument('--class', dest='classes', nargs='+', metavar='NAME',
+                            help='Only these classes, by name (e.g. Grade10 Grade11)')
+
+    def handle(self, *args, **options):
+        if options['term']:
+            try:
+                term = Term.objects.select_related('academic_year').get(pk=options['term'])
+            except Term.DoesNotExist:
+                raise CommandError(f"Term {options['term']} does not exist")
+        else:
+            term = get_current_term()
+            if term is None:
+                raise CommandError('No current term is set; pass --term')
+
+        classes = None
+        if options['classes']:
+            classes = list(Class.objects.filter(name__in=options['classes']).values_list('pk', flat=True))
+            if len(classes) != len(set(options['classes'])):
+                raise CommandError(f"Unknown class in: {', '.join(options['classes'])}")
+
+        created, updated, skipped = generate_progress_reports(term, classes)
+        for class_obj in skipped:
+            self.stdout.write(self.style.WARNING(f'Skipped {class_obj.display_name}: no class teacher assigned'))
+        self.stdout.write(self.style.SUCCESS(f'{term}: {created} reports created, {updated} updated'))
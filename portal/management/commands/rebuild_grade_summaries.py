@@ -0,0 +1,18 @@
+"""
+Management command to rebuild the precomputed per-student term grade summaries
+"""
+from django.core.management.base import BaseCommand
+
+from portal.summaries import rebuild_all_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recomputes StudentTermSummary rows from Grade'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', type=int, action='append', dest='terms',
+                            help='Only this term id (repeatable); defaults to all terms')
+
+    def handle(self, *args, **options):
+        count = rebuild_all_summaries(options['terms'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} term summaries'))
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentTermSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade_count', models.PositiveIntegerField(default=0)),
+                ('total_weight', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('average', models.DecimalField(decimal_places=2, help_text='Weighted average percentage score', max_digits=5)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_summaries', to='portal.student')),
+                ('subject', models.ForeignKey(blank=True, help_text='Empty for the overall summary', null=True, on_delete=django.db.models.deletion.CASCADE, to='portal.subject')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='portal.term')),
+            ],
+            options={
+                'verbose_name': 'Student Term Summary',
+                'verbose_name_plural': 'Student Term Summaries',
+                'ordering': ['student', 'term', 'subject__name'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='studenttermsummary',
+            constraint=models.UniqueConstraint(fields=('student', 'term', 'subject'), name='unique_student_term_subject_summary'),
+        ),
+        migrations.AddConstraint(
+            model_name='studenttermsummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('subject__isnull', True)), fields=('student', 'term'), name='unique_student_term_overall_summary'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:33
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def copy_recipients(apps, schema_editor):
+    """One delivery per old recipients row, read if the user was also in read_by"""
+    Communication = apps.get_model('portal', 'Communication')
+    MessageDelivery = apps.get_model('portal', 'MessageDelivery')
+    Recipients = Communication.recipients.through
+    ReadBy = Communication.read_by.through
+
+    read = set(ReadBy.objects.values_list('communication_id', 'user_id'))
+    sent_at = dict(Communication.objects.values_list('pk', 'created_at'))
+    batch = []
+    for message_id, user_id in Recipients.objects.values_list('communication_id', 'user_id').iterator():
+        # When a message was read was never recorded; its send time is the closest we have
+        read_at = sent_at[message_id] if (message_id, user_id) in read else None
+        batch.append(MessageDelivery(message_id=message_id, user_id=user_id, read_at=read_at))
+        if len(batch) >= 1000:
+            MessageDelivery.objects.bulk_create(batch)
+            batch = []
+    MessageDelivery.objects.bulk_create(batch)
+
+    # delivered_at is auto_now_add, so bulk_create stamped every row with now;
+    # backdate each message's deliveries to when it was sent
+    MessageDelivery.objects.update(delivered_at=Subquery(
+        Communication.objects.filter(pk=OuterRef('message_id')).values('created_at')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('portal', '0002_student_term_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delivered_at', models.DateTimeField(auto_now_add=True)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('message', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='portal.communication')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='message_deliveries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Message deliveries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='messagedelivery',
+            index=models.Index(fields=['user', '-delivered_at'], name='portal_delivery_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='messagedelivery',
+            index=models.Index(condition=models.Q(('read_at__isnull', True)), fields=['user'], name='portal_delivery_unread_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='messagedelivery',
+            constraint=models.UniqueConstraint(fields=('message', 'user'), name='unique_message_delivery'),
+        ),
+        migrations.RunPython(copy_recipients, migrations.RunPython.noop),
+        # An M2M field cannot be altered to use a through model, so the old
+        # recipients/read_by tables are dropped and recipients re-added on top of
+        # the delivery table.
+        migrations.RemoveField(
+            model_name='communication',
+            name='read_by',
+        ),
+        migrations.RemoveField(
+            model_name='communication',
+            name='recipients',
+        ),
+        migrations.AddField(
+            model_name='communication',
+            name='recipients',
+            field=models.ManyToManyField(related_name='received_messages', through='portal.MessageDelivery', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0003_message_delivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communication',
+            name='audience',
+            field=models.CharField(blank=True, choices=[('everyone', 'Everyone'), ('students', 'All Students'), ('parents', 'All Parents'), ('teachers', 'All Teachers'), ('class_students', 'Students of a Class'), ('class_parents', 'Parents of a Class')], help_text='Who a broadcast is delivered to', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='communication',
+            name='audience_class',
+            field=models.ForeignKey(blank=True, help_text='Class for the class audiences', null=True, on_delete=django.db.models.deletion.SET_NULL, to='portal.class'),
+        ),
+        migrations.AddField(
+            model_name='communication',
+            name='fanned_out_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='communication',
+            name='fanout_cursor',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='communication',
+            index=models.Index(condition=models.Q(('fanned_out_at__isnull', True), ('is_broadcast', True)), fields=['created_at'], name='portal_pending_broadcast_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
@@ -282,6 +283,11 @@ class Assignment(models.Model):
     
     class Meta:
         ordering = ['-due_date']
+        indexes = [
+            # A class's published assignments, latest due first
+            models.Index(fields=['class_obj', 'status', '-due_date'], name='assignment_class_status_idx'),
+            models.Index(fields=['teacher', '-created_at'], name='assignment_teacher_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.class_obj.display_name} ({self.subject.code})"
@@ -318,6 +324,9 @@ class AssignmentSubmission(models.Model):
     class Meta:
         unique_together = ['assignment', 'student']
         ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['student', 'status'], name='submission_student_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.full_name} - {self.assignment.title}"
@@ -360,12 +369,20 @@ class Grade(models.Model):
     
     class Meta:
         ordering = ['-date_recorded']
+        indexes = [
+            # A student's grades for a term, newest first
+            models.Index(fields=['student', 'term', '-date_recorded'], name='grade_student_term_idx'),
+            # A teacher's grades, in the order the teacher grades page lists them
+            models.Index(fields=['teacher', '-date_recorded', '-created_at'], name='grade_teacher_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.full_name} - {self.subject.code} - {self.title}"
     
     @property
     def percentage_score(self):
+        if not self.max_marks:
+            return 0
         return round((self.marks_obtained / self.max_marks) * 100, 1)
     
     @property
@@ -383,6 +400,58 @@ class Grade(models.Model):
         else:
             return 'E'
 
+class StudentTermSummary(models.Model):
+    """
+    Denormalized grade totals per student and term: one row per subject plus
+    an overall row (subject is null). Maintained by portal.summaries.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='term_summaries')
+    term = models.ForeignKey(Term, on_delete=models.CASCADE)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, null=True, blank=True,
+                                help_text="Empty for the overall summary")
+    grade_count = models.PositiveIntegerField(default=0)
+    total_weight = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    average = models.DecimalField(max_digits=5, decimal_places=2,
+                                  help_text="Weighted average percentage score")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['student', 'term', 'subject__name']
+        verbose_name = "Student Term Summary"
+        verbose_name_plural = "Student Term Summaries"
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'term', 'subject'], name='unique_student_term_subject_summary'),
+            models.UniqueConstraint(fields=['student', 'term'], condition=models.Q(subject__isnull=True),
+                                    name='unique_student_term_overall_summary'),
+        ]
+    
+    def __str__(self):
+        return f"{self.student} - {self.term} - {self.subject or 'Overall'}: {self.average}%"
+
+class AttendanceQuerySet(models.QuerySet):
+    """Query helpers for attendance records"""
+    
+    def between(self, start_date, end_date):
+        return self.filter(date__range=[start_date, end_date])
+    
+    def status_aggregates(self):
+        """Conditional COUNT expressions, one per attendance status"""
+        return {
+            status: models.Count('pk', filter=models.Q(status=status))
+            for status, _label in self.model.STATUS_CHOICES
+        }
+    
+    def statistics(self):
+        """Day counts per status and the attendance percentage in one query"""
+        counts = self.aggregate(total=models.Count('pk'), **self.status_aggregates())
+        total_days = counts['total']
+        
+        stats = {'total_days': total_days}
+        for status, _label in self.model.STATUS_CHOICES:
+            stats[f'{status}_days'] = counts[status]
+        stats['attendance_percentage'] = round(counts['present'] / total_days * 100, 2) if total_days else 0
+        return stats
+
 class Attendance(models.Model):
     """Student attendance model"""
     STATUS_CHOICES = [
@@ -401,9 +470,15 @@ class Attendance(models.Model):
     marked_by = models.ForeignKey(Teacher, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = AttendanceQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['student', 'date']
         ordering = ['-date']
+        indexes = [
+            # (student, date) range scans use the unique_together index; this serves by-date listings
+            models.Index(fields=['-date'], name='attendance_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.full_name} - {self.date} ({self.get_status_display()})"
@@ -451,26 +526,79 @@ class Communication(models.Model):
         ('urgent', 'Urgent'),
     ]
     
+    AUDIENCES = [
+        ('everyone', 'Everyone'),
+        ('students', 'All Students'),
+        ('parents', 'All Parents'),
+        ('teachers', 'All Teachers'),
+        ('class_students', 'Students of a Class'),
+        ('class_parents', 'Parents of a Class'),
+    ]
+    CLASS_AUDIENCES = ('class_students', 'class_parents')
+    
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
-    recipients = models.ManyToManyField(User, related_name='received_messages')
+    recipients = models.ManyToManyField(User, through='MessageDelivery', related_name='received_messages')
     message_type = models.CharField(max_length=20, choices=MESSAGE_TYPES, default='general')
     priority = models.CharField(max_length=10, choices=PRIORITY_LEVELS, default='medium')
     subject = models.CharField(max_length=200)
     message = models.TextField()
     attachment = models.FileField(upload_to='communications/', blank=True, null=True)
     is_broadcast = models.BooleanField(default=False)
-    read_by = models.ManyToManyField(User, blank=True, related_name='read_communications')
+    audience = models.CharField(max_length=20, choices=AUDIENCES, blank=True,
+                                help_text="Who a broadcast is delivered to")
+    audience_class = models.ForeignKey(Class, on_delete=models.SET_NULL, null=True, blank=True,
+                                       help_text="Class for the class audiences")
+    # Broadcast fan-out progress: deliveries exist for every audience member up to this user id
+    fanout_cursor = models.PositiveIntegerField(default=0, editable=False)
+    fanned_out_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], condition=models.Q(is_broadcast=True, fanned_out_at__isnull=True),
+                         name='portal_pending_broadcast_idx'),
+        ]
     
     def __str__(self):
         return f"{self.subject} - {self.sender.get_full_name()}"
     
+    def clean(self):
+        if self.is_broadcast and not self.audience:
+            raise ValidationError({'audience': 'Choose who the broadcast goes to.'})
+        if self.audience in self.CLASS_AUDIENCES and not self.audience_class_id:
+            raise ValidationError({'audience_class': 'Choose the class.'})
+    
     @property
     def unread_count(self):
-        return self.recipients.count() - self.read_by.count()
+        return self.deliveries.filter(read_at__isnull=True).count()
+
+class MessageDelivery(models.Model):
+    """One recipient's copy of a Communication and when they read it"""
+    message = models.ForeignKey(Communication, on_delete=models.CASCADE, related_name='deliveries')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='message_deliveries')
+    delivered_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name_plural = "Message deliveries"
+        constraints = [
+            models.UniqueConstraint(fields=['message', 'user'], name='unique_message_delivery'),
+        ]
+        indexes = [
+            # Inbox listing, newest first
+            models.Index(fields=['user', '-delivered_at'], name='portal_delivery_inbox_idx'),
+            # Unread counts only ever scan the (small) unread part of a user's inbox
+            models.Index(fields=['user'], condition=models.Q(read_at__isnull=True),
+                         name='portal_delivery_unread_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.message.subject} -> {self.user.get_username()}"
+    
+    @property
+    def is_read(self):
+        return self.read_at is not None
 
 class PortalSettings(models.Model):
     """Portal system settings"""
@@ -0,0 +1,96 @@
+"""
+Bulk generation of term progress reports.
+
+All grades for the term are reduced to one weighted average per student and
+ranked within each class by the database in a single query; the reports
+are then written with one bulk_create and one bulk_update, so generating a
+whole school costs the same handful of queries as generating one class.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum, Window
+from django.db.models.functions import Cast, Coalesce, NullIf, Rank, Round
+
+from .models import Class, Grade, ProgressReport, Term
+
+# Fields written on reports that already exist; comments and behaviour grades entered by staff are kept
+COMPUTED_FIELDS = ['overall_average', 'class_position', 'total_students', 'class_teacher', 'next_term_begins']
+
+
+def weighted_averages(term, classes=None):
+    """
+    One row per graded active student: student_id, class_id, average, position, class_size.
+
+    ``average`` is the weight-weighted mean of the student's percentage
+    scores (0 when all their grades have weight 0, as in the term
+    summaries); ``position`` is the student's rank in their class (ties share a
+    position) out of ``class_size`` graded students.
+    """
+    # A grade out of zero has no percentage (and would divide by zero)
+    grades = Grade.objects.filter(
+        term=term, student__is_active=True, student__current_class__isnull=False, max_marks__gt=0
+    )
+    if classes is not None:
+        grades = grades.filter(student__current_class__in=classes)
+
+    score = Cast(F('marks_obtained'), FloatField()) * 100 / Cast(F('max_marks'), FloatField())
+    weight = Cast(F('weight'), FloatField())
+    class_id = F('student__current_class')
+
+    return grades.order_by().values(
+        'student_id', class_id=class_id
+    ).annotate(
+        # NULLIF: PostgreSQL raises division by zero when every weight is 0
+        average=Coalesce(Round(Sum(score * weight) / NullIf(Sum(weight), 0.0), 2), 0.0),
+    ).annotate(
+        position=Window(Rank(), partition_by=[class_id], order_by=F('average').desc()),
+        class_size=Window(Count('student_id'), partition_by=[class_id]),
+    )
+
+
+def generate_progress_reports(term, classes=None):
+    """
+    Create or refresh the ProgressReport of every graded student for ``term``.
+
+    Returns (created, updated, skipped_classes) where skipped_classes are
+    classes without a class teacher, which reports require.
+    """
+    class_filter = {'pk__in': classes} if classes is not None else {}
+    class_teachers, skipped = {}, []
+    for class_obj in Class.objects.filter(**class_filter).only('pk', 'display_name', 'class_teacher_id'):
+        if class_obj.class_teacher_id:
+            class_teachers[class_obj.pk] = class_obj.class_teacher_id
+        else:
+            skipped.append(class_obj)
+    next_term = Term.objects.filter(start_date__gt=term.end_date).order_by('start_date').first()
+
+    rows = [row for row in weighted_averages(term, classes) if row['class_id'] in class_teachers]
+    existing = {
+        report.student_id: report
+        for report in ProgressReport.objects.filter(
+            term=term, student_id__in=[row['student_id'] for row in rows]
+        ).order_by()
+    }
+
+    to_create, to_update = [], []
+    for row in rows:
+        report = existing.get(row['student_id'])
+        if report is None:
+            report = ProgressReport(student_id=row['student_id'], term=term)
+            to_create.append(report)
+        else:
+            to_update.append(report)
+
+        report.overall_average = Decimal(str(row['average']))
+        report.class_position = row['position']
+        report.total_students = row['class_size']
+        report.class_teacher_id = class_teachers[row['class_id']]
+        if next_term and not report.next_term_begins:
+            report.next_term_begins = next_term.start_date
+
+    with transaction.atomic():
+        ProgressReport.objects.bulk_create(to_create, batch_size=500)
+        ProgressReport.objects.bulk_update(to_update, COMPUTED_FIELDS, batch_size=500)
+
+    return len(to_create), len(to_update), skipped
@@ -0,0 +1,121 @@
+"""
+Batched read helpers for the portal views.
+
+Each helper collects data for a whole set of students in a fixed number of
+grouped queries, so views never issue one query per child.
+"""
+from django.db.models import Count, Exists, F, IntegerField, OuterRef, Prefetch, Subquery, Value, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+
+from .models import Assignment, AssignmentSubmission, Attendance, Grade
+
+# Submission states that count as "handed in" for pending-assignment purposes
+SUBMITTED_STATUSES = ['submitted', 'graded', 'returned']
+
+
+def submitted_subquery(student_ref, assignment_ref='pk'):
+    """EXISTS clause: the referenced student has handed in the referenced assignment"""
+    return Exists(AssignmentSubmission.objects.filter(
+        assignment=OuterRef(assignment_ref),
+        student=student_ref,
+        status__in=SUBMITTED_STATUSES,
+    ))
+
+
+def with_pending_assignments(students):
+    """Annotate a Student queryset with ``pending_assignments`` (open, not yet submitted)"""
+    pending = Assignment.objects.filter(
+        class_obj=OuterRef('current_class'),
+        status='published',
+        due_date__gte=timezone.now(),
+    ).filter(
+        ~submitted_subquery(OuterRef(OuterRef('pk')))
+    ).order_by().values('class_obj').annotate(total=Count('pk')).values('total')
+
+    return students.annotate(
+        pending_assignments=Coalesce(Subquery(pending, output_field=IntegerField()), 0)
+    )
+
+
+def with_submission_status(assignments, student):
+    """
+    Attach ``student``'s submission to each assignment in the queryset.
+
+    Adds a ``submission_status`` annotation ('not_submitted' when there is no
+    row) that can be filtered on, and prefetches the submission itself into
+    ``student_submissions``.
+    """
+    status = AssignmentSubmission.objects.filter(
+        assignment=OuterRef('pk'), student=student
+    ).values('status')[:1]
+
+    return assignments.annotate(
+        submission_status=Coalesce(Subquery(status), Value('not_submitted'))
+    ).prefetch_related(Prefetch(
+        'submissions',
+        queryset=AssignmentSubmission.objects.filter(student=student),
+        to_attr='student_submissions',
+    ))
+
+
+def recent_grades_by_student(student_ids, term, limit=3):
+    """Return {student_id: [Grade, ...]} with the ``limit`` latest grades per student"""
+    grades_map = {student_id: [] for student_id in student_ids}
+    if not term or not grades_map:
+        return grades_map
+
+    grades = Grade.objects.filter(
+        student_id__in=grades_map, term=term
+    ).select_related('subject').annotate(
+        row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F('student_id')],
+            order_by=[F('date_recorded').desc(), F('pk').desc()],
+        )
+    ).filter(row_number__lte=limit).order_by('student_id', 'row_number')
+
+    for grade in grades:
+        grades_map[grade.student_id].append(grade)
+    return grades_map
+
+
+def attendance_summary_by_student(student_ids, start_date, end_date):
+    """Return {student_id: {status: count}} for attendance between two dates"""
+    summary_map = {student_id: {} for student_id in student_ids}
+    if not summary_map:
+        return summary_map
+
+    rows = Attendance.objects.filter(
+        student_id__in=summary_map
+    ).between(start_date, end_date).order_by().values('student_id').annotate(
+        **Attendance.objects.status_aggregates()
+    )
+
+    for row in rows:
+        student_id = row.pop('student_id')
+        summary_map[student_id] = {status: count for status, count in row.items() if count}
+    return summary_map
+
+
+def family_summary(students, term, grades_limit=3):
+    """
+    Load ``students`` with their dashboard summary attached.
+
+    Every student gets ``recent_grades``, ``attendance_summary`` and
+    ``pending_assignments``; the whole family costs three queries no matter
+    how many children are in the queryset.
+    """
+    students = list(with_pending_assignments(students))
+    student_ids = [student.pk for student in students]
+
+    grades_map = recent_grades_by_student(student_ids, term, limit=grades_limit)
+    if term:
+        attendance_map = attendance_summary_by_student(student_ids, term.start_date, term.end_date)
+    else:
+        attendance_map = {}
+
+    for student in students:
+        student.recent_grades = grades_map.get(student.pk, [])
+        student.attendance_summary = attendance_map.get(student.pk, {})
+    return students
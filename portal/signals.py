@@ -0,0 +1,133 @@
+"""
+Signal handlers keeping the portal's caches and summaries in step with the database.
+"""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .academic_calendar import invalidate_academic_calendar
+from .access import (
+    invalidate_class_access, invalidate_parent_access, invalidate_student_access, invalidate_teacher_access,
+)
+from .broadcasts import bump_broadcast_version
+from .inbox import invalidate_unread_counts
+from .models import AcademicYear, Class, Communication, Grade, MessageDelivery, Parent, Student, Term
+from .summaries import refresh_term_summaries
+from .tasks import queue_fan_out
+
+
+@receiver([post_save, post_delete], sender=Term)
+@receiver([post_save, post_delete], sender=AcademicYear)
+def clear_academic_calendar_cache(sender, **kwargs):
+    """Term/AcademicYear.save() flips is_current on other rows, so always drop both keys"""
+    invalidate_academic_calendar()
+
+
+@receiver(pre_save, sender=Grade)
+def remember_grade_owner(sender, instance, raw=False, **kwargs):
+    """An edit may move a grade to another student or term; both summaries then change"""
+    instance._previous_owner = None
+    if instance.pk and not raw:
+        instance._previous_owner = Grade.objects.filter(pk=instance.pk).values_list(
+            'student_id', 'term_id'
+        ).first()
+
+
+@receiver([post_save, post_delete], sender=Grade)
+def refresh_grade_summaries(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    owners = {(instance.student_id, instance.term_id)}
+    previous = getattr(instance, '_previous_owner', None)
+    if previous:
+        owners.add(previous)
+    for student_id, term_id in owners:
+        refresh_term_summaries(term_id, [student_id])
+
+
+@receiver(post_save, sender=Communication)
+def announce_broadcast(sender, instance, raw=False, **kwargs):
+    """
+    Cached unread counts predate the broadcast; invalidate them once it is
+    visible to other connections. Edits before the fan-out has run reuse
+    the job already queued.
+    """
+    if instance.is_broadcast and instance.fanned_out_at is None and not raw:
+        transaction.on_commit(bump_broadcast_version)
+        transaction.on_commit(lambda: queue_fan_out(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=MessageDelivery)
+def clear_unread_count(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_unread_counts([instance.user_id])
+
+
+@receiver(m2m_changed, sender=Communication.recipients.through)
+def clear_recipient_unread_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    """recipients.add()/remove()/set() bulk-write deliveries without post_save"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # user.received_messages.add(message, ...): only this user's count changes
+        invalidate_unread_counts([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_unread_counts(instance.deliveries.values_list('user_id', flat=True))
+    else:
+        invalidate_unread_counts(pk_set)
+
+
+@receiver(m2m_changed, sender=Parent.children.through)
+def clear_parent_student_access(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_parent_access([instance.pk])
+    elif action == 'pre_clear':
+        # student.parents.clear(): every parent of this student loses them
+        invalidate_parent_access(instance.parents.values_list('pk', flat=True))
+    else:
+        invalidate_parent_access(pk_set)
+
+
+@receiver(pre_save, sender=Class)
+def remember_class_teacher(sender, instance, raw=False, **kwargs):
+    instance._previous_class_teacher_id = None
+    if instance.pk and not raw:
+        instance._previous_class_teacher_id = Class.objects.filter(pk=instance.pk).values_list(
+            'class_teacher_id', flat=True
+        ).first()
+
+
+@receiver([post_save, post_delete], sender=Class)
+def clear_class_teacher_access(sender, instance, raw=False, **kwargs):
+    """Both the old and the new class teacher's student sets change"""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_class_teacher_id', None)
+    if kwargs.get('created') is False and previous == instance.class_teacher_id:
+        return
+    teacher_ids = {instance.class_teacher_id, previous} - {None}
+    if teacher_ids:
+        invalidate_teacher_access(teacher_ids)
+
+
+@receiver(pre_save, sender=Student)
+def remember_student_class(sender, instance, raw=False, **kwargs):
+    instance._previous_class_id = None
+    if instance.pk and not raw:
+        instance._previous_class_id = Student.objects.filter(pk=instance.pk).values_list(
+            'current_class_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Student)
+def clear_student_access(sender, instance, created, raw=False, **kwargs):
+    """A new student can see themselves; moving class changes two class teachers' sets"""
+    if raw:
+        return
+    if created:
+        invalidate_student_access([instance.profile.user_id])
+    class_ids = {instance.current_class_id, getattr(instance, '_previous_class_id', None)} - {None}
+    if created or len(class_ids) > 1:
+        invalidate_class_access(class_ids)
@@ -0,0 +1,103 @@
+"""
+Maintenance of StudentTermSummary, the precomputed grade averages.
+
+Grade pages read a student's handful of summary rows for a term instead of
+aggregating every Grade. Averages are weighted by Grade.weight and use the
+percentage score (marks_obtained / max_marks), the same formula as
+portal.reports. Grades out of zero marks have no percentage and are left
+out.
+
+Summaries for a (student, term) are recomputed whenever one of its grades
+is saved or deleted (see portal.signals). Code that writes grades in bulk
+(bulk_create, queryset.update) bypasses the signals and calls
+refresh_term_summaries() itself; `manage.py rebuild_grade_summaries`
+recomputes everything.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import Cast
+
+from .models import Grade, StudentTermSummary
+
+TWO_PLACES = Decimal('0.01')
+
+
+def _summary(student_id, term_id, subject_id, count, weighted_score, total_weight):
+    average = weighted_score / total_weight if total_weight else 0
+    return StudentTermSummary(
+        student_id=student_id,
+        term_id=term_id,
+        subject_id=subject_id,
+        grade_count=count,
+        total_weight=Decimal(str(total_weight)).quantize(TWO_PLACES),
+        average=Decimal(str(average)).quantize(TWO_PLACES),
+    )
+
+
+def refresh_term_summaries(term_id, student_ids=None, batch_size=1000):
+    """
+    Recompute the summaries of ``student_ids`` (every student when None) for one term.
+
+    Costs one grouped aggregate over the affected grades plus a delete and
+    a bulk insert, however many students are refreshed.
+    """
+    grades = Grade.objects.filter(term_id=term_id, max_marks__gt=0)
+    summaries = StudentTermSummary.objects.filter(term_id=term_id)
+    if student_ids is not None:
+        grades = grades.filter(student_id__in=student_ids)
+        summaries = summaries.filter(student_id__in=student_ids)
+
+    score = Cast(F('marks_obtained'), FloatField()) * 100 / Cast(F('max_marks'), FloatField())
+    weight = Cast(F('weight'), FloatField())
+    rows = grades.order_by().values('student_id', 'subject_id').annotate(
+        count=Count('pk'),
+        weighted_score=Sum(score * weight),
+        total_weight=Sum(weight),
+    )
+
+    records = []
+    overall = defaultdict(lambda: [0, 0.0, 0.0])
+    for row in rows:
+        records.append(_summary(
+            row['student_id'], term_id, row['subject_id'],
+            row['count'], row['weighted_score'], row['total_weight'],
+        ))
+        totals = overall[row['student_id']]
+        totals[0] += row['count']
+        totals[1] += row['weighted_score']
+        totals[2] += row['total_weight']
+
+    for student_id, (count, weighted_score, total_weight) in overall.items():
+        records.append(_summary(student_id, term_id, None, count, weighted_score, total_weight))
+
+    with transaction.atomic():
+        summaries.delete()
+        StudentTermSummary.objects.bulk_create(records, batch_size=batch_size)
+    return len(records)
+
+
+def rebuild_all_summaries(term_ids=None):
+    """Recompute every summary (optionally only for some terms); returns rows written"""
+    if term_ids is None:
+        term_ids = Grade.objects.order_by().values_list('term_id', flat=True).distinct()
+        # Terms whose grades were all deleted still have stale summaries
+        StudentTermSummary.objects.exclude(term_id__in=term_ids).delete()
+    return sum(refresh_term_summaries(term_id) for term_id in list(term_ids))
+
+
+def term_summaries(student, term):
+    """Return (overall, by_subject) for a student's term; overall is None without grades"""
+    overall, by_subject = None, []
+    if term is None:
+        return overall, by_subject
+    for summary in StudentTermSummary.objects.filter(
+        student=student, term=term
+    ).select_related('subject').order_by('subject__name'):
+        if summary.subject_id is None:
+            overall = summary
+        else:
+            by_subject.append(summary)
+    return overall, by_subject
@@ -0,0 +1,25 @@
+"""
+Background tasks for the portal
+"""
+from jobs.models import Job
+from jobs.queue import task
+
+from .broadcasts import fan_out
+from .models import Communication
+
+
+@task
+def fan_out_broadcast(message_id):
+    """Deliver a broadcast to the rest of its audience"""
+    message = Communication.objects.filter(pk=message_id, is_broadcast=True, fanned_out_at__isnull=True).first()
+    if message is not None:
+        fan_out(message)
+
+
+def queue_fan_out(message_id):
+    """Queue the fan-out of a broadcast unless one is already waiting or running"""
+    pending = Job.objects.filter(
+        task=fan_out_broadcast.task_name, args=[message_id], status__in=['queued', 'running'],
+    )
+    if not pending.exists():
+        fan_out_broadcast.enqueue(message_id)
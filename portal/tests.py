@@ -0,0 +1,1159 @@
+import csv
+import datetime
+import hashlib
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from admin_portal import models as site_models
+from jobs.models import Job
+from news.models import ArticleLike, Comment, NewsArticle, NewsCategory
+from st_marys_school.pagination import EstimatedCountPaginator
+
+from .academic_calendar import get_current_academic_year, get_current_term
+from .access import accessible_student_ids, can_view_student
+from .broadcasts import fan_out
+from .grade_import import import_grades
+from .inbox import deliver, inbox, mark_read, unread_count
+from .models import (
+    AcademicYear, Assignment, AssignmentSubmission, Attendance, Class, ClassSubject, Communication,
+    Grade, MessageDelivery, Parent, ProgressReport, Student, StudentTermSummary, Subject, Teacher,
+    Term, UserProfile,
+)
+from .reports import generate_progress_reports, weighted_averages
+from .services import SUBMITTED_STATUSES, with_pending_assignments, with_submission_status
+from .summaries import rebuild_all_summaries, term_summaries
+from .tasks import fan_out_broadcast
+
+DAY = datetime.date(2026, 1, 5)
+
+
+class SchoolTestCase(TestCase):
+    """One term, one subject and a class of ``class_size`` students with a class teacher"""
+    class_size = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = AcademicYear.objects.create(name='2026', start_date=DAY, end_date=DAY.replace(month=12),
+                                               is_current=True)
+        cls.term = Term.objects.create(academic_year=cls.year, term_number=1, name='Term 1',
+                                       start_date=DAY, end_date=DAY.replace(month=4), is_current=True)
+        cls.subject = Subject.objects.create(name='Mathematics', code='MAT')
+        cls.teacher = Teacher.objects.create(profile=cls.profile('teacher', 'teacher'), employee_id='T1',
+                                             hire_date=DAY, qualifications='B.Ed')
+        cls.teacher.subjects.add(cls.subject)
+        cls.class_obj = cls.create_class('Form1', 11)
+        cls.students = [cls.create_student(i) for i in range(cls.class_size)]
+
+    def setUp(self):
+        self.clear_caches()
+
+    @staticmethod
+    def clear_caches():
+        # Cached terms and access sets are keyed by ids that other tests reuse
+        for cache in caches.all():
+            cache.clear()
+
+    @staticmethod
+    def profile(username, user_type):
+        user = User.objects.create_user(username, password='x', first_name=username.title(), last_name='Test')
+        return UserProfile.objects.create(user=user, user_type=user_type)
+
+    @classmethod
+    def create_class(cls, name, level, class_teacher=None):
+        return Class.objects.create(name=name, display_name=name.replace('Form', 'Form '), level=level,
+                                    academic_year=cls.year, class_teacher=class_teacher or cls.teacher)
+
+    @classmethod
+    def create_student(cls, i, class_obj=None):
+        return Student.objects.create(profile=cls.profile(f'student{i}', 'student'), admission_number=f'ADM{i:03}',
+                                      gender='F', admission_date=DAY, current_class=class_obj or cls.class_obj)
+
+    @classmethod
+    def create_parent(cls, username, children):
+        parent = Parent.objects.create(profile=cls.profile(username, 'parent'), relationship='mother')
+        parent.children.add(*children)
+        return parent
+
+
+class ChangelistQueryTests(TestCase):
+    """
+    Every admin changelist must run the same number of queries however many
+    rows it shows: per-row counts come from annotations and related objects
+    from select_related, never from a query per row.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.year = AcademicYear.objects.create(name='2026', start_date=DAY, end_date=DAY.replace(month=12))
+        cls.term = Term.objects.create(academic_year=cls.year, term_number=1, name='Term 1',
+                                       start_date=DAY, end_date=DAY.replace(month=4))
+        cls.subject = Subject.objects.create(name='Mathematics', code='MAT')
+        cls.teacher = Teacher.objects.create(profile=cls.profiles('teacher', range(1))[0], employee_id='T0',
+                                             hire_date=DAY, qualifications='B.Ed')
+        cls.class_obj = Class.objects.create(name='Form1', display_name='Form 1', level=11,
+                                             academic_year=cls.year, class_teacher=cls.teacher)
+        cls.category = NewsCategory.objects.create(name='Sports')
+        cls.article = NewsArticle.objects.create(title='Sports Day', content='<p>Results</p>',
+                                                 category=cls.category, author=cls.admin_user)
+
+    @staticmethod
+    def profiles(user_type, indices):
+        users = User.objects.bulk_create(
+            User(username=f'{user_type}{i}', first_name=user_type.title(), last_name=str(i)) for i in indices
+        )
+        return UserProfile.objects.bulk_create(UserProfile(user=user, user_type=user_type) for user in users)
+
+    def students(self, indices):
+        parents = Parent.objects.bulk_create(
+            Parent(profile=profile, relationship='mother') for profile in self.profiles('parent', indices)
+        )
+        return Student.objects.bulk_create(
+            Student(profile=profile, admission_number=f'A{i}', current_class=self.class_obj, gender='F',
+                    admission_date=DAY, parent_guardian=parent)
+            for i, profile, parent in zip(indices, self.profiles('student', indices), parents)
+        )
+
+    def classes(self, indices):
+        classes = Class.objects.bulk_create(
+            Class(name=f'C{i}', display_name=f'Class {i}', level=i, academic_year=self.year,
+                  class_teacher=self.teacher) for i in indices
+        )
+        students = self.students(indices)
+        for class_obj, student in zip(classes, students):
+            student.current_class = class_obj
+        Student.objects.bulk_update(students, ['current_class'])
+        return classes
+
+    def subjects(self, indices):
+        return Subject.objects.bulk_create(Subject(name=f'Subject {i}', code=f'S{i}') for i in indices)
+
+    def assignments(self, indices):
+        return Assignment.objects.bulk_create(
+            Assignment(title=f'Assignment {i}', description='x', subject=self.subject, class_obj=self.class_obj,
+                       teacher=self.teacher, due_date=timezone.now()) for i in indices
+        )
+
+    # Model -> function creating the rows with the given indices, each with related rows to count
+    def builders(self):
+        return {
+            User: lambda ids: self.profiles('student', ids),
+            AcademicYear: lambda ids: Class.objects.bulk_create(
+                Class(name=f'C{i}', display_name=f'Class {i}', level=i, academic_year=year)
+                for i, year in zip(ids, AcademicYear.objects.bulk_create(
+                    AcademicYear(name=f'Y{i}', start_date=DAY, end_date=DAY) for i in ids
+                ))
+            ),
+            Class: self.classes,
+            Subject: lambda ids: ClassSubject.objects.bulk_create(
+                ClassSubject(class_obj=self.class_obj, subject=subject) for subject in self.subjects(ids)
+            ),
+            ClassSubject: lambda ids: ClassSubject.objects.bulk_create(
+                ClassSubject(class_obj=self.class_obj, subject=subject, teacher=self.teacher)
+                for subject in self.subjects(ids)
+            ),
+            Teacher: lambda ids: Teacher.subjects.through.objects.bulk_create(
+                Teacher.subjects.through(teacher=teacher, subject=self.subject)
+                for teacher in Teacher.objects.bulk_create(
+                    Teacher(profile=profile, employee_id=f'T{i}', hire_date=DAY, qualifications='B.Ed')
+                    for i, profile in zip(ids, self.profiles('teacher', ids))
+                )
+            ),
+            Student: self.students,
+            Parent: lambda ids: Parent.children.through.objects.bulk_create(
+                Parent.children.through(parent=student.parent_guardian, student=student)
+                for student in self.students(ids)
+            ),
+            Term: lambda ids: Term.objects.bulk_create(
+                Term(academic_year=year, term_number=1, name='Term 1', start_date=DAY, end_date=DAY)
+                for year in AcademicYear.objects.bulk_create(
+                    AcademicYear(name=f'Y{i}', start_date=DAY, end_date=DAY) for i in ids
+                )
+            ),
+            Assignment: lambda ids: AssignmentSubmission.objects.bulk_create(
+                AssignmentSubmission(assignment=assignment, student=student)
+                for assignment, student in zip(self.assignments(ids), self.students(ids))
+            ),
+            AssignmentSubmission: lambda ids: AssignmentSubmission.objects.bulk_create(
+                AssignmentSubmission(assignment=assignment, student=student, marks_obtained=Decimal(50),
+                                     submitted_at=timezone.now())
+                for assignment, student in zip(self.assignments(ids), self.students(ids))
+            ),
+            Grade: lambda ids: Grade.objects.bulk_create(
+                Grade(student=student, subject=self.subject, term=self.term, teacher=self.teacher,
+                      grade_type='test', title='CAT', marks_obtained=Decimal(60), date_recorded=DAY)
+                for student in self.students(ids)
+            ),
+            Attendance: lambda ids: Attendance.objects.bulk_create(
+                Attendance(student=student, date=DAY, marked_by=self.teacher) for student in self.students(ids)
+            ),
+            StudentTermSummary: lambda ids: StudentTermSummary.objects.bulk_create(
+                StudentTermSummary(student=student, term=self.term, subject=self.subject, average=Decimal(60))
+                for student in self.students(ids)
+            ),
+            ProgressReport: lambda ids: ProgressReport.objects.bulk_create(
+                ProgressReport(student=student, term=self.term, class_teacher=self.teacher)
+                for student in self.students(ids)
+            ),
+            Communication: lambda ids: MessageDelivery.objects.bulk_create(
+                MessageDelivery(message=message, user=self.admin_user)
+                for message in Communication.objects.bulk_create(
+                    Communication(sender=self.admin_user, subject=f'Notice {i}', message='x') for i in ids
+                )
+            ),
+            NewsCategory: lambda ids: NewsArticle.objects.bulk_create(
+                NewsArticle(title='x', slug=f'article-{i}', content='x', category=category,
+                            author=self.admin_user, is_published=True)
+                for i, category in zip(ids, NewsCategory.objects.bulk_create(
+                    NewsCategory(name=f'Category {i}', slug=f'category-{i}') for i in ids
+                ))
+            ),
+            NewsArticle: lambda ids: NewsArticle.objects.bulk_create(
+                NewsArticle(title=f'Article {i}', slug=f'article-{i}', content='x', category=self.category,
+                            author=self.admin_user) for i in ids
+            ),
+            Comment: lambda ids: Comment.objects.bulk_create(
+                Comment(article=self.article, name='Parent', email='p@example.com', content='Well done',
+                        ip_address='127.0.0.1') for i in ids
+            ),
+            ArticleLike: lambda ids: ArticleLike.objects.bulk_create(
+                ArticleLike(article=self.article, ip_address=f'10.0.{i // 256}.{i % 256}') for i in ids
+            ),
+            site_models.NewsAnnouncement: lambda ids: site_models.NewsAnnouncement.objects.bulk_create(
+                site_models.NewsAnnouncement(title=f'Notice {i}', content='x', created_by=self.admin_user)
+                for i in ids
+            ),
+            site_models.SchoolEvent: lambda ids: site_models.SchoolEvent.objects.bulk_create(
+                site_models.SchoolEvent(title=f'Event {i}', event_type='sports', description='x',
+                                        start_date=DAY, created_by=self.admin_user) for i in ids
+            ),
+            site_models.Newsletter: lambda ids: site_models.Newsletter.objects.bulk_create(
+                site_models.Newsletter(subject=f'Issue {i}', content='x', created_by=self.admin_user)
+                for i in ids
+            ),
+            site_models.AdminActivityLog: lambda ids: site_models.AdminActivityLog.objects.bulk_create(
+                site_models.AdminActivityLog(user=self.admin_user, action='update', content_type='news',
+                                             object_repr=f'Notice {i}') for i in ids
+            ),
+        }
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+        # Show every row on one page so that per-row queries cannot hide behind pagination
+        with mock.patch.object(admin.site._registry[model], 'list_per_page', 2000):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.client.force_login(self.admin_user)
+        for model, build in self.builders().items():
+            with self.subTest(model=model._meta.label), transaction.atomic():
+                build(range(100, 200))
+                small = self.changelist_queries(model)
+                build(range(200, 1100))
+                self.assertEqual(self.changelist_queries(model), small)
+                transaction.set_rollback(True)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(User(username=f'user{i:02}') for i in range(45))
+
+    def paginator(self, estimate, **kwargs):
+        paginator = EstimatedCountPaginator(User.objects.order_by('username'), 10, **kwargs)
+        paginator.estimate = lambda: estimate
+        return paginator
+
+    def test_counts_exactly_without_an_estimate(self):
+        paginator = EstimatedCountPaginator(User.objects.order_by('username'), 10)
+        self.assertEqual(paginator.count, 45)
+        self.assertFalse(paginator.count_is_estimate)
+
+    def test_small_estimates_are_counted_exactly(self):
+        paginator = self.paginator(100)
+        self.assertEqual(paginator.count, 45)
+        self.assertFalse(paginator.count_is_estimate)
+
+    def test_large_estimate_is_used_without_counting(self):
+        paginator = self.paginator(20_000)
+        with self.assertNumQueries(1):
+            page = paginator.page(2)
+            self.assertEqual(len(page), 10)
+        self.assertEqual(paginator.num_pages, 2000)
+        self.assertTrue(paginator.count_is_estimate)
+
+    def test_short_page_settles_the_real_count(self):
+        paginator = self.paginator(20_000)
+        page = paginator.page(5)
+        self.assertEqual(len(page), 5)
+        self.assertFalse(page.has_next())
+        self.assertEqual(paginator.count, 45)
+        self.assertFalse(paginator.count_is_estimate)
+
+    def test_page_past_the_end_falls_back_to_the_last_page(self):
+        page = self.paginator(20_000).get_page(100)
+        self.assertEqual(page.number, 5)
+        self.assertEqual(len(page), 5)
+
+    def test_pages_past_a_low_estimate_are_reachable(self):
+        paginator = self.paginator(20, exact_below=10)
+        self.assertTrue(paginator.page(2).has_next())
+        self.assertEqual(len(self.paginator(20, exact_below=10).page(4)), 10)
+
+    def test_inbox_says_about_for_an_estimate(self):
+        user = User.objects.get(username='user00')
+        for n in range(25):
+            deliver(Communication.objects.create(sender=user, subject=f'Notice {n}', message='-'), [user])
+        self.client.force_login(user)
+        url = reverse('portal:messages_inbox')
+
+        response = self.client.get(url)
+        self.assertContains(response, 'Page 1 of 2')
+        self.assertNotContains(response, 'about')
+        with mock.patch.object(EstimatedCountPaginator, 'estimate', return_value=20_000):
+            response = self.client.get(url)
+        self.assertContains(response, 'Page 1 of about 1000')
+
+    def test_admin_changelist_says_about_for_an_estimate(self):
+        user = User.objects.get(username='user00')
+        deliver(Communication.objects.create(sender=user, subject='Notice', message='-'), User.objects.all())
+        self.client.force_login(User.objects.create_user('office', is_staff=True, is_superuser=True))
+        url = reverse('admin:portal_messagedelivery_changelist')
+
+        with mock.patch.object(admin.site._registry[MessageDelivery], 'list_per_page', 10):
+            self.assertContains(self.client.get(url), '45 Message deliveries')
+            with mock.patch.object(EstimatedCountPaginator, 'estimate', return_value=20_000):
+                self.assertContains(self.client.get(url), 'about 20000 Message deliveries')
+
+
+class QueryPlanTests(TestCase):
+    """The portal's most frequent queries must be answered from an index, not a full table scan"""
+
+    def assertUsesIndex(self, queryset, ordered=True):
+        """No full scan of the queried table and, if ``ordered``, rows come in index order without a sort"""
+        table = queryset.model._meta.db_table
+        if connection.vendor == 'postgresql':
+            # Tiny test tables are cheaper to scan and sort, so forbid both unless no index can help
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_sort = off')
+            full_scan, sort = f'Seq Scan on {table}', 'Sort'
+        else:
+            # Also catches 'TEMP B-TREE FOR RIGHT PART OF ORDER BY', a partial sort
+            full_scan, sort = f'SCAN {table}', 'TEMP B-TREE'
+        plan = queryset.explain()
+        self.assertNotIn(full_scan, plan, f'{queryset.query}\n{plan}')
+        if ordered:
+            self.assertNotIn(sort, plan, f'{queryset.query}\n{plan}')
+
+    def test_student_grades_for_a_term(self):
+        grades = Grade.objects.filter(student_id=1, term_id=1)
+        # Ordered by a joined column, so a sort is expected
+        self.assertUsesIndex(grades.select_related('subject', 'teacher__profile__user').order_by('subject__name'),
+                             ordered=False)
+        self.assertUsesIndex(grades.order_by('-date_recorded')[:5])
+
+    def test_teacher_grades(self):
+        self.assertUsesIndex(Grade.objects.filter(teacher_id=1, term_id=1).order_by('-date_recorded', '-created_at'))
+
+    def test_class_assignments(self):
+        self.assertUsesIndex(Assignment.objects.filter(class_obj_id=1, status='published').order_by('-due_date'))
+        self.assertUsesIndex(Assignment.objects.filter(
+            teacher_id=1, created_at__gte=timezone.now() - datetime.timedelta(days=30),
+        ).order_by('-created_at')[:5])
+
+    def test_student_submissions(self):
+        self.assertUsesIndex(AssignmentSubmission.objects.filter(student_id=1, status__in=['submitted', 'graded']),
+                             ordered=False)
+
+    def test_attendance_ranges(self):
+        self.assertUsesIndex(Attendance.objects.filter(student_id=1).between(DAY, DAY.replace(month=4)).order_by('-date'))
+        self.assertUsesIndex(Attendance.objects.filter(date__range=[DAY, DAY.replace(month=4)]).order_by('-date'))
+
+
+class RecordsApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        year = AcademicYear.objects.create(name='2026', start_date=DAY, end_date=DAY.replace(month=12))
+        cls.term = Term.objects.create(academic_year=year, term_number=1, name='Term 1',
+                                       start_date=DAY, end_date=DAY.replace(month=4))
+        subject = Subject.objects.create(name='Mathematics', code='MAT')
+        profile = UserProfile.objects.create(user=User.objects.create_user('teacher'), user_type='teacher')
+        teacher = Teacher.objects.create(profile=profile, employee_id='T1', hire_date=DAY, qualifications='B.Ed')
+        cls.user = User.objects.create_user('pupil', password='x')
+        cls.student = Student.objects.create(
+            profile=UserProfile.objects.create(user=cls.user, user_type='student'),
+            admission_number='A1', gender='F', admission_date=DAY,
+        )
+        # Several grades share a date, so pages must break ties by id
+        Grade.objects.bulk_create(
+            Grade(student=cls.student, subject=subject, term=cls.term, teacher=teacher, grade_type='test',
+                  title=f'CAT {i}', marks_obtained=Decimal(50 + i), date_recorded=DAY + datetime.timedelta(days=i // 3))
+            for i in range(25)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('portal:api_student_records', args=[self.student.pk, 'grades'])
+
+    def test_cursor_pages_cover_every_row_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 10, **({'cursor': cursor} if cursor else {})}
+            data = self.client.get(self.url, params).json()
+            seen += [row['id'] for row in data['results']]
+            cursor = data['next']
+            if not cursor:
+                break
+        self.assertEqual(len(set(seen)), 25)
+        self.assertEqual(seen[0], Grade.objects.order_by('-date_recorded', '-pk')[0].pk)
+
+    def test_fields_selects_keys(self):
+        data = self.client.get(self.url, {'fields': 'id,marks', 'limit': 1}).json()
+        self.assertEqual(set(data['results'][0]), {'id', 'marks'})
+        response = self.client.get(self.url, {'fields': 'id,salary'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('salary', response.json()['error'])
+
+    def test_bad_cursor_and_limit_are_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'nonsense'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'limit': 1000}).status_code, 400)
+
+    def test_unchanged_page_is_not_sent_again(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response['ETag'], f'"{hashlib.md5(response.content).hexdigest()}"')
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+
+    def test_responses_are_gzipped(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_other_students_are_forbidden(self):
+        other = Student.objects.create(
+            profile=UserProfile.objects.create(user=User.objects.create_user('other'), user_type='student'),
+            admission_number='A2', gender='M', admission_date=DAY,
+        )
+        url = reverse('portal:api_student_records', args=[other.pk, 'grades'])
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_messages(self):
+        sender = User.objects.create_user('head')
+        for i in range(3):
+            message = Communication.objects.create(sender=sender, subject=f'Notice {i}', message='x')
+            MessageDelivery.objects.create(message=message, user=self.user)
+        data = self.client.get(reverse('portal:api_messages'), {'fields': 'subject,read_at', 'limit': 2}).json()
+        self.assertEqual([row['subject'] for row in data['results']], ['Notice 2', 'Notice 1'])
+        rest = self.client.get(reverse('portal:api_messages'), {'cursor': data['next']}).json()
+        self.assertEqual([row['subject'] for row in rest['results']], ['Notice 0'])
+        self.assertIsNone(rest['next'])
+
+
+class StudentAccessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        year = AcademicYear.objects.create(name='2026', start_date=DAY, end_date=DAY.replace(month=12))
+        cls.teacher = Teacher.objects.create(
+            profile=UserProfile.objects.create(user=User.objects.create_user('teacher'), user_type='teacher'),
+            employee_id='T1', hire_date=DAY, qualifications='B.Ed',
+        )
+        cls.class_obj = Class.objects.create(name='Form1', display_name='Form 1', level=11, academic_year=year,
+                                             class_teacher=cls.teacher)
+        cls.parent = Parent.objects.create(
+            profile=UserProfile.objects.create(user=User.objects.create_user('mother', password='x'),
+                                               user_type='parent'),
+            relationship='mother',
+        )
+        cls.child, cls.other = [
+            Student.objects.create(
+                profile=UserProfile.objects.create(user=User.objects.create_user(f'pupil{i}'), user_type='student'),
+                admission_number=f'A{i}', gender='F', admission_date=DAY, current_class=cls.class_obj,
+            )
+            for i in range(2)
+        ]
+        cls.parent.children.add(cls.child)
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def visible(self, user):
+        # A fresh user object, as each request gets, so only the cache can answer
+        return accessible_student_ids(User.objects.get(pk=user.pk))
+
+    def test_each_role_sees_its_students(self):
+        self.assertEqual(self.visible(self.child.profile.user), {self.child.pk})
+        self.assertEqual(self.visible(self.parent.profile.user), {self.child.pk})
+        self.assertEqual(self.visible(self.teacher.profile.user), {self.child.pk, self.other.pk})
+        self.assertEqual(self.visible(User.objects.create_user('visitor')), set())
+
+    def test_checks_are_cached(self):
+        user = User.objects.get(pk=self.parent.profile.user_id)
+        self.assertTrue(can_view_student(user, self.child.pk))
+        with self.assertNumQueries(0):
+            self.assertFalse(can_view_student(user, self.other.pk))
+            self.assertTrue(can_view_student(User(pk=user.pk), self.child.pk))
+
+    def test_adding_and_removing_children_updates_access(self):
+        parent_user = self.parent.profile.user
+        self.visible(parent_user)
+        self.other.parents.add(self.parent)
+        self.assertEqual(self.visible(parent_user), {self.child.pk, self.other.pk})
+        self.parent.children.remove(self.child)
+        self.assertEqual(self.visible(parent_user), {self.other.pk})
+        self.other.parents.clear()
+        self.assertEqual(self.visible(parent_user), set())
+
+    def test_changing_class_teacher_updates_access(self):
+        new_teacher = Teacher.objects.create(
+            profile=UserProfile.objects.create(user=User.objects.create_user('deputy'), user_type='teacher'),
+            employee_id='T2', hire_date=DAY, qualifications='B.Ed',
+        )
+        self.visible(self.teacher.profile.user)
+        self.visible(new_teacher.profile.user)
+        self.class_obj.class_teacher = new_teacher
+        self.class_obj.save()
+        self.assertEqual(self.visible(self.teacher.profile.user), set())
+        self.assertEqual(self.visible(new_teacher.profile.user), {self.child.pk, self.other.pk})
+
+    def test_child_views_refuse_other_students(self):
+        self.client.force_login(self.parent.profile.user)
+        url = reverse('portal:child_attendance', args=[self.other.pk])
+        self.assertEqual(self.client.get(url).status_code, 403)
+        api = reverse('portal:api_student_data', args=[self.other.pk])
+        self.assertEqual(self.client.get(api).status_code, 403)
+        self.assertEqual(self.client.get(reverse('portal:api_student_data', args=[self.child.pk])).status_code, 200)
+
+
+class MarkAttendanceViewTests(SchoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.teacher.profile.user)
+        self.url = reverse('portal:mark_attendance', args=[self.class_obj.pk])
+
+    def roll_call(self, **overrides):
+        data = {'date': DAY.isoformat()}
+        for student in self.students:
+            data[f'status_{student.pk}'] = 'present'
+        data.update(overrides)
+        return data
+
+    def test_roll_call_pages_render(self):
+        response = self.client.get(reverse('portal:teacher_attendance'))
+        self.assertContains(response, self.class_obj.display_name)
+        response = self.client.get(self.url, {'date': DAY.isoformat()})
+        self.assertContains(response, f'name="status_{self.students[0].pk}"')
+
+    def test_saves_the_whole_class(self):
+        first = self.students[0]
+        response = self.client.post(self.url, self.roll_call(**{f'status_{first.pk}': 'absent'}))
+        self.assertRedirects(response, reverse('portal:teacher_attendance'))
+        self.assertEqual(Attendance.objects.filter(date=DAY).count(), len(self.students))
+        self.assertEqual(Attendance.objects.get(student=first, date=DAY).status, 'absent')
+
+    def test_invalid_rows_are_redisplayed_and_nothing_saved(self):
+        first = self.students[0]
+        response = self.client.post(self.url, self.roll_call(**{
+            f'time_in_{first.pk}': '08:00', f'time_out_{first.pk}': '07:00',
+        }))
+        self.assertContains(response, 'Time out cannot be before time in.')
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_class_comes_from_the_url(self):
+        other_class = self.create_class('Form2', 12)
+        other_student = self.create_student(9, other_class)
+        response = self.client.post(self.url, self.roll_call(class_obj=other_class.pk))
+        self.assertRedirects(response, reverse('portal:teacher_attendance'))
+        self.assertFalse(Attendance.objects.filter(student=other_student).exists())
+        self.assertEqual(Attendance.objects.count(), len(self.students))
+
+    def test_other_teachers_classes_are_refused(self):
+        other_teacher = Teacher.objects.create(profile=self.profile('other', 'teacher'), employee_id='T2',
+                                               hire_date=DAY, qualifications='B.Ed')
+        other_class = self.create_class('Form3', 13, class_teacher=other_teacher)
+        url = reverse('portal:mark_attendance', args=[other_class.pk])
+        self.assertEqual(self.client.post(url, self.roll_call()).status_code, 403)
+
+
+class GradeImportTests(SchoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.teacher.profile.user)
+
+    def upload(self, rows, title='Opener'):
+        sheet = SimpleUploadedFile('marks.csv', ('Adm No,Score,Comments\n' + '\n'.join(rows)).encode())
+        return self.client.post(reverse('portal:add_grade'), {
+            'sheet': sheet, 'class_obj': self.class_obj.pk, 'subject': self.subject.pk, 'term': self.term.pk,
+            'grade_type': 'test', 'title': title, 'max_marks': '50', 'weight': '1',
+        }, follow=True)
+
+    def marks(self):
+        return dict(Grade.objects.values_list('student__admission_number', 'marks_obtained'))
+
+    def test_pages_render(self):
+        self.assertContains(self.client.get(reverse('portal:add_grade')), 'Import a Class Mark Sheet')
+        self.assertContains(self.client.get(reverse('portal:teacher_grades')), 'No grades recorded')
+
+    def test_valid_sheet_is_imported(self):
+        response = self.upload(['ADM000,45,Well done', 'adm001,30.5,', 'ADM002,0,'])
+        self.assertRedirects(response, reverse('portal:add_grade'))
+        self.assertContains(response, 'Imported 3 new and 0 updated grades.')
+        self.assertEqual(self.marks(), {'ADM000': Decimal('45'), 'ADM001': Decimal('30.5'), 'ADM002': Decimal('0')})
+        self.assertEqual(Grade.objects.get(student=self.students[0]).comments, 'Well done')
+        # bulk_create bypasses the Grade signals; the import refreshes the summaries itself
+        self.assertEqual(StudentTermSummary.objects.filter(term=self.term, subject__isnull=True).count(), 3)
+
+    def test_rejected_rows_are_reported_and_the_rest_imported(self):
+        response = self.upload(['ADM000,45,', 'ADM999,40,', 'ADM001,51,', 'ADM002,abc,', 'ADM000,20,'])
+        self.assertContains(response, 'Imported 1 new and 0 updated grades.')
+        self.assertContains(response, 'Row 3 (ADM999): No active student in Form 1')
+        self.assertContains(response, 'Row 4 (ADM001): Marks 51 exceed the maximum of 50')
+        self.assertContains(response, 'Row 5 (ADM002): Marks &#x27;abc&#x27; is not a number')
+        self.assertContains(response, 'Row 6 (ADM000): Appears more than once in the sheet')
+        self.assertEqual(self.marks(), {'ADM000': Decimal('45')})
+
+    def test_corrected_row_after_a_rejected_one_is_imported(self):
+        response = self.upload(['ADM000,55,', 'ADM000,45,', 'ADM001,x,', 'ADM001,30,', 'ADM001,31,'])
+        self.assertContains(response, 'Imported 2 new and 0 updated grades.')
+        self.assertContains(response, 'Row 2 (ADM000): Marks 55 exceed the maximum of 50')
+        self.assertContains(response, 'Row 6 (ADM001): Appears more than once in the sheet')
+        self.assertNotContains(response, 'Row 3 (ADM000)')
+        self.assertEqual(self.marks(), {'ADM000': Decimal('45'), 'ADM001': Decimal('30')})
+
+    def test_resubmitting_a_sheet_updates_marks_in_place(self):
+        self.upload(['ADM000,45,', 'ADM001,30,'])
+        first_ids = set(Grade.objects.values_list('pk', flat=True))
+
+        response = self.upload(['ADM000,40,Remarked', 'ADM001,30,', 'ADM002,25,'])
+        self.assertContains(response, 'Imported 1 new and 2 updated grades.')
+        self.assertEqual(self.marks(), {'ADM000': Decimal('40'), 'ADM001': Decimal('30'), 'ADM002': Decimal('25')})
+        self.assertTrue(first_ids <= set(Grade.objects.values_list('pk', flat=True)))
+        self.assertEqual(Grade.objects.get(student=self.students[0]).comments, 'Remarked')
+
+    def test_unreadable_sheet_is_a_form_error(self):
+        response = self.client.post(reverse('portal:add_grade'), {
+            'sheet': SimpleUploadedFile('marks.csv', b'name,total\nA,1\n'), 'class_obj': self.class_obj.pk,
+            'subject': self.subject.pk, 'term': self.term.pk, 'grade_type': 'test', 'title': 'Opener',
+            'max_marks': '50', 'weight': '1',
+        })
+        self.assertContains(response, 'Missing column(s): admission_number, marks')
+        self.assertFalse(Grade.objects.exists())
+
+    def test_queries_do_not_grow_with_the_sheet(self):
+        profiles = ChangelistQueryTests.profiles('pupil', range(600))
+        Student.objects.bulk_create(
+            Student(profile=profile, admission_number=f'BULK{i:04}', gender='M', admission_date=DAY,
+                    current_class=self.class_obj)
+            for i, profile in enumerate(profiles)
+        )
+
+        def import_rows(count, title):
+            rows = ((n, {'admission_number': f'BULK{n:04}', 'marks': '30'}) for n in range(count))
+            with CaptureQueriesContext(connection) as queries:
+                result = import_grades(rows, class_obj=self.class_obj, subject=self.subject, term=self.term,
+                                       teacher=self.teacher, grade_type='exam', title=title,
+                                       batch_size=1000)
+            self.assertEqual(result['created'], count)
+            # The backend may split a bulk INSERT by its parameter limit; everything else is fixed
+            statements = [query['sql'].split()[0] for query in queries]
+            return len(statements), len([statement for statement in statements if statement != 'INSERT'])
+
+        large, large_lookups = import_rows(600, 'End of term')
+        small, small_lookups = import_rows(10, 'Mid term')
+        self.assertEqual(large_lookups, small_lookups)
+        self.assertLess(large, 600 // 10)
+
+
+class DashboardQueryTests(SchoolTestCase):
+    """The dashboards run a fixed number of queries however many children, grades and assignments there are"""
+    class_size = 4
+
+    def add_records(self, students, count):
+        for student in students:
+            for n in range(count):
+                Grade.objects.create(student=student, subject=self.subject, term=self.term, teacher=self.teacher,
+                                     grade_type='test', title=f'Test {n}', marks_obtained=40 + n, max_marks=50,
+                                     date_recorded=DAY + datetime.timedelta(days=n))
+                Attendance.objects.get_or_create(student=student, date=DAY + datetime.timedelta(days=n),
+                                                 defaults={'status': 'present'})
+        for n in range(count):
+            Assignment.objects.create(title=f'Homework {n}', description='-', subject=self.subject,
+                                      class_obj=self.class_obj, teacher=self.teacher, status='published',
+                                      due_date=timezone.now() + datetime.timedelta(days=n + 1))
+
+    def count_queries(self, user, url):
+        self.clear_caches()
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_parent_dashboard(self):
+        parent = self.create_parent('parent', self.students[:1])
+        self.add_records(self.students[:1], 1)
+        url = reverse('portal:parent_dashboard')
+        baseline = self.count_queries(parent.profile.user, url)
+
+        parent.children.add(*self.students[1:])
+        self.add_records(self.students, 6)
+        self.assertEqual(self.count_queries(parent.profile.user, url), baseline)
+
+    def test_student_dashboard(self):
+        student = self.students[0]
+        self.add_records([student], 1)
+        url = reverse('portal:dashboard')
+        baseline = self.count_queries(student.profile.user, url)
+
+        self.add_records([student], 8)
+        self.assertEqual(self.count_queries(student.profile.user, url), baseline)
+
+    def test_child_profile_loads_the_student_once(self):
+        child = self.students[0]
+        parent = self.create_parent('parent', [child])
+        self.add_records([child], 3)
+        self.clear_caches()
+        self.client.force_login(parent.profile.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('portal:child_profile', args=[child.pk]))
+        self.assertContains(response, child.full_name)
+        self.assertContains(response, 'Form 1')
+        self.assertEqual(response.context['student'].recent_grades[0].title, 'Test 2')
+        tables = [query['sql'].split(' FROM ', 1)[1].split()[0] for query in queries if ' FROM ' in query['sql']]
+        self.assertEqual(tables.count('"portal_student"'), 1)
+        self.assertNotIn('"portal_class"', tables)
+
+
+class AttendanceStatisticsTests(SchoolTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        student = cls.students[0]
+        for n, status in enumerate(['present', 'present', 'present', 'late', 'absent']):
+            Attendance.objects.create(student=student, date=DAY + datetime.timedelta(days=n), status=status)
+        # Outside the range, and another student's record
+        Attendance.objects.create(student=student, date=DAY + datetime.timedelta(days=30), status='absent')
+        Attendance.objects.create(student=cls.students[1], date=DAY, status='absent')
+
+    def test_statistics_in_one_query(self):
+        records = Attendance.objects.filter(student=self.students[0]).between(DAY, DAY + datetime.timedelta(days=7))
+        with self.assertNumQueries(1):
+            stats = records.statistics()
+        self.assertEqual(stats, {
+            'total_days': 5, 'present_days': 3, 'absent_days': 1, 'late_days': 1, 'excused_days': 0,
+            'attendance_percentage': 60.0,
+        })
+        self.assertEqual(Attendance.objects.none().statistics()['attendance_percentage'], 0)
+
+    def test_summary_api(self):
+        self.client.force_login(self.students[0].profile.user)
+        url = reverse('portal:api_attendance_summary', args=[self.students[0].pk])
+        data = self.client.get(url, {'start_date': DAY.isoformat(), 'end_date': '2026-01-12'}).json()
+        self.assertEqual((data['total_days'], data['present_days'], data['attendance_percentage']), (5, 3, 60.0))
+        self.assertEqual(self.client.get(url, {'start_date': 'soon'}).status_code, 400)
+        other = reverse('portal:api_attendance_summary', args=[self.students[1].pk])
+        self.assertEqual(self.client.get(other).status_code, 403)
+
+
+class SubmissionStatusTests(SchoolTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        due = timezone.now() + datetime.timedelta(days=7)
+        cls.assignments = [
+            Assignment.objects.create(title=f'Homework {n}', description='-', subject=cls.subject,
+                                      class_obj=cls.class_obj, teacher=cls.teacher, status='published', due_date=due)
+            for n in range(4)
+        ]
+        student, other = cls.students[:2]
+        AssignmentSubmission.objects.create(assignment=cls.assignments[0], student=student, status='submitted')
+        AssignmentSubmission.objects.create(assignment=cls.assignments[1], student=student, status='draft')
+        AssignmentSubmission.objects.create(assignment=cls.assignments[2], student=other, status='graded')
+
+    def test_status_and_submission_are_attached(self):
+        student = self.students[0]
+        with self.assertNumQueries(2):
+            assignments = {
+                assignment.title: assignment
+                for assignment in with_submission_status(Assignment.objects.all(), student)
+            }
+        self.assertEqual(
+            {title: assignment.submission_status for title, assignment in assignments.items()},
+            {'Homework 0': 'submitted', 'Homework 1': 'draft', 'Homework 2': 'not_submitted',
+             'Homework 3': 'not_submitted'},
+        )
+        self.assertEqual([s.student for s in assignments['Homework 0'].student_submissions], [student])
+        self.assertEqual(assignments['Homework 2'].student_submissions, [])
+
+    def test_status_can_be_filtered(self):
+        pending = with_submission_status(Assignment.objects.all(), self.students[0]).exclude(
+            submission_status__in=SUBMITTED_STATUSES
+        )
+        self.assertEqual(sorted(pending.values_list('title', flat=True)), ['Homework 1', 'Homework 2', 'Homework 3'])
+
+    def test_pending_assignment_counts(self):
+        counts = dict(with_pending_assignments(Student.objects.all()).values_list('pk', 'pending_assignments'))
+        self.assertEqual(counts, {self.students[0].pk: 3, self.students[1].pk: 3, self.students[2].pk: 4})
+
+
+class AcademicCalendarTests(SchoolTestCase):
+    def test_current_term_is_cached_per_request_and_across_requests(self):
+        request = RequestFactory().get('/')
+        with self.assertNumQueries(1):
+            self.assertEqual(get_current_term(request), self.term)
+            self.assertEqual(get_current_term(request), self.term)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_current_term(), self.term)
+        self.assertEqual(get_current_term().academic_year, self.year)
+
+    def test_no_current_term_is_cached_too(self):
+        Term.objects.update(is_current=False)
+        self.clear_caches()
+        self.assertIsNone(get_current_term())
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_current_term())
+
+    def test_saving_a_term_or_year_clears_the_cache(self):
+        self.assertEqual(get_current_term(), self.term)
+        self.assertEqual(get_current_academic_year(), self.year)
+
+        next_term = Term.objects.create(academic_year=self.year, term_number=2, name='Term 2',
+                                        start_date=DAY.replace(month=5), end_date=DAY.replace(month=8),
+                                        is_current=True)
+        self.assertEqual(get_current_term(), next_term)
+
+        self.year.is_current = False
+        self.year.save()
+        self.assertIsNone(get_current_academic_year())
+        next_term.delete()
+        self.assertIsNone(get_current_term())
+
+
+class CacheConfigTests(TestCase):
+    def test_tests_run_on_local_memory(self):
+        for alias in settings.CACHES:
+            self.assertIsInstance(caches[alias], LocMemCache, alias)
+
+    def test_clearing_one_alias_keeps_the_others(self):
+        caches['pages'].set('page', 'html')
+        caches['sessions'].set('session', 'data')
+        call_command('manage_cache', 'clear', alias=['pages'], stdout=io.StringIO())
+        self.assertIsNone(caches['pages'].get('page'))
+        self.assertEqual(caches['sessions'].get('session'), 'data')
+
+
+class ProgressReportTests(SchoolTestCase):
+    def grade(self, student, marks, max_marks=100, weight=1):
+        return Grade.objects.create(student=student, subject=self.subject, term=self.term, teacher=self.teacher,
+                                    grade_type='exam', title='Exam', marks_obtained=marks, max_marks=max_marks,
+                                    weight=weight)
+
+    def test_weighted_averages_are_ranked_within_the_class(self):
+        first, second, third = self.students
+        self.grade(first, 90, weight=2)
+        self.grade(first, 60)  # (90 * 2 + 60) / 3 = 80
+        self.grade(second, 40, max_marks=50)  # 80, ties with first
+        self.grade(third, 70)
+        self.grade(third, 5, max_marks=0)  # no percentage; ignored
+
+        rows = {row['student_id']: row for row in weighted_averages(self.term)}
+        self.assertEqual(
+            {student_id: (row['average'], row['position'], row['class_size']) for student_id, row in rows.items()},
+            {first.pk: (80.0, 1, 3), second.pk: (80.0, 1, 3), third.pk: (70.0, 3, 3)},
+        )
+
+    def test_zero_weights_average_zero(self):
+        first, second, _ = self.students
+        self.grade(first, 90, weight=0)
+        self.grade(first, 70, weight=0)
+        self.grade(second, 40)
+
+        sql = str(weighted_averages(self.term).query)
+        self.assertIn('NULLIF', sql)
+        rows = {row['student_id']: (row['average'], row['position']) for row in weighted_averages(self.term)}
+        self.assertEqual(rows, {first.pk: (0.0, 2), second.pk: (40.0, 1)})
+        self.assertEqual(generate_progress_reports(self.term)[:2], (2, 0))
+        self.assertEqual(ProgressReport.objects.get(student=first).overall_average, 0)
+
+    def test_reports_are_created_then_refreshed(self):
+        first, second, _ = self.students
+        self.grade(first, 50)
+        self.grade(second, 70)
+
+        self.assertEqual(generate_progress_reports(self.term)[:2], (2, 0))
+        report = ProgressReport.objects.get(student=first)
+        self.assertEqual((report.overall_average, report.class_position, report.class_teacher), (50, 2, self.teacher))
+        report.teacher_comments = 'Keep working'
+        report.save()
+
+        self.grade(first, 100)
+        self.assertEqual(generate_progress_reports(self.term)[:2], (0, 2))
+        report.refresh_from_db()
+        self.assertEqual((report.overall_average, report.class_position), (75, 1))
+        self.assertEqual(report.teacher_comments, 'Keep working')
+
+    def test_classes_without_a_class_teacher_are_skipped(self):
+        Class.objects.filter(pk=self.class_obj.pk).update(class_teacher=None)
+        self.grade(self.students[0], 50)
+        created, updated, skipped = generate_progress_reports(self.term)
+        self.assertEqual((created, updated, skipped), (0, 0, [self.class_obj]))
+
+
+class ExportTests(SchoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_user('office', is_staff=True))
+
+    def export(self, kind, **params):
+        response = self.client.get(reverse('portal:export_data', args=[kind]), params)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_grades_export_in_one_query(self):
+        for student in self.students:
+            Grade.objects.create(student=student, subject=self.subject, term=self.term, teacher=self.teacher,
+                                 grade_type='exam', title='Exam', marks_obtained=45, max_marks=50)
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.export('grades', term=self.term.pk)
+        self.assertEqual(len([query for query in queries if 'portal_grade' in query['sql']]), 1)
+        self.assertEqual(rows[0][:3], ['Admission number', 'Student', 'Class'])
+        self.assertEqual([row[0] for row in rows[1:]], ['ADM000', 'ADM001', 'ADM002'])
+        self.assertEqual(rows[1][8:12], ['45.00', '50.00', '90.0', 'A'])
+
+    def test_class_filter_and_bad_input(self):
+        self.create_student(9, self.create_class('Form2', 12))
+        rows = self.export('students', **{'class': self.class_obj.pk})
+        self.assertEqual(len(rows) - 1, len(self.students))
+        url = reverse('portal:export_data', args=['students'])
+        self.assertEqual(self.client.get(url, {'class': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('portal:export_data', args=['fees'])).status_code, 404)
+
+    def test_formula_cells_are_quoted(self):
+        Grade.objects.create(student=self.students[0], subject=self.subject, term=self.term, teacher=self.teacher,
+                             grade_type='exam', title='=HYPERLINK("http://x")', marks_obtained=45, max_marks=50,
+                             comments='-2 on Q3')
+        User.objects.filter(pk=self.students[0].profile.user_id).update(first_name='@Ann')
+        header, row = self.export('grades')
+        cells = dict(zip(header, row))
+        self.assertEqual(cells['Title'], '\'=HYPERLINK("http://x")')
+        self.assertEqual(cells['Comments'], "'-2 on Q3")
+        self.assertEqual(cells['Student'], "'@Ann Test")
+        self.assertEqual(cells['Marks'], '45.00')
+
+    def test_staff_only(self):
+        self.client.force_login(self.teacher.profile.user)
+        self.assertEqual(self.client.get(reverse('portal:export_data', args=['grades'])).status_code, 403)
+
+
+class TermSummaryTests(SchoolTestCase):
+    def grade(self, student, marks, max_marks=100, weight=1, subject=None):
+        return Grade.objects.create(student=student, subject=subject or self.subject, term=self.term,
+                                    teacher=self.teacher, grade_type='test', title='Test', marks_obtained=marks,
+                                    max_marks=max_marks, weight=weight)
+
+    def averages(self, student):
+        overall, by_subject = term_summaries(student, self.term)
+        return overall and overall.average, {summary.subject.code: summary.average for summary in by_subject}
+
+    def test_summaries_follow_grade_changes(self):
+        student = self.students[0]
+        english = Subject.objects.create(name='English', code='ENG')
+        self.grade(student, 80, weight=2)
+        grade = self.grade(student, 50)
+        self.grade(student, 30, max_marks=50, subject=english)
+        self.assertEqual(self.averages(student), (Decimal('67.50'), {'ENG': Decimal('60.00'), 'MAT': Decimal('70.00')}))
+
+        grade.student = self.students[1]
+        grade.save()
+        self.assertEqual(self.averages(student), (Decimal('73.33'), {'ENG': Decimal('60.00'), 'MAT': Decimal('80.00')}))
+        self.assertEqual(self.averages(self.students[1])[0], Decimal('50.00'))
+
+        grade.delete()
+        self.assertEqual(self.averages(self.students[1]), (None, {}))
+
+    def test_grades_out_of_zero_are_skipped(self):
+        student = self.students[0]
+        self.grade(student, 40)
+        self.grade(student, 0, max_marks=0)
+        self.assertEqual(self.averages(student), (Decimal('40.00'), {'MAT': Decimal('40.00')}))
+
+    def test_rebuild_matches_incremental_refresh(self):
+        for n, student in enumerate(self.students):
+            self.grade(student, 50 + n * 10)
+        before = set(StudentTermSummary.objects.values_list('student_id', 'subject_id', 'average'))
+        StudentTermSummary.objects.all().delete()
+        rebuild_all_summaries()
+        self.assertEqual(set(StudentTermSummary.objects.values_list('student_id', 'subject_id', 'average')), before)
+
+
+class BroadcastTests(SchoolTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.parent = cls.create_parent('parent', cls.students[:2])
+        cls.other_class = cls.create_class('Form2', 12)
+        cls.outsider = cls.create_student(9, cls.other_class)
+        cls.sender = User.objects.create_user('office', is_staff=True)
+
+    def broadcast(self, audience, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Communication.objects.create(sender=self.sender, subject='Closing day', message='-',
+                                                is_broadcast=True, audience=audience, **kwargs)
+
+    def fan_out_jobs(self):
+        return Job.objects.filter(task=fan_out_broadcast.task_name)
+
+    def test_saving_twice_queues_one_fan_out(self):
+        message = self.broadcast('everyone')
+        with self.captureOnCommitCallbacks(execute=True):
+            message.subject = 'Closing day (updated)'
+            message.save()
+        self.assertEqual(list(self.fan_out_jobs().values_list('args', flat=True)), [[message.pk]])
+
+    def test_nothing_is_queued_for_a_rolled_back_broadcast(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            with transaction.atomic():
+                Communication.objects.create(sender=self.sender, subject='-', message='-', is_broadcast=True,
+                                             audience='everyone')
+                transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        self.assertFalse(self.fan_out_jobs().exists())
+
+    def test_fan_out_reaches_the_audience_in_batches(self):
+        message = self.broadcast('class_parents', audience_class=self.class_obj)
+        self.assertEqual(fan_out(message, batch_size=1), 1)
+        self.assertEqual(list(message.recipients.all()), [self.parent.profile.user])
+        message.refresh_from_db()
+        self.assertIsNotNone(message.fanned_out_at)
+
+        message = self.broadcast('class_students', audience_class=self.class_obj)
+        self.assertEqual(fan_out(message, batch_size=2, max_batches=1), 2)
+        message.refresh_from_db()
+        self.assertIsNone(message.fanned_out_at)
+        self.assertEqual(fan_out(message, batch_size=2), 1)
+        self.assertEqual(set(message.recipients.all()), {student.profile.user for student in self.students})
+
+    def test_inbox_delivers_before_the_fan_out(self):
+        user = self.students[0].profile.user
+        self.assertEqual(unread_count(user), 0)
+        message = self.broadcast('students')
+        self.assertEqual(unread_count(user), 1)
+        self.assertEqual(list(inbox(user)), [message])
+        self.assertEqual(unread_count(self.parent.profile.user), 0)
+
+        # The fan-out later skips the delivery that already exists
+        fan_out(message)
+        self.assertEqual(MessageDelivery.objects.filter(message=message, user=user).count(), 1)
+
+
+class InboxTests(SchoolTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.sender = User.objects.create_user('office', is_staff=True, is_superuser=True)
+        cls.user = cls.students[0].profile.user
+        cls.messages = [
+            Communication.objects.create(sender=cls.sender, subject=f'Notice {n}', message='-') for n in range(3)
+        ]
+
+    def assertUnread(self, count):
+        self.assertEqual(unread_count(self.user), count)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user), count)
+
+    def test_mark_read(self):
+        deliver(self.messages[0], [self.user])
+        deliver(self.messages[1], [self.user.pk, self.students[1].profile.user])
+
+        self.assertEqual(mark_read(self.user, [self.messages[0].pk]), 1)
+        self.assertEqual(mark_read(self.user, [self.messages[0].pk]), 0)
+        self.assertEqual([message.read_at is not None for message in inbox(self.user)], [False, True])
+        self.assertEqual(mark_read(self.user), 1)
+        self.assertFalse(MessageDelivery.objects.filter(user=self.user, read_at__isnull=True).exists())
+        # Other recipients keep their own read state
+        self.assertEqual(unread_count(self.students[1].profile.user), 1)
+
+    def test_cached_unread_count_follows_deliveries(self):
+        self.assertUnread(0)
+        deliver(self.messages[0], [self.user])
+        self.assertUnread(1)
+
+        self.messages[1].recipients.add(self.user)
+        self.assertUnread(2)
+
+        mark_read(self.user, [self.messages[0].pk])
+        self.assertUnread(1)
+
+        delivery = MessageDelivery.objects.get(message=self.messages[1], user=self.user)
+        delivery.read_at = timezone.now()
+        delivery.save()
+        self.assertUnread(0)
+
+        self.messages[2].recipients.add(self.user)
+        self.assertUnread(1)
+        self.messages[2].recipients.remove(self.user)
+        self.assertUnread(0)
+
+    def test_admin_links_to_deliveries_instead_of_listing_them(self):
+        message = self.messages[0]
+        deliver(message, [student.profile.user for student in self.students])
+        mark_read(self.user)
+        self.client.force_login(self.sender)
+
+        response = self.client.get(reverse('admin:portal_communication_change', args=[message.pk]))
+        changelist = reverse('admin:portal_messagedelivery_changelist') + f'?message__id__exact={message.pk}'
+        self.assertContains(response, f'<a href="{changelist}">3 recipient(s), 2 unread</a>', html=True)
+        self.assertNotContains(response, 'deliveries-TOTAL_FORMS')
+
+        response = self.client.get(changelist)
+        self.assertEqual(len(response.context['cl'].result_list), 3)
+
+
+class MessageDeliveryMigrationTests(TransactionTestCase):
+    before, after = ('portal', '0002_student_term_summary'), ('portal', '0003_message_delivery')
+
+    def migrate(self, target=None):
+        executor = MigrationExecutor(connection)
+        executor.migrate([target] if target else executor.loader.graph.leaf_nodes())
+        return executor.loader.project_state([target]).apps if target else None
+
+    def test_recipients_and_read_by_become_deliveries(self):
+        old_apps = self.migrate(self.before)
+        self.addCleanup(self.migrate)
+        OldUser = old_apps.get_model('auth', 'User')
+        OldCommunication = old_apps.get_model('portal', 'Communication')
+        sender, reader, other = (OldUser.objects.create(username=name) for name in ['office', 'reader', 'other'])
+        sent = timezone.now() - datetime.timedelta(days=30)
+        message = OldCommunication.objects.create(sender=sender, subject='Closing day', message='-')
+        OldCommunication.objects.filter(pk=message.pk).update(created_at=sent)
+        message.recipients.add(reader, other)
+        message.read_by.add(reader)
+
+        self.migrate(self.after)
+        deliveries = {
+            delivery.user_id: delivery for delivery in MessageDelivery.objects.filter(message_id=message.pk)
+        }
+        self.assertEqual(set(deliveries), {reader.pk, other.pk})
+        self.assertEqual({delivery.delivered_at for delivery in deliveries.values()}, {sent})
+        self.assertEqual(deliveries[reader.pk].read_at, sent)
+        self.assertIsNone(deliveries[other.pk].read_at)
@@ -43,10 +43,17 @@ urlpatterns = [
     # Communication
     path('messages/', views.messages_inbox, name='messages_inbox'),
     path('messages/compose/', views.compose_message, name='compose_message'),
+    path('messages/mark-read/', views.mark_messages_read, name='mark_messages_read'),
     path('messages/<int:message_id>/', views.message_detail, name='message_detail'),
     
     # API endpoints for AJAX requests
     path('api/student-data/<int:student_id>/', views.api_student_data, name='api_student_data'),
     path('api/attendance-summary/<int:student_id>/', views.api_attendance_summary, name='api_attendance_summary'),
     path('api/grade-summary/<int:student_id>/', views.api_grade_summary, name='api_grade_summary'),
+    path('api/attendance/<int:class_id>/', views.api_mark_attendance, name='api_mark_attendance'),
+    path('api/students/<int:student_id>/<str:kind>/', views.api_student_records, name='api_student_records'),
+    path('api/messages/', views.api_messages, name='api_messages'),
+    
+    # Staff exports
+    path('export/<str:kind>/', views.export_data, name='export_data'),
 ]
\ No newline at end of file
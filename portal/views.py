@@ -2,11 +2,12 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponseForbidden
-from django.db.models import Q, Avg, Count, Sum
+from django.http import Http404, JsonResponse, HttpResponseForbidden
+from django.db.models import Q, Count, Sum
 from django.utils import timezone
 from django.core.paginator import Paginator
-from django.views.decorators.http import require_POST
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET, require_POST
 from django.forms.models import model_to_dict
 import json
 from datetime import datetime, timedelta
@@ -18,8 +19,23 @@ from .models import (
 )
 from .forms import (
     LoginForm, AssignmentForm, AssignmentSubmissionForm, GradeForm,
-    AttendanceForm, MessageForm, ProfileForm
+    AttendanceForm, BulkAttendanceForm, GradeImportForm, MessageForm, ProfileForm
 )
+from .api import (
+    RESOURCES, STUDENT_RESOURCES, ApiError, conditional_json, messages_queryset, page_params, student_queryset
+)
+from .access import can_view_student
+from .academic_calendar import get_current_academic_year, get_current_term
+from .attendance import mark_class_attendance
+from .exports import EXPORTS, stream_csv
+from .grade_import import SheetError, import_grades, read_sheet
+from .inbox import inbox, mark_read, unread_count
+from .services import SUBMITTED_STATUSES, family_summary, with_submission_status
+from .summaries import term_summaries
+from st_marys_school.pagination import EstimatedCountPaginator
+
+# Rejected mark sheet rows listed individually after an import
+IMPORT_ERRORS_SHOWN = 20
 
 # Utility functions
 def is_student(user):
@@ -31,11 +47,40 @@ def is_teacher(user):
 def is_parent(user):
     return hasattr(user, 'userprofile') and user.userprofile.user_type == 'parent'
 
-def get_current_term():
-    return Term.objects.filter(is_current=True).first()
+def get_selected_term(request, current_term):
+    """Term chosen via ?term=, reusing the cached current term when it is the one selected"""
+    selected_term_id = request.GET.get('term')
+    if not selected_term_id or (current_term and str(current_term.id) == selected_term_id):
+        return current_term
+    return get_object_or_404(Term, id=selected_term_id)
+
+def get_date_range(request, default_days=30):
+    """Read start_date/end_date (YYYY-MM-DD) from the query string, defaulting to the last 30 days"""
+    end_date = timezone.now().date()
+    start_date = end_date - timedelta(days=default_days)
+    
+    if request.GET.get('start_date'):
+        start_date = datetime.strptime(request.GET.get('start_date'), '%Y-%m-%d').date()
+    if request.GET.get('end_date'):
+        end_date = datetime.strptime(request.GET.get('end_date'), '%Y-%m-%d').date()
+    
+    return start_date, end_date
+
+def get_api_student(user, student_id):
+    """Return the student if ``user`` may read their data, otherwise None"""
+    if not can_view_student(user, student_id):
+        return None
+    return Student.objects.select_related('profile__user', 'current_class').filter(pk=student_id).first()
+
+def child_queryset(student_id):
+    """The student for a child_* view as a one-row queryset, with what the templates show"""
+    return Student.objects.filter(id=student_id).select_related('profile__user', 'current_class')
 
-def get_current_academic_year():
-    return AcademicYear.objects.filter(is_current=True).first()
+def get_child(request, student_id):
+    """The student for a child_* view, or None if the user may not see them"""
+    if not can_view_student(request.user, student_id):
+        return None
+    return get_object_or_404(child_queryset(student_id))
 
 # Authentication views
 def portal_login(request):
@@ -94,24 +139,24 @@ def portal_dashboard(request):
 def student_dashboard(request):
     """Student dashboard"""
     try:
-        student = Student.objects.get(profile__user=request.user)
+        student = Student.objects.select_related('profile__user', 'current_class').get(profile__user=request.user)
     except Student.DoesNotExist:
         messages.error(request, 'Student profile not found.')
         return redirect('portal:logout')
     
-    current_term = get_current_term()
+    current_term = get_current_term(request)
     
     # Get recent assignments
     recent_assignments = Assignment.objects.filter(
         class_obj=student.current_class,
         status='published'
-    ).order_by('-due_date')[:5]
+    ).select_related('subject').order_by('-due_date')[:5]
     
     # Get recent grades
     recent_grades = Grade.objects.filter(
         student=student,
         term=current_term
-    ).order_by('-date_recorded')[:5] if current_term else []
+    ).select_related('subject').order_by('-date_recorded')[:5] if current_term else []
     
     # Get attendance summary
     if current_term:
@@ -124,9 +169,7 @@ def student_dashboard(request):
         attendance_summary = {}
     
     # Get unread messages
-    unread_messages = Communication.objects.filter(
-        recipients=request.user
-    ).exclude(read_by=request.user).count()
+    unread_messages = unread_count(request.user)
     
     context = {
         'student': student,
@@ -166,14 +209,13 @@ def student_profile(request):
 def student_grades(request):
     """Student grades view"""
     student = get_object_or_404(Student, profile__user=request.user)
-    current_term = get_current_term()
+    current_term = get_current_term(request)
     
     # Get all terms for the current academic year
-    current_year = get_current_academic_year()
+    current_year = get_current_academic_year(request)
     terms = Term.objects.filter(academic_year=current_year) if current_year else []
     
-    selected_term_id = request.GET.get('term', current_term.id if current_term else None)
-    selected_term = get_object_or_404(Term, id=selected_term_id) if selected_term_id else current_term
+    selected_term = get_selected_term(request, current_term)
     
     # Get grades for selected term
     grades = Grade.objects.filter(
@@ -181,15 +223,16 @@ def student_grades(request):
         term=selected_term
     ).select_related('subject', 'teacher__profile__user').order_by('subject__name') if selected_term else []
     
-    # Calculate average
-    average = grades.aggregate(avg=Avg('marks_obtained'))['avg'] if grades else 0
+    # Precomputed weighted averages
+    overall, subject_summaries = term_summaries(student, selected_term)
     
     context = {
         'student': student,
         'grades': grades,
         'terms': terms,
         'selected_term': selected_term,
-        'average': round(average, 2) if average else 0,
+        'average': overall.average if overall else 0,
+        'subject_summaries': subject_summaries,
     }
     
     return render(request, 'portal/student/grades.html', context)
@@ -200,44 +243,29 @@ def student_assignments(request):
     """Student assignments view"""
     student = get_object_or_404(Student, profile__user=request.user)
     
-    # Get assignments for student's class
-    assignments = Assignment.objects.filter(
-        class_obj=student.current_class,
-        status='published'
-    ).select_related('subject', 'teacher__profile__user').order_by('-due_date')
+    # Get assignments for student's class, each with this student's submission attached
+    assignments = with_submission_status(
+        Assignment.objects.filter(
+            class_obj=student.current_class,
+            status='published'
+        ).select_related('subject', 'teacher__profile__user').order_by('-due_date'),
+        student
+    )
     
     # Filter by status if requested
     status_filter = request.GET.get('status', 'all')
     if status_filter == 'pending':
-        submitted_assignment_ids = AssignmentSubmission.objects.filter(
-            student=student,
-            status__in=['submitted', 'graded', 'returned']
-        ).values_list('assignment_id', flat=True)
-        assignments = assignments.exclude(id__in=submitted_assignment_ids)
+        assignments = assignments.exclude(submission_status__in=SUBMITTED_STATUSES)
     elif status_filter == 'submitted':
-        submitted_assignment_ids = AssignmentSubmission.objects.filter(
-            student=student,
-            status__in=['submitted', 'graded', 'returned']
-        ).values_list('assignment_id', flat=True)
-        assignments = assignments.filter(id__in=submitted_assignment_ids)
+        assignments = assignments.filter(submission_status__in=SUBMITTED_STATUSES)
     
     # Pagination
     paginator = Paginator(assignments, 10)
     page = request.GET.get('page')
     assignments = paginator.get_page(page)
     
-    # Get submission status for each assignment
     for assignment in assignments:
-        try:
-            submission = AssignmentSubmission.objects.get(
-                assignment=assignment,
-                student=student
-            )
-            assignment.submission_status = submission.status
-            assignment.submission = submission
-        except AssignmentSubmission.DoesNotExist:
-            assignment.submission_status = 'not_submitted'
-            assignment.submission = None
+        assignment.submission = assignment.student_submissions[0] if assignment.student_submissions else None
     
     context = {
         'student': student,
@@ -315,41 +343,19 @@ def student_attendance(request):
     """Student attendance view"""
     student = get_object_or_404(Student, profile__user=request.user)
     
-    # Get date range
-    end_date = timezone.now().date()
-    start_date = end_date - timedelta(days=30)  # Last 30 days by default
-    
-    if request.GET.get('start_date'):
-        start_date = datetime.strptime(request.GET.get('start_date'), '%Y-%m-%d').date()
-    if request.GET.get('end_date'):
-        end_date = datetime.strptime(request.GET.get('end_date'), '%Y-%m-%d').date()
+    # Get date range (last 30 days by default)
+    start_date, end_date = get_date_range(request)
     
     # Get attendance records
-    attendance_records = Attendance.objects.filter(
-        student=student,
-        date__range=[start_date, end_date]
-    ).order_by('-date')
-    
-    # Calculate statistics
-    total_days = attendance_records.count()
-    present_days = attendance_records.filter(status='present').count()
-    absent_days = attendance_records.filter(status='absent').count()
-    late_days = attendance_records.filter(status='late').count()
-    excused_days = attendance_records.filter(status='excused').count()
-    
-    attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
+    attendance_records = Attendance.objects.filter(student=student).between(start_date, end_date).order_by('-date')
     
     context = {
         'student': student,
         'attendance_records': attendance_records,
         'start_date': start_date,
         'end_date': end_date,
-        'total_days': total_days,
-        'present_days': present_days,
-        'absent_days': absent_days,
-        'late_days': late_days,
-        'excused_days': excused_days,
-        'attendance_percentage': round(attendance_percentage, 2),
+        # total/present/absent/late/excused day counts and attendance_percentage
+        **attendance_records.statistics(),
     }
     
     return render(request, 'portal/student/attendance.html', context)
@@ -378,6 +384,7 @@ def progress_report(request, term_id):
         'term': term,
         'report': report,
         'grades': grades,
+        'subject_summaries': term_summaries(student, term)[1],
     }
     
     return render(request, 'portal/student/progress_report.html', context)
@@ -388,42 +395,18 @@ def progress_report(request, term_id):
 def parent_dashboard(request):
     """Parent dashboard"""
     try:
-        parent = Parent.objects.get(profile__user=request.user)
+        parent = Parent.objects.select_related('profile__user').get(profile__user=request.user)
     except Parent.DoesNotExist:
         messages.error(request, 'Parent profile not found.')
         return redirect('portal:logout')
     
-    children = parent.children.filter(is_active=True)
-    current_term = get_current_term()
-    
-    # Get summary data for each child
-    for child in children:
-        # Recent grades
-        child.recent_grades = Grade.objects.filter(
-            student=child,
-            term=current_term
-        ).order_by('-date_recorded')[:3] if current_term else []
-        
-        # Attendance summary
-        if current_term:
-            attendance_data = Attendance.objects.filter(
-                student=child,
-                date__range=[current_term.start_date, current_term.end_date]
-            ).values('status').annotate(count=Count('id'))
-            child.attendance_summary = {item['status']: item['count'] for item in attendance_data}
-        else:
-            child.attendance_summary = {}
-        
-        # Pending assignments
-        submitted_assignment_ids = AssignmentSubmission.objects.filter(
-            student=child,
-            status__in=['submitted', 'graded', 'returned']
-        ).values_list('assignment_id', flat=True)
-        child.pending_assignments = Assignment.objects.filter(
-            class_obj=child.current_class,
-            status='published',
-            due_date__gte=timezone.now()
-        ).exclude(id__in=submitted_assignment_ids).count()
+    current_term = get_current_term(request)
+    
+    # Recent grades, attendance and pending assignments for every child in one batch
+    children = family_summary(
+        parent.children.filter(is_active=True).select_related('current_class', 'profile__user'),
+        current_term
+    )
     
     context = {
         'parent': parent,
@@ -438,15 +421,19 @@ def parent_dashboard(request):
 def child_profile(request, student_id):
     """Child profile view for parents"""
     parent = get_object_or_404(Parent, profile__user=request.user)
-    student = get_object_or_404(Student, id=student_id)
-    
-    # Ensure parent can access this child
-    if student not in parent.children.all():
+    if not can_view_student(request.user, student_id):
         return HttpResponseForbidden("You don't have access to this student's information.")
     
+    current_term = get_current_term(request)
+    children = family_summary(child_queryset(student_id), current_term)
+    if not children:
+        raise Http404('No Student matches the given query.')
+    student = children[0]
+    
     context = {
         'parent': parent,
         'student': student,
+        'current_term': current_term,
     }
     
     return render(request, 'portal/parent/child_profile.html', context)
@@ -456,25 +443,22 @@ def child_profile(request, student_id):
 def child_grades(request, student_id):
     """Child grades view for parents"""
     parent = get_object_or_404(Parent, profile__user=request.user)
-    student = get_object_or_404(Student, id=student_id)
-    
-    # Ensure parent can access this child
-    if student not in parent.children.all():
+    student = get_child(request, student_id)
+    if student is None:
         return HttpResponseForbidden("You don't have access to this student's information.")
     
-    current_term = get_current_term()
-    current_year = get_current_academic_year()
+    current_term = get_current_term(request)
+    current_year = get_current_academic_year(request)
     terms = Term.objects.filter(academic_year=current_year) if current_year else []
     
-    selected_term_id = request.GET.get('term', current_term.id if current_term else None)
-    selected_term = get_object_or_404(Term, id=selected_term_id) if selected_term_id else current_term
+    selected_term = get_selected_term(request, current_term)
     
     grades = Grade.objects.filter(
         student=student,
         term=selected_term
     ).select_related('subject', 'teacher__profile__user').order_by('subject__name') if selected_term else []
     
-    average = grades.aggregate(avg=Avg('marks_obtained'))['avg'] if grades else 0
+    overall, subject_summaries = term_summaries(student, selected_term)
     
     context = {
         'parent': parent,
@@ -482,7 +466,8 @@ def child_grades(request, student_id):
         'grades': grades,
         'terms': terms,
         'selected_term': selected_term,
-        'average': round(average, 2) if average else 0,
+        'average': overall.average if overall else 0,
+        'subject_summaries': subject_summaries,
     }
     
     return render(request, 'portal/parent/child_grades.html', context)
@@ -492,34 +477,13 @@ def child_grades(request, student_id):
 def child_attendance(request, student_id):
     """Child attendance view for parents"""
     parent = get_object_or_404(Parent, profile__user=request.user)
-    student = get_object_or_404(Student, id=student_id)
-    
-    # Ensure parent can access this child
-    if student not in parent.children.all():
+    student = get_child(request, student_id)
+    if student is None:
         return HttpResponseForbidden("You don't have access to this student's information.")
     
-    # Get date range
-    end_date = timezone.now().date()
-    start_date = end_date - timedelta(days=30)
-    
-    if request.GET.get('start_date'):
-        start_date = datetime.strptime(request.GET.get('start_date'), '%Y-%m-%d').date()
-    if request.GET.get('end_date'):
-        end_date = datetime.strptime(request.GET.get('end_date'), '%Y-%m-%d').date()
-    
-    attendance_records = Attendance.objects.filter(
-        student=student,
-        date__range=[start_date, end_date]
-    ).order_by('-date')
+    start_date, end_date = get_date_range(request)
     
-    # Calculate statistics
-    total_days = attendance_records.count()
-    present_days = attendance_records.filter(status='present').count()
-    absent_days = attendance_records.filter(status='absent').count()
-    late_days = attendance_records.filter(status='late').count()
-    excused_days = attendance_records.filter(status='excused').count()
-    
-    attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
+    attendance_records = Attendance.objects.filter(student=student).between(start_date, end_date).order_by('-date')
     
     context = {
         'parent': parent,
@@ -527,12 +491,7 @@ def child_attendance(request, student_id):
         'attendance_records': attendance_records,
         'start_date': start_date,
         'end_date': end_date,
-        'total_days': total_days,
-        'present_days': present_days,
-        'absent_days': absent_days,
-        'late_days': late_days,
-        'excused_days': excused_days,
-        'attendance_percentage': round(attendance_percentage, 2),
+        **attendance_records.statistics(),
     }
     
     return render(request, 'portal/parent/child_attendance.html', context)
@@ -542,12 +501,10 @@ def child_attendance(request, student_id):
 def child_report(request, student_id, term_id):
     """Child progress report view for parents"""
     parent = get_object_or_404(Parent, profile__user=request.user)
-    student = get_object_or_404(Student, id=student_id)
-    term = get_object_or_404(Term, id=term_id)
-    
-    # Ensure parent can access this child
-    if student not in parent.children.all():
+    student = get_child(request, student_id)
+    if student is None:
         return HttpResponseForbidden("You don't have access to this student's information.")
+    term = get_object_or_404(Term, id=term_id)
     
     try:
         report = ProgressReport.objects.get(student=student, term=term)
@@ -566,6 +523,7 @@ def child_report(request, student_id, term_id):
         'term': term,
         'report': report,
         'grades': grades,
+        'subject_summaries': term_summaries(student, term)[1],
     }
     
     return render(request, 'portal/parent/child_report.html', context)
@@ -581,7 +539,7 @@ def teacher_dashboard(request):
         messages.error(request, 'Teacher profile not found.')
         return redirect('portal:logout')
     
-    current_term = get_current_term()
+    current_term = get_current_term(request)
     
     # Get teacher's classes
     classes = Class.objects.filter(class_teacher=teacher)
@@ -615,16 +573,15 @@ def teacher_dashboard(request):
 @login_required
 def messages_inbox(request):
     """Messages inbox"""
-    messages_list = Communication.objects.filter(
-        recipients=request.user
-    ).order_by('-created_at')
+    messages_list = inbox(request.user)
     
-    paginator = Paginator(messages_list, 20)
+    paginator = EstimatedCountPaginator(messages_list, 20)
     page = request.GET.get('page')
     messages_list = paginator.get_page(page)
     
     context = {
-        'messages': messages_list,
+        # Not 'messages', which base.html uses for the flash messages
+        'inbox': messages_list,
     }
     
     return render(request, 'portal/messages/inbox.html', context)
@@ -632,14 +589,14 @@ def messages_inbox(request):
 @login_required
 def message_detail(request, message_id):
     """Message detail view"""
-    message = get_object_or_404(Communication, id=message_id)
+    message = get_object_or_404(Communication.objects.select_related('sender'), id=message_id)
     
     # Check if user is recipient
-    if request.user not in message.recipients.all():
+    if not message.deliveries.filter(user=request.user).exists():
         return HttpResponseForbidden("You don't have access to this message.")
     
     # Mark as read
-    message.read_by.add(request.user)
+    mark_read(request.user, [message.pk])
     
     context = {
         'message': message,
@@ -647,30 +604,27 @@ def message_detail(request, message_id):
     
     return render(request, 'portal/messages/detail.html', context)
 
+@login_required
+@require_POST
+def mark_messages_read(request):
+    """Mark the selected messages (or, with 'all', the whole inbox) as read"""
+    if request.POST.get('all'):
+        message_ids = None
+    else:
+        message_ids = [value for value in request.POST.getlist('message') if value.isdigit()]
+    updated = mark_read(request.user, message_ids)
+    messages.success(request, f'{updated} message(s) marked as read.')
+    return redirect('portal:messages_inbox')
+
 # API endpoints
 @login_required
 def api_student_data(request, student_id):
     """API endpoint for student data"""
     # Check permissions
-    if is_student(request.user):
-        student = get_object_or_404(Student, profile__user=request.user)
-        if student.id != student_id:
-            return JsonResponse({'error': 'Permission denied'}, status=403)
-    elif is_parent(request.user):
-        parent = get_object_or_404(Parent, profile__user=request.user)
-        student = get_object_or_404(Student, id=student_id)
-        if student not in parent.children.all():
-            return JsonResponse({'error': 'Permission denied'}, status=403)
-    elif is_teacher(request.user):
-        teacher = get_object_or_404(Teacher, profile__user=request.user)
-        student = get_object_or_404(Student, id=student_id)
-        # Check if teacher teaches this student's class
-        if student.current_class not in Class.objects.filter(class_teacher=teacher):
-            return JsonResponse({'error': 'Permission denied'}, status=403)
-    else:
+    student = get_api_student(request.user, student_id)
+    if not student:
         return JsonResponse({'error': 'Permission denied'}, status=403)
     
-    student = get_object_or_404(Student, id=student_id)
     data = {
         'name': student.full_name,
         'admission_number': student.admission_number,
@@ -681,6 +635,41 @@ def api_student_data(request, student_id):
     
     return JsonResponse(data)
 
+@login_required
+@require_GET
+@gzip_page
+def api_student_records(request, student_id, kind):
+    """
+    A student's grades, attendance or assignments, newest first, one page at a time.
+    
+    ?cursor= (the previous page's "next"), ?limit=, ?fields=id,title,...;
+    see portal.api for the filters each kind accepts.
+    """
+    if kind not in STUDENT_RESOURCES:
+        return JsonResponse({'error': f'Unknown resource: {kind}'}, status=404)
+    student = get_api_student(request.user, student_id)
+    if not student:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    
+    try:
+        cursor, limit, fields = page_params(request.GET)
+        data = RESOURCES[kind].page(student_queryset(kind, student, request.GET), cursor, limit, fields)
+    except ApiError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return conditional_json(request, data)
+
+@login_required
+@require_GET
+@gzip_page
+def api_messages(request):
+    """The user's messages, newest delivery first; ?unread=1 for unread only"""
+    try:
+        cursor, limit, fields = page_params(request.GET)
+        data = RESOURCES['messages'].page(messages_queryset(request.user, request.GET), cursor, limit, fields)
+    except ApiError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return conditional_json(request, data)
+
 # Admin dashboard (basic)
 @login_required
 def admin_dashboard(request):
@@ -692,7 +681,7 @@ def admin_dashboard(request):
     total_students = Student.objects.filter(is_active=True).count()
     total_teachers = Teacher.objects.filter(is_active=True).count()
     total_classes = Class.objects.count()
-    current_term = get_current_term()
+    current_term = get_current_term(request)
     
     context = {
         'total_students': total_students,
@@ -703,6 +692,38 @@ def admin_dashboard(request):
     
     return render(request, 'portal/admin/dashboard.html', context)
 
+@login_required
+def export_data(request, kind):
+    """
+    Staff CSV export of grades, attendance, students or submissions.
+    
+    Optional filters: ?class=<id>, ?term=<id> (grades), ?start_date= and
+    ?end_date= (attendance, YYYY-MM-DD).
+    """
+    if not request.user.is_staff:
+        return HttpResponseForbidden("Access denied.")
+    export = EXPORTS.get(kind)
+    if export is None:
+        return JsonResponse({'error': f'Unknown export: {kind}'}, status=404)
+    
+    queryset = export.model.objects.all()
+    class_id = request.GET.get('class', '')
+    term_id = request.GET.get('term', '')
+    if any(value and not value.isdigit() for value in (class_id, term_id)):
+        return JsonResponse({'error': 'class and term must be ids'}, status=400)
+    if class_id:
+        queryset = queryset.filter(**{export.class_field: class_id})
+    if kind == 'grades' and term_id:
+        queryset = queryset.filter(term_id=term_id)
+    if kind == 'attendance' and (request.GET.get('start_date') or request.GET.get('end_date')):
+        try:
+            start_date, end_date = get_date_range(request)
+        except ValueError:
+            return JsonResponse({'error': 'Dates must be in YYYY-MM-DD format'}, status=400)
+        queryset = queryset.between(start_date, end_date)
+    
+    return stream_csv(export, queryset)
+
 # Placeholder views for remaining teacher functions
 @login_required
 @user_passes_test(is_teacher, login_url='portal:login')
@@ -743,26 +764,179 @@ def grade_submission(request, submission_id):
 @login_required
 @user_passes_test(is_teacher, login_url='portal:login')
 def teacher_grades(request):
-    """Teacher grades view - placeholder"""
-    return render(request, 'portal/teacher/grades.html', {})
+    """Grades recorded by the teacher, newest first"""
+    teacher = get_object_or_404(Teacher, profile__user=request.user)
+    
+    grades = Grade.objects.filter(teacher=teacher).select_related(
+        'student__profile__user', 'subject', 'term'
+    ).order_by('-date_recorded', '-created_at')
+    
+    current_term = get_current_term(request)
+    selected_term = get_selected_term(request, current_term)
+    if selected_term:
+        grades = grades.filter(term=selected_term)
+    
+    paginator = Paginator(grades, 50)
+    page = paginator.get_page(request.GET.get('page'))
+    
+    context = {
+        'teacher': teacher,
+        'grades': page,
+        'selected_term': selected_term,
+        'terms': Term.objects.select_related('academic_year').order_by('-start_date'),
+    }
+    
+    return render(request, 'portal/teacher/grades.html', context)
 
 @login_required
 @user_passes_test(is_teacher, login_url='portal:login')
 def add_grade(request):
-    """Add grade view - placeholder"""
-    return render(request, 'portal/teacher/add_grade.html', {})
+    """Record a single grade, or import a whole class mark sheet"""
+    teacher = get_object_or_404(Teacher, profile__user=request.user)
+    grade_form = GradeForm(teacher=teacher)
+    import_form = GradeImportForm(teacher=teacher, initial={'term': get_current_term(request)})
+    
+    if request.method == 'POST' and 'sheet' in request.FILES:
+        import_form = GradeImportForm(request.POST, request.FILES, teacher=teacher)
+        if import_form.is_valid():
+            data = import_form.cleaned_data
+            try:
+                import_result = import_grades(
+                    read_sheet(data['sheet']),
+                    class_obj=data['class_obj'],
+                    subject=data['subject'],
+                    term=data['term'],
+                    teacher=teacher,
+                    grade_type=data['grade_type'],
+                    title=data['title'],
+                    max_marks=data['max_marks'],
+                    weight=data['weight'],
+                )
+            except SheetError as exc:
+                import_form.add_error('sheet', str(exc))
+            else:
+                messages.success(
+                    request, f"Imported {import_result['created']} new and {import_result['updated']} updated grades."
+                )
+                errors = import_result['errors']
+                for error in errors[:IMPORT_ERRORS_SHOWN]:
+                    messages.warning(
+                        request, f"Row {error['row']} ({error['admission_number'] or 'no admission number'}): "
+                                 f"{error['error']}"
+                    )
+                if len(errors) > IMPORT_ERRORS_SHOWN:
+                    messages.warning(request, f'{len(errors) - IMPORT_ERRORS_SHOWN} more rows were skipped.')
+                return redirect('portal:add_grade')
+    elif request.method == 'POST':
+        grade_form = GradeForm(request.POST, teacher=teacher)
+        if grade_form.is_valid():
+            grade = grade_form.save(commit=False)
+            grade.teacher = teacher
+            grade.save()
+            messages.success(request, 'Grade saved.')
+            return redirect('portal:teacher_grades')
+    
+    context = {
+        'teacher': teacher,
+        'grade_form': grade_form,
+        'import_form': import_form,
+    }
+    
+    return render(request, 'portal/teacher/add_grade.html', context)
 
 @login_required
 @user_passes_test(is_teacher, login_url='portal:login')
 def teacher_attendance(request):
-    """Teacher attendance view - placeholder"""
-    return render(request, 'portal/teacher/attendance.html', {})
+    """Classes the teacher can mark, with how many students are marked today"""
+    teacher = get_object_or_404(Teacher, profile__user=request.user)
+    today = timezone.now().date()
+    
+    classes = BulkAttendanceForm(teacher=teacher).fields['class_obj'].queryset.annotate(
+        active_students=Count('students', filter=Q(students__is_active=True), distinct=True),
+        marked_today=Count(
+            'students__attendance_records',
+            filter=Q(students__is_active=True, students__attendance_records__date=today),
+            distinct=True
+        ),
+    )
+    
+    context = {
+        'teacher': teacher,
+        'classes': classes,
+        'today': today,
+    }
+    
+    return render(request, 'portal/teacher/attendance.html', context)
 
 @login_required
 @user_passes_test(is_teacher, login_url='portal:login')
 def mark_attendance(request, class_id):
-    """Mark attendance view - placeholder"""
-    return render(request, 'portal/teacher/mark_attendance.html', {})
+    """Mark a whole class roster for one day"""
+    teacher = get_object_or_404(Teacher, profile__user=request.user)
+    data = request.POST.copy() if request.method == 'POST' else {
+        'date': request.GET.get('date') or timezone.now().date()
+    }
+    # The class always comes from the URL, never from the submitted form
+    data['class_obj'] = class_id
+    form = BulkAttendanceForm(data, teacher=teacher)
+    if not form.is_valid():
+        if 'class_obj' in form.errors:
+            return HttpResponseForbidden("You don't have access to this class.")
+        messages.error(request, 'Please choose a valid date.')
+        return redirect('portal:teacher_attendance')
+    
+    class_obj = form.cleaned_data['class_obj']
+    date = form.cleaned_data['date']
+    students = class_obj.students.filter(is_active=True).select_related('profile__user').order_by(
+        'profile__user__last_name', 'profile__user__first_name'
+    )
+    
+    submitted, errors = {}, {}
+    if request.method == 'POST':
+        rows = [
+            {
+                'student': student.pk,
+                'status': request.POST.get(f'status_{student.pk}', 'present'),
+                'time_in': request.POST.get(f'time_in_{student.pk}', ''),
+                'time_out': request.POST.get(f'time_out_{student.pk}', ''),
+                'notes': request.POST.get(f'notes_{student.pk}', ''),
+            }
+            for student in students
+        ]
+        saved, results = mark_class_attendance(class_obj, date, rows, marked_by=teacher)
+        if saved:
+            messages.success(request, f'Attendance saved for {len(results)} students in {class_obj.display_name}.')
+            return redirect('portal:teacher_attendance')
+        messages.error(request, 'Some entries are invalid; nothing was saved.')
+        submitted = {row['student']: row for row in rows}
+        errors = {result['student']: result['errors'] for result in results if result.get('errors')}
+    
+    records = {
+        record.student_id: record
+        for record in Attendance.objects.filter(student__in=students, date=date)
+    }
+    for student in students:
+        record = records.get(student.pk)
+        student.attendance_record = record
+        # Redisplay what was submitted, else the day's saved record
+        student.entry = submitted.get(student.pk) or {
+            'status': record.status if record else 'present',
+            'time_in': record.time_in.strftime('%H:%M') if record and record.time_in else '',
+            'time_out': record.time_out.strftime('%H:%M') if record and record.time_out else '',
+            'notes': record.notes if record else '',
+        }
+        student.errors = [error for field_errors in errors.get(student.pk, {}).values() for error in field_errors]
+    
+    context = {
+        'teacher': teacher,
+        'class_obj': class_obj,
+        'date': date,
+        'form': form,
+        'students': students,
+        'status_choices': Attendance.STATUS_CHOICES,
+    }
+    
+    return render(request, 'portal/teacher/mark_attendance.html', context)
 
 @login_required
 def compose_message(request):
@@ -771,10 +945,59 @@ def compose_message(request):
 
 @login_required
 def api_attendance_summary(request, student_id):
-    """API endpoint for attendance summary - placeholder"""
-    return JsonResponse({'status': 'placeholder'})
+    """API endpoint for attendance summary"""
+    student = get_api_student(request.user, student_id)
+    if not student:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    
+    try:
+        start_date, end_date = get_date_range(request)
+    except ValueError:
+        return JsonResponse({'error': 'Dates must be in YYYY-MM-DD format'}, status=400)
+    
+    data = {
+        'student_id': student.id,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        **Attendance.objects.filter(student=student).between(start_date, end_date).statistics(),
+    }
+    
+    return JsonResponse(data)
 
 @login_required
 def api_grade_summary(request, student_id):
     """API endpoint for grade summary - placeholder"""
-    return JsonResponse({'status': 'placeholder'})
\ No newline at end of file
+    return JsonResponse({'status': 'placeholder'})
+
+@login_required
+@user_passes_test(is_teacher, login_url='portal:login')
+@require_POST
+def api_mark_attendance(request, class_id):
+    """
+    Bulk attendance capture for one class and day.
+    
+    Expects JSON: {"date": "YYYY-MM-DD", "records": [{"student": 1, "status": "present",
+    "time_in": "07:45", "time_out": "", "notes": ""}, ...]}
+    """
+    teacher = get_object_or_404(Teacher, profile__user=request.user)
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Request body must be JSON.'}, status=400)
+    if not isinstance(payload, dict) or not isinstance(payload.get('records'), list):
+        return JsonResponse({'error': 'Expected an object with a "records" list.'}, status=400)
+    
+    form = BulkAttendanceForm({'class_obj': class_id, 'date': payload.get('date')}, teacher=teacher)
+    if not form.is_valid():
+        if 'class_obj' in form.errors:
+            return JsonResponse({'error': 'Permission denied'}, status=403)
+        return JsonResponse({'error': 'Invalid date. Use YYYY-MM-DD.'}, status=400)
+    
+    saved, results = mark_class_attendance(
+        form.cleaned_data['class_obj'], form.cleaned_data['date'], payload['records'], marked_by=teacher
+    )
+    return JsonResponse({
+        'saved': saved,
+        'date': form.cleaned_data['date'].isoformat(),
+        'results': results,
+    }, status=200 if saved else 400)
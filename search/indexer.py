@@ -0,0 +1,174 @@
+"""
+Site-wide search over an inverted index
+
+Every searchable row (see search.sources) is stored once as a
+SearchDocument, and each distinct term in it as a SearchPosting carrying a
+weight (title occurrences count TITLE_WEIGHT times). Postings are kept
+current by post_save / post_delete signals, so a query never touches the
+content tables: it reads the posting lists of at most MAX_QUERY_TERMS
+terms through the (term, document) index, ranks the documents in SQL and
+loads the top ``limit`` of them. The cost depends on how many documents
+contain the query terms, not on how much content the site holds, and
+stop words are never indexed so no posting list covers everything.
+
+`python manage.py rebuild_search_index` (run on every deploy) catches up on
+changes the signals cannot see, such as bulk updates and raw SQL.
+"""
+import hashlib
+import re
+from collections import Counter
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Max, Q, Sum, Value, When
+from django.db.models.signals import post_delete, post_save
+
+from .models import SearchDocument, SearchPosting
+from .sources import SOURCES
+
+TITLE_WEIGHT = 5
+MAX_QUERY_TERMS = 6
+MAX_TERM_LENGTH = 40
+MIN_PREFIX_LENGTH = 2
+SNIPPET_LENGTH = 200
+
+STOP_WORDS = frozenset(
+    'a an and are as at be but by for from has have in is it its of on or that the '
+    'this to was were will with'.split()
+)
+
+_sources = {source.model_label: source for source in SOURCES}
+
+
+def tokenize(text):
+    """Lower-cased words worth indexing, in order of appearance"""
+    return [
+        word[:MAX_TERM_LENGTH]
+        for word in re.findall(r'\w+', text.lower())
+        if len(word) > 1 and word not in STOP_WORDS
+    ]
+
+
+def get_source(model):
+    return _sources.get(model._meta.label)
+
+
+def _content_type(instance):
+    return ContentType.objects.get_for_model(instance, for_concrete_model=False)
+
+
+def index_object(instance):
+    """Add, refresh or (if it is no longer public) remove one object"""
+    source = get_source(type(instance))
+    document = source.document(instance)
+    if document is None:
+        remove_object(instance)
+        return
+
+    text = f"{document['title']}\n{document['body']}"
+    checksum = hashlib.md5(f"{text}\n{document['url']}".encode()).hexdigest()
+    content_type = _content_type(instance)
+
+    existing = SearchDocument.objects.filter(
+        content_type=content_type, object_id=instance.pk
+    ).values_list('checksum', flat=True).first()
+    if existing == checksum:
+        return
+
+    weights = Counter(tokenize(document['body']))
+    for term in tokenize(document['title']):
+        weights[term] += TITLE_WEIGHT
+
+    with transaction.atomic():
+        search_document, _ = SearchDocument.objects.update_or_create(
+            content_type=content_type,
+            object_id=instance.pk,
+            defaults={
+                'kind': source.kind,
+                'title': document['title'][:300],
+                'snippet': ' '.join(document['body'].split())[:SNIPPET_LENGTH],
+                'url': document['url'],
+                'checksum': checksum,
+            },
+        )
+        search_document.postings.all().delete()
+        SearchPosting.objects.bulk_create([
+            SearchPosting(term=term, document=search_document, weight=weight)
+            for term, weight in weights.items()
+        ])
+
+
+def remove_object(instance):
+    SearchDocument.objects.filter(content_type=_content_type(instance), object_id=instance.pk).delete()
+
+
+def _on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(instance)
+
+
+def _on_delete(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+def connect_signals():
+    for source in SOURCES:
+        uid = f'search:{source.model_label}'
+        post_save.connect(_on_save, sender=source.model, dispatch_uid=uid)
+        post_delete.connect(_on_delete, sender=source.model, dispatch_uid=uid)
+
+
+def rebuild_index():
+    """
+    Bring the whole index up to date; returns the number of documents indexed.
+
+    Unchanged documents are skipped by checksum and documents whose object is
+    gone or no longer public are dropped, so this is cheap to run on deploy.
+    """
+    for source in SOURCES:
+        content_type = ContentType.objects.get_for_model(source.model, for_concrete_model=False)
+        public_ids = set()
+        for instance in source.public_objects().iterator():
+            index_object(instance)
+            public_ids.add(instance.pk)
+        SearchDocument.objects.filter(content_type=content_type).exclude(object_id__in=public_ids).delete()
+    return SearchDocument.objects.count()
+
+
+def search(query, limit=20, prefix=False):
+    """
+    Documents containing every word of ``query``, best match first.
+
+    With ``prefix`` the last word only has to start a term (for typeahead).
+    Each document gets a ``score`` attribute.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+
+    partial = None
+    if prefix and re.search(r'\w$', query):
+        partial = terms.pop()
+        if len(partial) < MIN_PREFIX_LENGTH:
+            return []
+
+    match = Q(term__in=terms)
+    matched = Count('term', filter=Q(term__in=terms), distinct=True) if terms else Value(0)
+    if partial:
+        # Range rather than startswith so the term index is used on every database
+        is_prefix = Q(term__gte=partial, term__lt=partial + '\uffff')
+        match = match | is_prefix if terms else is_prefix
+        matched = matched + Max(Case(When(is_prefix, then=Value(1)), default=Value(0), output_field=IntegerField()))
+
+    ranked = SearchPosting.objects.filter(match).values('document').annotate(
+        matched=matched, score=Sum('weight')
+    ).filter(matched=len(terms) + bool(partial)).order_by('-score', '-document')[:limit]
+
+    scores = {row['document']: row['score'] for row in ranked}
+    documents = SearchDocument.objects.in_bulk(list(scores))
+    results = []
+    for document_id, score in scores.items():
+        document = documents[document_id]
+        document.score = score
+        results.append(document)
+    return results
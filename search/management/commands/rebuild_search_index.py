@@ -0,0 +1,14 @@
+"""
+Management command to rebuild the site-wide search index
+"""
+from django.core.management.base import BaseCommand
+
+from search.indexer import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Brings the site-wide search index up to date with all public content'
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} documents'))
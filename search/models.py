@@ -0,0 +1,31 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """One searchable public page (article, event, download, staff member, ...)"""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    kind = models.CharField(max_length=50)
+    title = models.CharField(max_length=300)
+    snippet = models.CharField(max_length=300, blank=True)
+    url = models.CharField(max_length=500)
+    checksum = models.CharField(max_length=32, help_text='Hash of the indexed text; unchanged documents are not re-indexed')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind}: {self.title}"
+
+    class Meta:
+        unique_together = ['content_type', 'object_id']
+
+
+class SearchPosting(models.Model):
+    """Inverted index entry: ``term`` occurs in ``document`` with the given weight"""
+    term = models.CharField(max_length=40)
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='postings')
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        # Its index also serves exact and range (prefix) lookups on term
+        unique_together = ['term', 'document']
@@ -0,0 +1,95 @@
+"""
+What the site search indexes
+
+Each Source maps a model to the searchable document for one of its rows.
+document() returns None for rows that should not be found (unpublished,
+inactive), which removes them from the index.
+"""
+from django.urls import reverse
+from django.utils.html import strip_tags
+
+
+class Source:
+    def __init__(self, model_label, kind, public_filter, document):
+        self.model_label = model_label
+        self.kind = kind
+        self.public_filter = public_filter
+        self.document = document
+
+    @property
+    def model(self):
+        from django.apps import apps
+        return apps.get_model(self.model_label)
+
+    def public_objects(self):
+        return self.model._default_manager.filter(**self.public_filter)
+
+
+def news_article(article):
+    if not article.is_published:
+        return None
+    return {
+        'title': article.title,
+        'body': ' '.join([article.subtitle, article.tags, article.excerpt, strip_tags(article.content)]),
+        'url': article.get_absolute_url(),
+    }
+
+
+def announcement(item):
+    if not item.published:
+        return None
+    return {
+        'title': item.title,
+        'body': strip_tags(item.content),
+        'url': reverse('events:news_detail', kwargs={'news_id': item.pk}),
+    }
+
+
+def school_event(event):
+    if not event.published:
+        return None
+    return {
+        'title': event.title,
+        'body': ' '.join([event.get_event_type_display(), event.location, strip_tags(event.description)]),
+        'url': reverse('events:event_detail', kwargs={'event_id': event.pk}),
+    }
+
+
+def downloadable_file(download):
+    if not download.published or not download.file:
+        return None
+    return {
+        'title': download.title,
+        'body': ' '.join([download.get_category_display(), download.description]),
+        'url': download.file.url,
+    }
+
+
+def teacher_profile(teacher):
+    if not teacher.is_active:
+        return None
+    return {
+        'title': teacher.name,
+        'body': ' '.join([teacher.position, teacher.get_department_display(), teacher.subjects, teacher.bio]),
+        'url': reverse('faculty:faculty_list'),
+    }
+
+
+def faculty_member(member):
+    if not member.is_active:
+        return None
+    return {
+        'title': member.full_name,
+        'body': ' '.join([member.get_position_display(), member.subjects_taught, member.bio]),
+        'url': reverse('faculty:faculty_list'),
+    }
+
+
+SOURCES = [
+    Source('news.NewsArticle', 'News', {'is_published': True}, news_article),
+    Source('admin_portal.NewsAnnouncement', 'Announcement', {'published': True}, announcement),
+    Source('admin_portal.SchoolEvent', 'Event', {'published': True}, school_event),
+    Source('admin_portal.DownloadableFile', 'Download', {'published': True}, downloadable_file),
+    Source('admin_portal.TeacherProfile', 'Staff', {'is_active': True}, teacher_profile),
+    Source('faculty.Faculty', 'Staff', {'is_active': True}, faculty_member),
+]
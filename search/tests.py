@@ -0,0 +1,74 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from admin_portal.models import NewsAnnouncement, SchoolEvent
+from faculty.models import Faculty
+from news.models import NewsArticle, NewsCategory
+
+from .indexer import rebuild_index, search
+from .models import SearchDocument, SearchPosting
+
+
+class SiteSearchTests(TestCase):
+    def setUp(self):
+        self.event = SchoolEvent.objects.create(
+            title='Football Tournament', event_type='sports',
+            description='Inter-house football finals.', start_date=datetime.date(2025, 3, 1),
+        )
+        self.announcement = NewsAnnouncement.objects.create(
+            title='Term Dates', content='Opening day follows the football tournament.'
+        )
+        self.teacher = Faculty.objects.create(
+            first_name='Jane', last_name='Wafula', position='teacher', subjects_taught='Chemistry, Biology'
+        )
+
+    def titles(self, query, **kwargs):
+        return [document.title for document in search(query, **kwargs)]
+
+    def test_results_span_models_and_rank_titles_first(self):
+        self.assertEqual(self.titles('football'), ['Football Tournament', 'Term Dates'])
+        self.assertEqual(self.titles('chemistry'), ['Jane Wafula'])
+        self.assertEqual(self.titles('football opening'), ['Term Dates'])
+        self.assertEqual(self.titles('the'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.event.published = False
+        self.event.save()
+        self.assertEqual(self.titles('football'), ['Term Dates'])
+
+        self.announcement.delete()
+        self.assertEqual(self.titles('football'), [])
+
+        author = User.objects.create_user('editor', password='x')
+        category = NewsCategory.objects.create(name='Sports')
+        NewsArticle.objects.create(
+            title='Football Report', content='<p>We won</p>', category=category, author=author, is_published=True
+        )
+        self.assertEqual(self.titles('football'), ['Football Report'])
+
+    def test_unchanged_objects_are_not_reindexed(self):
+        postings = list(SearchPosting.objects.values_list('pk', flat=True))
+        self.teacher.save()
+        self.assertEqual(list(SearchPosting.objects.values_list('pk', flat=True)), postings)
+
+    def test_rebuild_drops_stale_documents(self):
+        SchoolEvent.objects.filter(pk=self.event.pk).update(published=False)
+        self.assertEqual(rebuild_index(), 2)
+        self.assertFalse(SearchDocument.objects.filter(title='Football Tournament').exists())
+
+    def test_typeahead_matches_prefix_of_last_word(self):
+        self.assertEqual(self.titles('tourn', prefix=True), ['Football Tournament', 'Term Dates'])
+        self.assertEqual(self.titles('opening foot', prefix=True), ['Term Dates'])
+        self.assertEqual(self.titles('f', prefix=True), [])
+
+        response = self.client.get(reverse('search:suggest'), {'q': 'chem'})
+        self.assertEqual(response.json()['results'], [
+            {'title': 'Jane Wafula', 'kind': 'Staff', 'url': reverse('faculty:faculty_list')}
+        ])
+
+    def test_search_page(self):
+        response = self.client.get(reverse('search:site_search'), {'q': 'football'})
+        self.assertContains(response, 'Football Tournament')
@@ -0,0 +1,34 @@
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from .indexer import search
+
+RESULTS_LIMIT = 50
+SUGGESTIONS_LIMIT = 8
+
+
+def site_search(request):
+    """Search the whole public site"""
+    query = request.GET.get('q', '').strip()
+    results = search(query, limit=RESULTS_LIMIT) if query else []
+
+    context = {
+        'query': query,
+        'results': results,
+        'page_title': f'Search results for "{query}"' if query else 'Search',
+    }
+    return render(request, 'search/results.html', context)
+
+
+def suggest(request):
+    """Typeahead: the best matches for what has been typed so far"""
+    query = request.GET.get('q', '').strip()
+    results = search(query, limit=SUGGESTIONS_LIMIT, prefix=True) if query else []
+
+    return JsonResponse({
+        'query': query,
+        'results': [
+            {'title': document.title, 'kind': document.kind, 'url': document.url}
+            for document in results
+        ],
+    })
@@ -0,0 +1,69 @@
+"""
+Cache configuration for St. Mary's Nyakhobi Senior School
+
+Builds the CACHES setting for the backend chosen per deployment. Every
+backend gets the same set of named aliases so application code never has to
+know which one is active:
+
+    default    - general purpose
+    pages      - rendered pages and template fragments
+    querysets  - small, rarely changing query results (current term, ...)
+    sessions   - session data (used by the cached_db session engine)
+
+Backends:
+    locmem    - per-process memory; development and tests only
+    file      - one sub-directory per alias under CACHE_DIR
+    database  - one table per alias, created by `manage.py createcachetable`
+    redis     - a Redis-compatible server at CACHE_URL. The aliases share
+                one logical database, told apart by KEY_PREFIX, so
+                cache.clear() on any alias flushes all of them. Use
+                `manage.py manage_cache clear --alias ...`, which deletes
+                only that alias's keys.
+"""
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'database': 'django.core.cache.backends.db.DatabaseCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+# Alias name -> default timeout in seconds
+CACHE_ALIASES = {
+    'default': 300,
+    'pages': 600,
+    'querysets': 60 * 60,
+    'sessions': 60 * 60,
+}
+
+
+def build_caches(backend, url='', directory=None, key_prefix='stmarys', timeouts=None):
+    """Return a CACHES dict with every alias in CACHE_ALIASES configured for ``backend``"""
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(
+            f"Unknown CACHE_BACKEND '{backend}'. Choose one of: {', '.join(CACHE_BACKENDS)}"
+        )
+    if backend == 'redis' and not url:
+        raise ValueError('CACHE_BACKEND=redis requires CACHE_URL, e.g. redis://localhost:6379/1')
+    if backend == 'file' and not directory:
+        raise ValueError('CACHE_BACKEND=file requires a cache directory')
+
+    timeouts = {**CACHE_ALIASES, **(timeouts or {})}
+    caches = {}
+    for alias, timeout in timeouts.items():
+        if backend == 'locmem':
+            location = f'{key_prefix}-{alias}'
+        elif backend == 'file':
+            location = str(directory / alias)
+        elif backend == 'database':
+            location = f'cache_{alias}'
+        else:
+            location = url
+
+        caches[alias] = {
+            'BACKEND': CACHE_BACKENDS[backend],
+            'LOCATION': location,
+            'TIMEOUT': timeout,
+            'KEY_PREFIX': f'{key_prefix}:{alias}',
+        }
+    return caches
@@ -0,0 +1,127 @@
+"""
+Full-page caching for the public marketing pages
+
+Anonymous GET requests to a decorated view are served from the 'pages'
+cache and answered with ETag / Last-Modified headers, so repeat visitors
+get a 304 without the view running at all.
+
+Each page declares the models it renders. Every model has a version stamp
+(the time it last changed) in the cache; the stamps are part of the page's
+cache key and ETag, and saving or deleting a row bumps its model's stamp.
+Admin edits therefore show up on the next request without anything having
+to find and delete the affected pages.
+
+Stamps live in the cache too, alongside a site-wide generation stamp.
+new_page_generation() runs on every deploy (it is one of the
+CACHE_WARMERS), so pages rendered with the previous release's templates
+and their ETags stop matching without clearing the cache.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.contrib import messages
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+PAGE_CACHE_ALIAS = 'pages'
+
+# Covers pages that depend on no model, e.g. after a deploy changes templates
+GENERATION_KEY = 'page_cache:generation'
+
+
+def _version_key(model):
+    return f'page_cache:model:{model._meta.label_lower}'
+
+
+def bump_model_version(sender, **kwargs):
+    """Signal receiver: mark ``sender`` as changed now"""
+    caches[PAGE_CACHE_ALIAS].set(_version_key(sender), time.time(), None)
+
+
+def new_page_generation():
+    """Invalidate every cached page and ETag at once, e.g. after a deploy"""
+    caches[PAGE_CACHE_ALIAS].set(GENERATION_KEY, time.time(), None)
+
+
+def watch_models(*models):
+    """Bump the version stamp of each model whenever one of its rows is saved or deleted"""
+    for model in models:
+        uid = f'page_cache:{model._meta.label_lower}'
+        post_save.connect(bump_model_version, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(bump_model_version, sender=model, weak=False, dispatch_uid=uid)
+
+
+def get_model_versions(models):
+    """
+    Return the site-wide generation stamp followed by each model's version stamp.
+
+    Any stamp not in the cache yet (cold cache, eviction, after a clear) is
+    started at the current time.
+    """
+    cache = caches[PAGE_CACHE_ALIAS]
+    keys = [GENERATION_KEY] + [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        now = time.time()
+        for key in missing:
+            cache.add(key, now, None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, 0) for key in keys]
+
+
+def _is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+        return False
+    # Never cache (or skip) a page that should display one-off flash messages
+    return not len(messages.get_messages(request))
+
+
+def cache_public_page(*models, timeout=DEFAULT_TIMEOUT):
+    """
+    Cache a public view for anonymous visitors, keyed on the models it renders.
+
+    Usage:
+        @cache_public_page(SchoolInfo, HomePageSlider)
+        def home(request): ...
+    """
+    watch_models(*models)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            versions = get_model_versions(models)
+            fingerprint = hashlib.md5(
+                f'{request.get_full_path()}|{versions}'.encode()
+            ).hexdigest()
+            etag = quote_etag(fingerprint)
+            last_modified = int(max(versions))
+
+            # Revalidation from the browser: answer 304 without rendering
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                return response
+
+            cache = caches[PAGE_CACHE_ALIAS]
+            cache_key = f'page_cache:page:{fingerprint}'
+            response = cache.get(cache_key)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200 or response.streaming or response.cookies:
+                    return response
+                cache.set(cache_key, response, timeout)
+
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, max_age=0, must_revalidate=True)
+            return response
+        return wrapper
+    return decorator
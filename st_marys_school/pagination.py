@@ -0,0 +1,120 @@
+"""
+A paginator that estimates large counts instead of running COUNT(*)
+
+Django's Paginator (and the admin changelist, which uses it) counts every
+matching row on every page view. On PostgreSQL that is a full scan of the
+filtered table, and tables such as Attendance grow by students x school
+days every year. EstimatedCountPaginator asks the planner instead:
+
+* an unfiltered queryset uses the table's ``pg_class.reltuples``;
+* a filtered one uses the row estimate from ``EXPLAIN``.
+
+Estimates under ``exact_below`` rows are replaced by an exact count, since
+small counts are cheap and a wrong page total there is noticeable. Other
+databases (SQLite in development and tests) always count exactly.
+
+The estimate is corrected as pages are read. A page with fewer rows than
+``per_page`` fixes the real total. A full page at or past the estimated end
+adds one more page. Asking for a page past the real end falls back to an
+exact count. ``count_is_estimate`` tells templates to say "about", as
+includes/pagination.html and the admin's pagination.html do.
+"""
+import json
+
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+ESTIMATE_EXACT_BELOW = 10_000
+
+
+class EstimatedCountPaginator(Paginator):
+    exact_below = ESTIMATE_EXACT_BELOW
+
+    def __init__(self, *args, exact_below=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if exact_below is not None:
+            self.exact_below = exact_below
+        self.count_is_estimate = False
+
+    def estimate(self):
+        """The planner's row estimate for ``object_list``, or None where there is none"""
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        with connection.cursor() as cursor:
+            query = queryset.query
+            if not query.where and not query.distinct and not query.combinator:
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                               [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+                # reltuples is -1 until the table has been vacuumed or analyzed
+                if row and row[0] >= 0:
+                    return row[0]
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def exact_count(self):
+        if isinstance(self.object_list, QuerySet):
+            return self.object_list.count()
+        return len(self.object_list)
+
+    @cached_property
+    def count(self):
+        estimate = self.estimate()
+        if estimate is None or estimate < self.exact_below:
+            return self.exact_count()
+        self.count_is_estimate = True
+        return estimate
+
+    def _set_count(self, count, estimate=True):
+        self.__dict__['count'] = count
+        self.__dict__.pop('num_pages', None)
+        self.count_is_estimate = estimate
+
+    def validate_number(self, number):
+        if self.count_is_estimate:
+            # The estimate may be short of the real total, so later pages are allowed
+            # and checked against the rows they actually return
+            try:
+                return super().validate_number(number)
+            except EmptyPage:
+                number = int(number)
+                if number < 1:
+                    raise
+                return number
+        return super().validate_number(number)
+
+    def page(self, number):
+        if not (self.count and self.count_is_estimate):
+            return super().page(number)
+
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = self.object_list[bottom:bottom + self.per_page]
+        rows = len(object_list)
+        if rows == 0 and number > 1:
+            # Past the real end: an exact count gives the right last page
+            self._set_count(self.exact_count(), estimate=False)
+            return super().page(number)
+        if rows < self.per_page:
+            self._set_count(bottom + rows, estimate=False)
+        elif bottom + rows >= self.count:
+            self._set_count(bottom + rows + 1)
+        return self._get_page(object_list, number, self)
+
+    def get_page(self, number):
+        try:
+            return super().get_page(number)
+        except EmptyPage:
+            # The estimate promised pages that do not exist; the count is exact now
+            return super().get_page(self.num_pages)
@@ -62,6 +62,9 @@ INSTALLED_APPS = [
     'news',
     'portal',
     'admin_portal',  # Custom admin portal
+    'search',  # Site-wide search
+    'jobs',  # Background job queue
+    'imaging',  # Responsive image renditions
 ]
 
 MIDDLEWARE = [
@@ -91,6 +94,8 @@ TEMPLATES = [
                 'django.template.context_processors.media',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'portal.context_processors.academic_calendar',
+                'portal.context_processors.inbox',
             ],
         },
     },
@@ -163,7 +168,16 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 # Email settings (for contact forms)
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # Development only
+# console (the default) prints mail, filebased writes it to EMAIL_FILE_PATH;
+# both are meant for development. Tests always use the in-memory backend.
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=str(BASE_DIR / 'logs' / 'email'))
+
+# Outbox (jobs.mail): messages sent per mail server connection, messages per
+# second (0 = unlimited) and attempts before a message is marked failed
+EMAIL_BATCH_SIZE = config('EMAIL_BATCH_SIZE', default=50, cast=int)
+EMAIL_RATE_LIMIT = config('EMAIL_RATE_LIMIT', default=0, cast=float)
+EMAIL_MAX_ATTEMPTS = config('EMAIL_MAX_ATTEMPTS', default=5, cast=int)
 
 # Production Email Settings (uncomment when ready for production)
 # EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -185,6 +199,11 @@ CONTACT_EMAIL = 'nyakhobisecsch@gmail.com'
 ADMISSIONS_EMAIL = 'nyakhobisecsch@gmail.com' 
 PRINCIPAL_EMAIL = 'nyakhobisecsch@gmail.com'
 
+# Background jobs (jobs app): email and other slow work is queued and run by
+# `manage.py run_jobs`. Set JOBS_EAGER=True to run jobs in-process instead,
+# e.g. in development without a worker.
+JOBS_EAGER = config('JOBS_EAGER', default=False, cast=bool)
+
 # Google reCAPTCHA Settings
 RECAPTCHA_PUBLIC_KEY = config('RECAPTCHA_PUBLIC_KEY', default='')
 RECAPTCHA_PRIVATE_KEY = config('RECAPTCHA_PRIVATE_KEY', default='')
@@ -249,6 +268,11 @@ LOGGING = {
             'level': 'WARNING',
             'propagate': False,
         },
+        'jobs': {
+            'handlers': ['file'],
+            'level': 'WARNING',
+            'propagate': True,
+        },
     },
 }
 
@@ -353,6 +377,42 @@ SESSION_COOKIE_HTTPONLY = True  # Prevent JavaScript access to session cookie
 SESSION_COOKIE_SECURE = not DEBUG  # HTTPS only in production
 SESSION_COOKIE_SAMESITE = 'Lax'  # CSRF protection
 
+# ============================================================================
+# CACHE CONFIGURATION
+# ============================================================================
+
+# Shared cache for all gunicorn workers. CACHE_BACKEND is one of:
+#   locmem   - per-process memory (development default)
+#   file     - files under CACHE_DIR
+#   database - cache tables, created by `python manage.py createcachetable`
+#   redis    - Redis-compatible server at CACHE_URL (needs the `redis` package)
+# See st_marys_school/cache_config.py for the named aliases.
+from st_marys_school.cache_config import build_caches
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem' if DEBUG else 'database')
+CACHE_URL = config('CACHE_URL', default='')
+CACHE_DIR = Path(config('CACHE_DIR', default=str(BASE_DIR / 'cache')))
+
+CACHES = build_caches(
+    CACHE_BACKEND,
+    url=CACHE_URL,
+    directory=CACHE_DIR,
+    timeouts={'sessions': SESSION_COOKIE_AGE},
+)
+
+# Sessions are read from the 'sessions' cache and written through to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Tests always run against local memory so they never touch a shared cache
+TEST_RUNNER = 'st_marys_school.test_runner.LocalCacheTestRunner'
+
+# Callables run by `python manage.py manage_cache warm`
+CACHE_WARMERS = [
+    'st_marys_school.page_cache.new_page_generation',
+    'portal.academic_calendar.warm_academic_calendar',
+]
+
 # ============================================================================
 # PASSWORD STRENGTH REQUIREMENTS (Enhanced)
 # ============================================================================
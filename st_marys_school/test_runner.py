@@ -0,0 +1,23 @@
+"""
+Test runner that keeps the test suite off the shared cache
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from st_marys_school.cache_config import build_caches
+
+
+class LocalCacheTestRunner(DiscoverRunner):
+    """Runs the tests against local-memory caches whatever CACHE_BACKEND is configured"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._local_caches = override_settings(
+            CACHES=build_caches('locmem', timeouts={'sessions': settings.SESSION_COOKIE_AGE})
+        )
+        self._local_caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._local_caches.disable()
+        super().teardown_test_environment(**kwargs)
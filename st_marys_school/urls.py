@@ -16,6 +16,7 @@ urlpatterns = [
     path('contact/', include('contact.urls')),
     path('news/', include('news.urls')),
     path('portal/', include('portal.urls')),
+    path('search/', include('search.urls')),
 ]
 
 # Serve media and static files during development